@@ -5,17 +5,40 @@ Supports: UGPHONE, VSPHONE, REDFINGER, Standard Android/Emulators
 Author: Optimized for game monitoring and rejoin
 """
 
-import requests
+import atexit
 import time
 import os
 import json
 import subprocess
-import urllib.parse
 import re
+import codecs
+import functools
+import collections
+import bisect
+import random
+import shutil
+import queue
 import threading
 import sys
+import signal
+import select
+import shlex
+import stat
+import contextlib
+import glob
+import importlib
 from datetime import datetime
 
+# requests, psutil, concurrent.futures, http.server, socketserver and argparse are
+# imported where a feature first needs them; a menu session that never enables
+# presence checks or fleet mode does not pay for them at startup.
+@functools.lru_cache(maxsize=None)
+def optional_import(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
 # Configuration
 COLORS = {
     "RESET": "\033[0m",
@@ -25,28 +48,68 @@ COLORS = {
     "ERROR": "\033[91m",
     "BOLD": "\033[1m",
     "CYAN": "\033[96m",
-    "HEADER": "\033[95m"
+    "HEADER": "\033[95m",
+    "DEBUG": "\033[90m"
 }
 
 CONFIG_FILE = "/sdcard/roblox_config.json"
+PLATFORM_CACHE_FILE = "/sdcard/roblox_platform.json"
+PACKAGE_CACHE_FILE = "/sdcard/roblox_package_cache.json"
+LAUNCH_STATS_FILE = "/sdcard/roblox_launch_stats.json"
+LOG_FILE = "/sdcard/roblox_rejoiner.log"
 ROBLOX_PACKAGE = "com.roblox.client"
+# Cache directories the disk-budget manager may evict from; {package} is the client package.
+DEFAULT_CACHE_DIRS = ("/data/data/{package}/cache", "/sdcard/Android/data/{package}/cache")
+
+def set_state_dir(path):
+    # Keeps config, caches and the log somewhere other than /sdcard (one directory
+    # per device in fleet mode).
+    global CONFIG_FILE, PLATFORM_CACHE_FILE, PACKAGE_CACHE_FILE, LAUNCH_STATS_FILE, LOG_FILE
+    os.makedirs(path, exist_ok=True)
+    CONFIG_FILE = os.path.join(path, "roblox_config.json")
+    PLATFORM_CACHE_FILE = os.path.join(path, "roblox_platform.json")
+    PACKAGE_CACHE_FILE = os.path.join(path, "roblox_package_cache.json")
+    LAUNCH_STATS_FILE = os.path.join(path, "roblox_launch_stats.json")
+    LOG_FILE = os.path.join(path, "roblox_rejoiner.log")
 
 # Global variables
 automation_running = False
 platform_info = None
 last_game_join_time = None
+supervisor = None
 
 # Platform Detection
 class PlatformDetector:
-    def __init__(self):
+    SU_BINARIES = ['su', 'ugphone_su', 'vsphone_su']
+
+    def __init__(self, cache_file=None):
         self.detected_platform = None
+        self.cache_file = cache_file or PLATFORM_CACHE_FILE
+        self.build_prop = None
+        self.su_results = {}
     
-    def detect_platform(self):
+    def detect_platform(self, use_cache=True):
+        # The profile is persisted keyed by the build fingerprint, so later starts
+        # skip detection until the device image changes.
+        fingerprint = self._get_fingerprint()
+        if use_cache:
+            cached = self._load_cached(fingerprint)
+            if cached:
+                self.detected_platform = cached
+                print_formatted("INFO", f"Platform detected: {cached['name']} (cached)")
+                return cached
+        self.detected_platform = self._detect()
+        if self.detected_platform['type'] != 'unknown':
+            self._save_cached(fingerprint)
+        return self.detected_platform
+
+    def _detect(self):
         try:
+            self._probe_su()
             if self._is_ugphone():
                 has_root = self._check_root_ugphone()
                 su_prefix = 'ugphone_su -c' if self._ugphone_su_works() else 'su -c' if has_root else ''
-                self.detected_platform = {
+                platform = {
                     'type': 'ugphone',
                     'name': 'UGPHONE',
                     'has_root': has_root,
@@ -54,13 +117,10 @@ class PlatformDetector:
                     'shell_prefix': su_prefix,
                     'special_commands': True
                 }
-                print_formatted("INFO", f"Platform detected: {self.detected_platform['name']}")
-                return self.detected_platform
-            
-            if self._is_vsphone():
+            elif self._is_vsphone():
                 has_root = self._check_root_vsphone()
                 su_prefix = 'vsphone_su -c' if self._vsphone_su_works() else 'su -c' if has_root else ''
-                self.detected_platform = {
+                platform = {
                     'type': 'vsphone',
                     'name': 'VSPHONE',
                     'has_root': has_root,
@@ -68,11 +128,8 @@ class PlatformDetector:
                     'shell_prefix': su_prefix,
                     'special_commands': True
                 }
-                print_formatted("INFO", f"Platform detected: {self.detected_platform['name']}")
-                return self.detected_platform
-            
-            if self._is_redfinger():
-                self.detected_platform = {
+            elif self._is_redfinger():
+                platform = {
                     'type': 'redfinger',
                     'name': 'REDFINGER',
                     'has_root': self._check_root_standard(),
@@ -80,23 +137,21 @@ class PlatformDetector:
                     'shell_prefix': 'su -c',
                     'special_commands': False
                 }
-                print_formatted("INFO", f"Platform detected: {self.detected_platform['name']}")
-                return self.detected_platform
-            
-            self.detected_platform = {
-                'type': 'standard',
-                'name': 'Standard Android',
-                'has_root': self._check_root_standard(),
-                'use_adb': True,
-                'shell_prefix': 'su -c',
-                'special_commands': False
-            }
-            print_formatted("INFO", f"Platform detected: {self.detected_platform['name']}")
-            return self.detected_platform
+            else:
+                platform = {
+                    'type': 'standard',
+                    'name': 'Standard Android',
+                    'has_root': self._check_root_standard(),
+                    'use_adb': True,
+                    'shell_prefix': 'su -c',
+                    'special_commands': False
+                }
+            print_formatted("INFO", f"Platform detected: {platform['name']}")
+            return platform
             
         except Exception as e:
             print_formatted("ERROR", f"Platform detection error: {str(e)}")
-            self.detected_platform = {
+            return {
                 'type': 'unknown',
                 'name': 'Unknown Platform',
                 'has_root': False,
@@ -104,148 +159,692 @@ class PlatformDetector:
                 'shell_prefix': '',
                 'special_commands': False
             }
-            return self.detected_platform
+
+    def _load_cached(self, fingerprint):
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+            if fingerprint and cached.get('fingerprint') == fingerprint:
+                return cached.get('platform')
+        except Exception:
+            pass
+        return None
+
+    def _save_cached(self, fingerprint):
+        if not fingerprint:
+            return
+        try:
+            write_json_atomic(self.cache_file, {'fingerprint': fingerprint, 'detected_at': time.time(),
+                                                'platform': self.detected_platform})
+        except Exception as e:
+            print_formatted("WARNING", f"Could not save platform profile: {e}")
+
+    def _has_indicator(self, indicators, patterns):
+        for indicator in indicators:
+            if os.path.exists(indicator):
+                return True
+        build_info = self._get_build_prop().lower()
+        return any(pattern in build_info for pattern in patterns)
     
     def _is_ugphone(self):
         try:
-            indicators = [
-                '/system/bin/ugphone',
-                '/system/app/UGPhone',
-                '/data/local/tmp/ugphone'
-            ]
-            for indicator in indicators:
-                if os.path.exists(indicator):
-                    return True
-            build_info = self._get_build_prop()
-            ugphone_patterns = ['ugphone', 'ug_phone', 'cloudphone']
-            for pattern in ugphone_patterns:
-                if pattern.lower() in build_info.lower():
-                    return True
-            return False
+            return self._has_indicator(
+                ['/system/bin/ugphone', '/system/app/UGPhone', '/data/local/tmp/ugphone'],
+                ['ugphone', 'ug_phone', 'cloudphone'])
         except:
             return False
     
     def _is_vsphone(self):
         try:
-            indicators = [
-                '/system/bin/vsphone',
-                '/system/app/VSPhone',
-                '/data/local/tmp/vsphone'
-            ]
-            for indicator in indicators:
-                if os.path.exists(indicator):
-                    return True
-            build_info = self._get_build_prop()
-            vsphone_patterns = ['vsphone', 'vs_phone', 'virtualphone']
-            for pattern in vsphone_patterns:
-                if pattern.lower() in build_info.lower():
-                    return True
-            return False
+            return self._has_indicator(
+                ['/system/bin/vsphone', '/system/app/VSPhone', '/data/local/tmp/vsphone'],
+                ['vsphone', 'vs_phone', 'virtualphone'])
         except:
             return False
     
     def _is_redfinger(self):
         try:
-            indicators = [
-                '/system/bin/redfinger',
-                '/system/app/RedFinger',
-                '/data/local/tmp/redfinger'
-            ]
-            for indicator in indicators:
-                if os.path.exists(indicator):
-                    return True
-            build_info = self._get_build_prop()
-            redfinger_patterns = ['redfinger', 'red_finger', 'redcloud']
-            for pattern in redfinger_patterns:
-                if pattern.lower() in build_info.lower():
-                    return True
-            return False
+            return self._has_indicator(
+                ['/system/bin/redfinger', '/system/app/RedFinger', '/data/local/tmp/redfinger'],
+                ['redfinger', 'red_finger', 'redcloud'])
         except:
             return False
     
     def _get_build_prop(self):
+        # Read once, in-process; getprop is only a fallback when the file is unreadable.
+        if self.build_prop is None:
+            try:
+                with open('/system/build.prop', 'r', errors='replace') as f:
+                    self.build_prop = f.read()
+            except Exception:
+                try:
+                    result = subprocess.run(['getprop'], capture_output=True, text=True, timeout=5)
+                    self.build_prop = result.stdout
+                except:
+                    self.build_prop = ""
+        return self.build_prop
+
+    def _get_fingerprint(self):
+        for line in self._get_build_prop().splitlines():
+            line = line.strip().lstrip('[')
+            for key in ('ro.build.fingerprint', 'ro.system.build.fingerprint'):
+                if line.startswith(key):
+                    value = line[len(key):].lstrip(']:= [').rstrip(']')
+                    if value:
+                        return value
+        return None
+
+    def _probe_su(self):
+        # The su variants are independent, so they are probed concurrently, once each.
+        import concurrent.futures
+        binaries = [binary for binary in self.SU_BINARIES if binary not in self.su_results]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(binaries) or 1) as executor:
+            for binary, works in zip(binaries, executor.map(self._run_su_probe, binaries)):
+                self.su_results[binary] = works
+
+    def _run_su_probe(self, binary):
+        if shutil.which(binary) is None:
+            return False
         try:
-            result = subprocess.run(['cat', '/system/build.prop'], 
-                                  capture_output=True, text=True, timeout=5)
-            return result.stdout
-        except:
-            return ""
-    
-    def _check_root_standard(self):
-        try:
-            result = subprocess.run(['su', '-c', 'echo test'], 
+            result = subprocess.run([binary, '-c', 'echo test'], 
                                   capture_output=True, text=True, timeout=5)
             return 'test' in result.stdout
         except:
             return False
+
+    def _su_works(self, binary):
+        if binary not in self.su_results:
+            self.su_results[binary] = self._run_su_probe(binary)
+        return self.su_results[binary]
+    
+    def _check_root_standard(self):
+        return self._su_works('su')
     
     def _check_root_ugphone(self):
-        try:
-            if self._check_root_standard():
-                return True
-            result = subprocess.run(['ugphone_su', '-c', 'echo test'], 
-                                  capture_output=True, text=True, timeout=5)
-            return 'test' in result.stdout
-        except:
-            return False
+        return self._su_works('su') or self._su_works('ugphone_su')
 
     def _ugphone_su_works(self):
-        try:
-            result = subprocess.run(['ugphone_su', '-c', 'echo test'], 
-                                  capture_output=True, text=True, timeout=5)
-            return 'test' in result.stdout
-        except:
-            return False
+        return self._su_works('ugphone_su')
     
     def _check_root_vsphone(self):
-        try:
-            if self._check_root_standard():
-                return True
-            result = subprocess.run(['vsphone_su', '-c', 'echo test'], 
-                                  capture_output=True, text=True, timeout=5)
-            return 'test' in result.stdout
-        except:
-            return False
+        return self._su_works('su') or self._su_works('vsphone_su')
     
     def _vsphone_su_works(self):
+        return self._su_works('vsphone_su')
+
+# Core Functions
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "SUCCESS": 20, "HEADER": 20, "WARNING": 30, "ERROR": 40}
+LOG_PREFIXES = {
+    "DEBUG": "DEBUG",
+    "INFO": "INFO",
+    "SUCCESS": "OK",
+    "WARNING": "WARN",
+    "ERROR": "ERROR",
+    "HEADER": "===="
+}
+
+class LogBackend:
+    # Records are filtered by level before anything is formatted, truncated,
+    # kept in a bounded ring buffer and written to the console and a rotating
+    # JSON-lines file. Worker threads hand records to a writer thread so a slow
+    # terminal never stalls monitoring; the main thread writes inline so menu
+    # output stays in order with its prompts.
+    QUEUE_SIZE = 10000
+
+    def __init__(self, console_level="INFO", file_level="INFO", log_file=None,
+                 max_bytes=1048576, backups=3, ring_size=500, max_message=2000):
+        self.lock = threading.Lock()
+        # Separate from lock, which the writer holds while it does I/O: a worker
+        # dropping a record must not wait behind the very write it is skipping.
+        self.dropped_lock = threading.Lock()
+        self.ring = collections.deque(maxlen=ring_size)
+        self.queue = queue.Queue(self.QUEUE_SIZE)
+        self.thread = None
+        self.file = None
+        self.file_size = 0
+        self.dropped = 0
+        self.stamp_second = None
+        self.stamp = ""
+        self.configure(console_level, file_level, log_file, max_bytes, backups, max_message)
+
+    def configure(self, console_level="INFO", file_level="INFO", log_file=None,
+                  max_bytes=1048576, backups=3, max_message=2000):
+        with self.lock:
+            self.console_level = LOG_LEVELS.get(console_level, 20)
+            self.file_level = LOG_LEVELS.get(file_level, 20) if log_file else 100
+            self.min_level = min(self.console_level, self.file_level)
+            self.max_bytes = max_bytes
+            self.backups = backups
+            self.max_message = max_message
+            if log_file != getattr(self, 'log_file', None):
+                self._close_file()
+                self.log_file = log_file
+
+    def enabled(self, level):
+        return LOG_LEVELS.get(level, 20) >= self.min_level
+
+    def emit(self, level, message):
+        rank = LOG_LEVELS.get(level, 20)
+        if rank < self.min_level:
+            return
+        message = str(message)
+        if len(message) > self.max_message:
+            message = f"{message[:self.max_message]}... [{len(message) - self.max_message} chars truncated]"
+        record = (time.time(), level, rank, threading.current_thread().name, message)
+        if self.thread is None or threading.current_thread() is threading.main_thread():
+            with self.lock:
+                self._write([record])
+            return
         try:
-            result = subprocess.run(['vsphone_su', '-c', 'echo test'], 
-                                  capture_output=True, text=True, timeout=5)
-            return 'test' in result.stdout
-        except:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped += 1
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer, name="log-writer", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        thread = self.thread
+        if thread is not None:
+            self.queue.put(None)
+            thread.join(timeout=5)
+            self.thread = None
+        with self.lock:
+            self._close_file()
+
+    def recent(self, count=None):
+        with self.lock:
+            records = list(self.ring)
+        return records[-count:] if count else records
+
+    def _writer(self):
+        while True:
+            records = [self.queue.get()]
+            # Drain whatever else is queued so one flush covers the whole batch.
+            while len(records) < 256:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in records
+            with self.lock:
+                self._write([record for record in records if record is not None])
+            if stop:
+                return
+
+    def _timestamp(self, created):
+        second = int(created)
+        if second != self.stamp_second:
+            self.stamp_second = second
+            self.stamp = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        return self.stamp
+
+    def _write(self, records):
+        console = []
+        for created, level, rank, thread_name, message in records:
+            timestamp = self._timestamp(created)
+            self.ring.append({'time': timestamp, 'level': level, 'message': message})
+            if rank >= self.console_level:
+                console.append(f"{COLORS.get(level, '')}{timestamp} [{LOG_PREFIXES.get(level, level)}] {message}{COLORS['RESET']}")
+            if rank >= self.file_level:
+                self._write_file({'ts': round(created, 3), 'time': timestamp, 'level': level,
+                                  'thread': thread_name, 'message': message})
+        if console:
+            try:
+                sys.stdout.write("\n".join(console) + "\n")
+                sys.stdout.flush()
+            except Exception:
+                pass
+        if self.file:
+            try:
+                self.file.flush()
+            except Exception:
+                self._close_file()
+
+    def _write_file(self, entry):
+        if self.file is None and not self._open_file():
+            return
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        try:
+            self.file.write(line)
+            self.file_size += len(line)
+            if self.file_size >= self.max_bytes:
+                self._rotate()
+        except Exception:
+            self._close_file()
+
+    def _open_file(self):
+        try:
+            self.file = open(self.log_file, 'a', encoding='utf-8')
+            self.file_size = self.file.tell()
+            return True
+        except Exception:
+            # An unwritable path disables the file sink instead of retrying per record.
+            self.file_level = 100
+            self.min_level = self.console_level
             return False
 
-# Core Functions
+    def _rotate(self):
+        self._close_file()
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.log_file}.{index}"):
+                os.replace(f"{self.log_file}.{index}", f"{self.log_file}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.log_file, f"{self.log_file}.1")
+        else:
+            os.remove(self.log_file)
+
+    def _close_file(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            except Exception:
+                pass
+        self.file = None
+        self.file_size = 0
+
+log_backend = LogBackend()
+atexit.register(log_backend.stop)
+
+def configure_logging(config):
+    console_level = config.get('log_level', 'INFO')
+    if not config.get('verbose_logging', True) and LOG_LEVELS.get(console_level, 20) < LOG_LEVELS['WARNING']:
+        console_level = 'WARNING'
+    log_backend.configure(
+        console_level=console_level,
+        file_level=config.get('log_file_level', 'INFO'),
+        log_file=config.get('log_file') or None,
+        max_bytes=int(config.get('log_max_bytes', 1048576)),
+        backups=int(config.get('log_backups', 3)),
+        max_message=int(config.get('log_max_message', 2000))
+    )
+    log_backend.start()
+
+def log_enabled(level):
+    return log_backend.enabled(level)
+
 def print_formatted(level, message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    prefix = {
-        "INFO": "INFO",
-        "SUCCESS": "OK",
-        "WARNING": "WARN",
-        "ERROR": "ERROR",
-        "HEADER": "===="
-    }.get(level, level)
-    print(f"{COLORS[level]}{timestamp} [{prefix}] {message}{COLORS['RESET']}")
-
-def run_shell_command(command, timeout=10, platform_info=None):
+    log_backend.emit(level, message)
+
+def write_json_atomic(path, data, mode=0o644):
+    # Written to a temp file in the same directory, synced and renamed over the
+    # target, so readers (and the config watcher) never see a partial file.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
     try:
-        if platform_info and platform_info.get('shell_prefix'):
-            full_command = platform_info['shell_prefix'].split() + [command]
-        else:
-            full_command = command.split()
-        result = subprocess.run(full_command, capture_output=True, text=True, timeout=timeout)
+        os.chmod(tmp_path, mode)
+    except OSError:
+        pass
+    os.replace(tmp_path, path)
+
+# Metrics
+COMMAND_FAMILIES = {
+    'ps': 'ps', 'dumpsys': 'dumpsys', 'logcat': 'logcat', 'am': 'am', 'pm': 'pm',
+    'cmd': 'cmd', 'getprop': 'getprop', 'kill': 'kill', 'pkill': 'kill', 'killall': 'kill'
+}
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+JOIN_BUCKETS = (5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600)
+JOIN_STATE_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+UPTIME_BUCKETS = (60, 300, 900, 1800, 3600, 7200, 14400, 43200, 86400)
+
+@functools.lru_cache(maxsize=256)
+def command_family(command):
+    # First recognised program in the command line; batched snapshot commands
+    # are keyed by their first real program rather than the echo markers.
+    for token in re.split(r"[\s;&|()']+", command):
+        family = COMMAND_FAMILIES.get(token.rsplit('/', 1)[-1])
+        if family:
+            return family
+    return 'other'
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class Metrics:
+    # Recording is a dict lookup and a few additions under one lock; all
+    # formatting happens only when somebody scrapes /metrics or /metrics.json.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.server = None
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS):
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def set_gauge(self, name, value, labels=()):
+        with self.lock:
+            self.gauges[(name, labels)] = value
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"')) for key, value in pairs) + '}'
+
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted((key, (h.buckets, list(h.counts), h.total, h.count)) for key, h in self.histograms.items())
+        gauges.append((('rejoiner_uptime_seconds', ()), time.time() - self.started))
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), value in gauges:
+            if name not in seen:
+                lines.append(f"# TYPE {name} gauge")
+                seen.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value:.3f}")
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        def key(name, labels):
+            return name + self._labels(labels)
+        with self.lock:
+            data = {
+                'uptime': time.time() - self.started,
+                'counters': {key(*k): v for k, v in self.counters.items()},
+                'gauges': {key(*k): v for k, v in self.gauges.items()},
+                'histograms': {key(*k): {
+                    'count': h.count,
+                    'sum': h.total,
+                    'buckets': dict(zip([str(b) for b in h.buckets] + ['+Inf'], h.counts))
+                } for k, h in self.histograms.items()}
+            }
+        return data
+
+    def serve(self, port, host='127.0.0.1'):
+        if self.server or not port:
+            return self.server
+        import http.server
+        registry = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body = json.dumps(registry.snapshot(), indent=2).encode()
+                    content_type = 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body = registry.prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        except Exception as e:
+            print_formatted("WARNING", f"Metrics endpoint unavailable on {host}:{port}: {e}")
+            return None
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print_formatted("INFO", f"Metrics available at http://{host}:{port}/metrics")
+        return self.server
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+metrics = Metrics()
+
+# Shell Session
+class ShellSession:
+    # One long-lived shell (su, ugphone_su, vsphone_su or plain sh). Commands are
+    # written to stdin and framed by a per-command sentinel carrying the exit
+    # status, so stdout/stderr/returncode can be read back without a new process.
+    # The session runs one command at a time; a caller that cannot get it within
+    # LOCK_WAIT seconds is handed back None and runs a one-shot process instead,
+    # so one slow command never stalls the monitor loop or a join.
+    RESTART_BACKOFF = 30
+    LOCK_WAIT = 1
+
+    def __init__(self, argv, start_timeout=5):
+        self.argv = list(argv)
+        self.start_timeout = start_timeout
+        self.process = None
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.starts = 0
+        self.last_failure = 0
+        self.stdout_queue = None
+        self.stderr_queue = None
+
+    @classmethod
+    def for_platform(cls, platform_info=None):
+        prefix = (platform_info or {}).get('shell_prefix', '')
+        argv = [part for part in prefix.split() if part != '-c']
+        return cls(argv or ['sh'])
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.close()
+        if time.time() - self.last_failure < self.RESTART_BACKOFF:
+            return False
+        try:
+            self.process = subprocess.Popen(
+                self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, text=True, bufsize=1, errors='replace'
+            )
+            self.stdout_queue = queue.Queue()
+            self.stderr_queue = queue.Queue()
+            for stream, target in ((self.process.stdout, self.stdout_queue),
+                                   (self.process.stderr, self.stderr_queue)):
+                threading.Thread(target=self._pump, args=(stream, target), daemon=True).start()
+            result = self._execute("echo ready", self.start_timeout)
+            if result.stdout.strip() != "ready":
+                raise RuntimeError("shell handshake failed")
+            self.starts += 1
+            return True
+        except Exception as e:
+            print_formatted("WARNING", f"Shell session unavailable ({' '.join(self.argv)}): {str(e)}")
+            self.close()
+            self.last_failure = time.time()
+            return False
+
+    def close(self):
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            if process.poll() is None:
+                process.stdin.close()
+                process.kill()
+            process.wait(timeout=2)
+        except Exception:
+            pass
+
+    def run(self, command, timeout=10, wait=None):
+        # Returns None when no session can be started, or it stayed busy for wait
+        # seconds, so the caller can fall back to a one-shot process; a dead shell
+        # is restarted and the command retried once.
+        if not self.lock.acquire(timeout=self.LOCK_WAIT if wait is None else wait):
+            return None
+        try:
+            for _ in range(2):
+                if not self.is_alive() and not self.start():
+                    return None
+                try:
+                    return self._execute(command, timeout)
+                except subprocess.TimeoutExpired:
+                    self.close()
+                    raise
+                except (OSError, ValueError, EOFError):
+                    self.close()
+            return None
+        finally:
+            self.lock.release()
+
+    def _pump(self, stream, target):
+        try:
+            for line in iter(stream.readline, ''):
+                target.put(line)
+        except Exception:
+            pass
+        target.put(None)
+
+    def _execute(self, command, timeout):
+        self.counter += 1
+        token = f"__rejoiner_{os.getpid()}_{self.counter}_{int(time.time() * 1000)}__"
+        quoted = command.replace("'", "'\\''")
+        script = (
+            f"( eval '{quoted}' ) </dev/null\n"
+            f"__rc=$?\n"
+            f"printf '\\n%s %d\\n' {token} $__rc\n"
+            f"printf '\\n%s\\n' {token} >&2\n"
+        )
+        deadline = time.time() + timeout
+        self.process.stdin.write(script)
+        self.process.stdin.flush()
+        stdout, returncode = self._read_frame(self.stdout_queue, token, deadline)
+        stderr, _ = self._read_frame(self.stderr_queue, token, deadline)
+        return subprocess.CompletedProcess(self.argv + [command], returncode, stdout, stderr)
+
+    def _read_frame(self, source, token, deadline):
+        lines = []
+        while True:
+            try:
+                line = source.get(timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(self.argv, deadline)
+            if line is None:
+                raise EOFError("shell session exited")
+            if line.startswith(token):
+                status = line[len(token):].strip()
+                # The frame starts with a newline so partial output lines are terminated.
+                if lines and lines[-1].endswith("\n"):
+                    lines[-1] = lines[-1][:-1]
+                return "".join(lines), int(status) if status.lstrip('-').isdigit() else 0
+            lines.append(line)
+
+_shell_sessions = {}
+_shell_sessions_lock = threading.Lock()
+
+def get_shell_session(platform_info=None):
+    key = (platform_info or {}).get('shell_prefix', '')
+    with _shell_sessions_lock:
+        session = _shell_sessions.get(key)
+        if session is None:
+            session = ShellSession.for_platform(platform_info)
+            _shell_sessions[key] = session
+        return session
+
+def close_shell_sessions():
+    with _shell_sessions_lock:
+        for session in _shell_sessions.values():
+            session.close()
+        _shell_sessions.clear()
+
+atexit.register(close_shell_sessions)
+
+def _shell_argv(command, platform_info=None):
+    if platform_info and platform_info.get('shell_prefix'):
+        return platform_info['shell_prefix'].split() + [command]
+    return ['sh', '-c', command]
+
+def _run_oneshot(command, timeout, platform_info=None):
+    return subprocess.run(_shell_argv(command, platform_info), capture_output=True, text=True, timeout=timeout)
+
+# Command Backend
+command_backend = None
+
+def set_command_backend(backend):
+    # A backend answers shell commands in place of the device: run(command, timeout)
+    # returns a CompletedProcess. It may also expose proc_root (a /proc tree for the
+    # proc index) and logcat_stream(command) (a readable binary stream for the
+    # follower). Pass None to go back to the real shell.
+    global command_backend, proc_index, _snapshot, _android_sdk
+    command_backend = backend
+    proc_index = None
+    _snapshot = None
+    _android_sdk = None
+
+def run_shell_command(command, timeout=10, platform_info=None, background=False):
+    # background=True is for long housekeeping (cache walks, bulk deletes): it
+    # always gets its own process and leaves the shared session to the rejoin path.
+    started = time.monotonic()
+    family = (('family', command_family(command)),)
+    try:
+        result = None
+        if command_backend is not None:
+            result = command_backend.run(command, timeout)
+        elif not background:
+            result = get_shell_session(platform_info).run(command, timeout=timeout)
+        if result is None:
+            result = _run_oneshot(command, timeout, platform_info)
+        elapsed = time.monotonic() - started
+        metrics.observe('rejoiner_shell_command_seconds', elapsed, family)
+        if log_enabled("DEBUG"):
+            print_formatted("DEBUG", f"$ {command} ({elapsed:.3f}s, {len(result.stdout)} bytes)")
         if result.stderr and "permission denied" not in result.stderr.lower():
             print_formatted("WARNING", f"Command stderr: {result.stderr.strip()}")
         return result.stdout.strip()
     except subprocess.TimeoutExpired:
+        metrics.inc('rejoiner_shell_command_timeouts_total', family)
         print_formatted("WARNING", f"Command timeout: {command}")
         return ""
     except Exception as e:
+        metrics.inc('rejoiner_shell_command_errors_total', family)
         print_formatted("ERROR", f"Command failed: {command} - {str(e)}")
         return ""
 
-def load_config():
-    default_config = {
+def default_config():
+    return {
         "accounts": [],
         "game_id": "",
         "private_server": "",
@@ -257,236 +856,2540 @@ def load_config():
         "launch_delay": 300,
         "retry_delay": 15,
         "force_kill_delay": 10,
+        "close_grace": 5,
         "minimize_crashes": True,
         "launch_attempts": 1,
         "cooldown_period": 120,
         "auto_rejoin": True,
         "ui_timeout": 30,
-        "verbose_logging": True
+        "verbose_logging": True,
+        "package": ROBLOX_PACKAGE,
+        "max_concurrent_launches": 1,
+        "join_deadlines": dict(DEFAULT_JOIN_DEADLINES),
+        "snapshot_ttl": 2,
+        "adaptive_launch": True,
+        "launch_exploration": 0.1,
+        "metrics_port": 9187,
+        "log_level": "INFO",
+        "log_file": LOG_FILE,
+        "log_file_level": "INFO",
+        "log_max_bytes": 1048576,
+        "log_backups": 3,
+        "log_max_message": 2000,
+        "config_poll_interval": 2,
+        "control_socket": "",
+        "freeze_detection": True,
+        "freeze_stall_window": 20,
+        "freeze_sample_interval": 5,
+        "resource_watchdog": True,
+        "resource_sample_interval": 30,
+        "resource_window": 120,
+        "memory_limit_mb": 0,
+        "resource_settle_minutes": 5,
+        "restart_horizon_minutes": 10,
+        "max_threads": 0,
+        "cache_budget_mb": 512,
+        "cache_scan_interval": 600,
+        "cache_dirs": list(DEFAULT_CACHE_DIRS),
+        "presence_check": False,
+        "presence_base_url": "https://{service}.roblox.com",
+        "presence_cookie": "",
+        "presence_cache_ttl": 30,
+        "presence_timeout": 5,
+        "presence_grace": 60,
+        "net_detection": True,
+        "net_idle_timeout": 20,
+        "net_game_ports": [49152, 65535],
+        "net_root": "",
+        "admission_control": True,
+        "admission_max_load": 2.0,
+        "admission_min_mem_mb": 400,
+        "admission_max_psi": 40,
+        "admission_max_temp": 90,
+        "admission_max_defer": 300
     }
+
+CONFIG_MINIMUMS = {
+    "check_delay": 1,
+    "max_retries": 1,
+    "launch_delay": 0,
+    "retry_delay": 0,
+    "force_kill_delay": 0,
+    "close_grace": 0,
+    "launch_attempts": 1,
+    "cooldown_period": 0,
+    "ui_timeout": 1,
+    "max_concurrent_launches": 1,
+    "snapshot_ttl": 0,
+    "launch_exploration": 0,
+    "metrics_port": 0,
+    "log_max_bytes": 4096,
+    "log_backups": 0,
+    "log_max_message": 80,
+    "config_poll_interval": 0.5,
+    "freeze_stall_window": 5,
+    "freeze_sample_interval": 1,
+    "resource_sample_interval": 1,
+    "resource_window": 5,
+    "memory_limit_mb": 0,
+    "resource_settle_minutes": 0,
+    "restart_horizon_minutes": 0,
+    "max_threads": 0,
+    "cache_budget_mb": 0,
+    "cache_scan_interval": 30,
+    "presence_cache_ttl": 5,
+    "presence_timeout": 1,
+    "presence_grace": 0,
+    "net_idle_timeout": 1,
+    "admission_min_mem_mb": 0,
+    "admission_max_defer": 0
+}
+NULLABLE_CONFIG_KEYS = {"log_file"}
+
+def validate_config(config, fallback=None):
+    # Values of the wrong type or below their minimum are replaced by the value
+    # from fallback (the running config) or the default, with a warning.
+    defaults = default_config()
+    fallback = fallback or defaults
+    validated = dict(config)
+    for key, default in defaults.items():
+        value = validated.get(key)
+        if value is None and key in NULLABLE_CONFIG_KEYS:
+            continue
+        if key in ("game_id", "private_server", "active_account") and isinstance(value, int) and not isinstance(value, bool):
+            value = validated[key] = str(value)
+        if isinstance(default, bool):
+            valid = isinstance(value, bool)
+        elif isinstance(default, (int, float)):
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if valid and value < CONFIG_MINIMUMS.get(key, value):
+                valid = False
+        else:
+            valid = isinstance(value, type(default))
+        if not valid:
+            print_formatted("WARNING", f"Invalid config value {key}={value!r}, using {fallback.get(key, default)!r}")
+            validated[key] = fallback.get(key, default)
+    deadlines = validated.get("join_deadlines") or {}
+    validated["join_deadlines"] = {state: seconds for state, seconds in deadlines.items()
+                                   if state in DEFAULT_JOIN_DEADLINES and isinstance(seconds, (int, float)) and seconds > 0}
+    return validated
+
+def read_config(path=None, fallback=None):
+    with open(path or CONFIG_FILE, 'r') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError("config file must contain a JSON object")
+    return validate_config({**default_config(), **config}, fallback)
+
+def read_config_quietly():
+    # For read-only callers (CLI queries): never creates or rewrites the file.
+    try:
+        return read_config()
+    except Exception:
+        return default_config()
+
+def load_config():
     try:
         if not os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(default_config, f, indent=4)
-            run_shell_command(f"chmod 644 {CONFIG_FILE}", platform_info=platform_info)
+            config = default_config()
+            write_json_atomic(CONFIG_FILE, config)
             print_formatted("INFO", "Created new config file")
-            return default_config
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
-            merged_config = {**default_config, **config}
-            return merged_config
+            return config
+        return read_config()
     except Exception as e:
         print_formatted("ERROR", f"Config load error: {e}")
-        return default_config
+        return default_config()
 
 def save_config(config):
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=4)
-        run_shell_command(f"chmod 644 {CONFIG_FILE}", platform_info=platform_info)
+        write_json_atomic(CONFIG_FILE, config)
         print_formatted("SUCCESS", "Config saved")
         return True
     except Exception as e:
         print_formatted("ERROR", f"Config save error: {e}")
         return False
 
-# Roblox Control Functions
-def verify_roblox_installation():
-    try:
-        output = run_shell_command(f"pm list packages {ROBLOX_PACKAGE}", platform_info=platform_info)
-        if ROBLOX_PACKAGE not in output:
-            print_formatted("ERROR", "Roblox not installed.")
-            return False
-        version_output = run_shell_command(f"dumpsys package {ROBLOX_PACKAGE} | grep versionName", platform_info=platform_info)
-        if version_output:
-            version = version_output.split("versionName=")[1].split()[0] if "versionName=" in version_output else "Unknown"
-            print_formatted("INFO", f"Roblox version: {version}")
-        return True
-    except Exception as e:
-        print_formatted("ERROR", f"Roblox verification error: {e}")
-        return False
+class ConfigWatcher:
+    # Polls the config file's mtime and size. A change is only taken once the file
+    # parses and validates; a half-written or broken file keeps the running config.
+    def __init__(self, path=None, interval=2):
+        self.path = path or CONFIG_FILE
+        self.interval = interval
+        self.signature = self._signature()
+        self.last_poll = time.time()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def poll(self, current=None):
+        now = time.time()
+        if now - self.last_poll < self.interval:
+            return None
+        self.last_poll = now
+        signature = self._signature()
+        if signature is None or signature == self.signature:
+            return None
+        self.signature = signature
+        try:
+            return read_config(self.path, current)
+        except Exception as e:
+            print_formatted("WARNING", f"Config file changed but could not be read, keeping current settings: {e}")
+            return None
+
+# Process Index
+class ProcIndex:
+    # Finds package processes from /proc/<pid>/cmdline and stat instead of a full
+    # ps render. Known pids are re-validated with a single stat read (start time
+    # guards against pid reuse) and a full scan only happens when one vanishes or
+    # the rescan interval passes. On Android /proc is mounted hidepid, so with
+    # root the same reads go through the shell session; the stat reads then ride
+    # along in the device snapshot batch (stat_command/absorb_stats) instead of
+    # costing a round-trip of their own. The supervisor, rejoin and close threads
+    # all use the index, so its state is only touched under the lock.
+    RESCAN_INTERVAL = 30
+    PREFETCH_MAX_AGE = 2
+
+    def __init__(self, proc_root='/proc', use_shell=False):
+        self.proc_root = proc_root
+        self.use_shell = use_shell
+        self.lock = threading.RLock()
+        self.known = {}
+        self.last_scan = {}
+        self.main_pids = {}
+        self.restarts = {}
+        self.prefetched = {}
+        self.prefetched_pids = set()
+        self.prefetched_at = 0
+
+    @classmethod
+    def for_platform(cls, platform_info=None):
+        if command_backend is not None:
+            # A backend without a local /proc view (adb) is scanned through its shell.
+            if getattr(command_backend, 'proc_root', None):
+                return cls(proc_root=command_backend.proc_root)
+            return cls(use_shell=True)
+        use_shell = bool(platform_info and platform_info.get('has_root') and platform_info.get('shell_prefix'))
+        return cls(use_shell=use_shell and os.geteuid() != 0)
+
+    @staticmethod
+    def parse_starttime(stat):
+        # Field 22 counted after the ")" closing the command name, which may contain spaces.
+        fields = stat[stat.rfind(')') + 2:].split()
+        return int(fields[19]) if len(fields) > 19 else None
+
+    @staticmethod
+    def matches(name, package):
+        return name == package or name.startswith(package + ':')
+
+    def _read(self, pid, entry):
+        with open(os.path.join(self.proc_root, str(pid), entry), 'rb') as f:
+            return f.read().decode('utf-8', 'replace')
+
+    def _scan_local(self, package):
+        found = {}
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            try:
+                name = self._read(entry, 'cmdline').split('\0', 1)[0]
+                if name and self.matches(name, package):
+                    found[int(entry)] = (name, self.parse_starttime(self._read(entry, 'stat')))
+            except (OSError, IndexError, ValueError):
+                continue
+        return found
+
+    def _scan_shell(self, package):
+        # cmdline is NUL-terminated, so grep can only anchor the start; matches() is exact.
+        pattern = f"^{re.escape(package)}"
+        output = run_shell_command(
+            f"grep -s -a -E '{pattern}' /proc/[0-9]*/cmdline | tr '\\0' ' '; echo '@@stat'; "
+            f"for f in $(grep -s -l -a -E '{pattern}' /proc/[0-9]*/cmdline); do cat ${{f%/cmdline}}/stat; done",
+            platform_info=platform_info)
+        names, _, stats = output.partition('@@stat')
+        found = {}
+        for line in names.splitlines():
+            path, _, cmdline = line.partition(':')
+            parts = path.split('/')
+            if len(parts) > 2 and parts[2].isdigit():
+                name = cmdline.split(' ', 1)[0]
+                if self.matches(name, package):
+                    found[int(parts[2])] = (name, None)
+        for line in stats.splitlines():
+            pid = line.split(' ', 1)[0]
+            if pid.isdigit() and int(pid) in found:
+                found[int(pid)] = (found[int(pid)][0], self.parse_starttime(line))
+        return found
+
+    def stat_command(self):
+        # The stat reads _validate needs next, as one command for the snapshot
+        # batch, with the pids it covers; (None, ()) when there is nothing to read.
+        with self.lock:
+            pids = sorted({pid for known in self.known.values() for pid in known})
+        if not self.use_shell or not pids:
+            return None, ()
+        return "cat " + " ".join(f"/proc/{pid}/stat" for pid in pids) + " 2>/dev/null", pids
+
+    def absorb_stats(self, pids, lines, taken_at):
+        current = {}
+        for line in lines:
+            pid = line.split(' ', 1)[0]
+            if pid.isdigit():
+                current[int(pid)] = self.parse_starttime(line)
+        with self.lock:
+            self.prefetched, self.prefetched_pids, self.prefetched_at = current, set(pids), taken_at
+
+    def _validate(self, known):
+        # One stat read per known pid; None when any of them is gone or reused.
+        if self.use_shell and set(known) <= self.prefetched_pids and time.time() - self.prefetched_at < self.PREFETCH_MAX_AGE:
+            current = self.prefetched
+        elif self.use_shell:
+            paths = " ".join(f"/proc/{pid}/stat" for pid in known)
+            output = run_shell_command(f"cat {paths} 2>/dev/null", platform_info=platform_info)
+            current = {}
+            for line in output.splitlines():
+                pid = line.split(' ', 1)[0]
+                if pid.isdigit():
+                    current[int(pid)] = self.parse_starttime(line)
+        else:
+            current = {}
+            for pid in known:
+                try:
+                    current[pid] = self.parse_starttime(self._read(pid, 'stat'))
+                except (OSError, IndexError, ValueError):
+                    return None
+        for pid, (_, starttime) in known.items():
+            if current.get(pid) != starttime:
+                return None
+        return known
+
+    def lookup(self, package):
+        with self.lock:
+            known = self.known.get(package)
+            fresh = time.time() - self.last_scan.get(package, 0) < self.RESCAN_INTERVAL
+            if not (known and fresh and self._validate(known)):
+                known = self._scan_shell(package) if self.use_shell else self._scan_local(package)
+                self.known[package] = known
+                self.last_scan[package] = time.time()
+            self._track_main(package, known)
+            return sorted(known)
+
+    def processes(self, package):
+        with self.lock:
+            return dict(self.known.get(package, {}))
+
+    def forget(self, package):
+        with self.lock:
+            self.known.pop(package, None)
+
+    def _track_main(self, package, known):
+        main = next((pid for pid, (name, _) in known.items() if name == package), None)
+        previous = self.main_pids.get(package)
+        if previous and main and previous != main:
+            self.restarts.setdefault(package, []).append({'time': time.time(), 'old_pid': previous, 'new_pid': main})
+            del self.restarts[package][:-20]
+            print_formatted("WARNING", f"{package} restarted silently (pid {previous} -> {main})")
+        if main:
+            self.main_pids[package] = main
+
+    def pop_restart(self, package):
+        with self.lock:
+            restarts = self.restarts.pop(package, [])
+        return restarts[-1] if restarts else None
+
+    def alive(self, processes):
+        # Subset of {pid: (name, starttime)} still running as the same process.
+        if self.use_shell:
+            paths = " ".join(f"/proc/{pid}/stat" for pid in processes)
+            output = run_shell_command(f"cat {paths} 2>/dev/null", platform_info=platform_info)
+            stats = [line for line in output.splitlines() if line.split(' ', 1)[0].isdigit()]
+        else:
+            stats = []
+            for pid in processes:
+                try:
+                    stats.append(self._read(pid, 'stat'))
+                except OSError:
+                    continue
+        current = {}
+        for stat in stats:
+            # A zombie has exited; it only waits for its parent to reap it.
+            if stat[stat.rfind(')') + 2:stat.rfind(')') + 3] != 'Z':
+                current[int(stat.split(' ', 1)[0])] = self.parse_starttime(stat)
+        return {pid: entry for pid, entry in processes.items() if pid in current and current[pid] == entry[1]}
+
+    def wait_gone(self, processes, timeout):
+        # Returns the processes still alive after timeout. Local pids are waited on
+        # through pidfds when the kernel has them, otherwise /proc is polled finely.
+        deadline = time.monotonic() + timeout
+        local = not self.use_shell and self.proc_root == '/proc' and command_backend is None
+        if local and hasattr(os, 'pidfd_open'):
+            remaining = self._wait_pidfds(processes, deadline)
+            if remaining is not None:
+                return remaining
+        interval = 0.1 if self.use_shell else 0.02
+        remaining = self.alive(processes)
+        while remaining and time.monotonic() < deadline:
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            remaining = self.alive(remaining)
+        return remaining
+
+    def _wait_pidfds(self, processes, deadline):
+        fds = {}
+        try:
+            for pid in self.alive(processes):
+                try:
+                    fds[os.pidfd_open(pid)] = pid
+                except ProcessLookupError:
+                    continue
+            # The pid may have been reused between the stat check and pidfd_open.
+            remaining = self.alive({pid: processes[pid] for pid in fds.values()})
+            fds = {fd: pid for fd, pid in fds.items() if pid in remaining or os.close(fd)}
+            poller = select.poll()
+            for fd in fds:
+                poller.register(fd, select.POLLIN)
+            while fds and time.monotonic() < deadline:
+                for fd, _ in poller.poll(max(deadline - time.monotonic(), 0) * 1000):
+                    poller.unregister(fd)
+                    os.close(fd)
+                    fds.pop(fd)
+            return {pid: processes[pid] for pid in fds.values()}
+        except OSError:
+            return None
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def acknowledge(self, package):
+        # Called after our own relaunch so the new pid is not reported as a restart.
+        with self.lock:
+            self.restarts.pop(package, None)
+            self.main_pids.pop(package, None)
+            self.known.pop(package, None)
+
+def read_proc_files(paths):
+    # Contents of /proc-relative paths ('' when unreadable), through the shell
+    # session in one round-trip when /proc is not readable from here.
+    index = get_proc_index()
+    if not index.use_shell:
+        texts = {}
+        for path in paths:
+            try:
+                with open(os.path.join(index.proc_root, path), 'r') as f:
+                    texts[path] = f.read()
+            except OSError:
+                texts[path] = ''
+        return texts
+    names = [(path.replace('/', '_'), path) for path in paths]
+    output = run_shell_command(sectioned_command([(name, f"cat /proc/{path} 2>/dev/null") for name, path in names]),
+                               platform_info=platform_info)
+    sections = split_sections(output, [name for name, _ in names])
+    return {path: "\n".join(sections[name]) for name, path in names}
+
+proc_index = None
+
+def get_proc_index():
+    global proc_index
+    if proc_index is None:
+        proc_index = ProcIndex.for_platform(platform_info)
+    return proc_index
+
+# Streaming Dumps
+class DumpField:
+    # One value wanted from a dumpsys stream: the first match of pattern (its first
+    # group when it has one). With section, only lines inside the block opened by
+    # a header matching section count, and the field gives up at the first later
+    # line indented no deeper than that header.
+    def __init__(self, name, pattern, section=None):
+        self.name = name
+        self.regex = re.compile(pattern)
+        self.section = re.compile(section) if section else None
+        self.header_indent = None if section else -1
+        self.value = None
+        self.closed = False
+
+    @property
+    def done(self):
+        return self.value is not None or self.closed
+
+    def feed(self, line, indent):
+        if self.header_indent is None:
+            if self.section.search(line):
+                self.header_indent = indent
+            return
+        if self.section is not None and line.strip() and indent <= self.header_indent:
+            self.closed = True
+            return
+        match = self.regex.search(line)
+        if match:
+            self.value = match.group(1) if match.groups() else match.group(0)
+
+class AnrField(DumpField):
+    # ProcessRecord lines followed by notResponding=true within the process list
+    # of dumpsys activity processes; the LRU and OOM tables after it are skipped.
+    # The *APP* lines sit at the header's own indent, so the list ends at the
+    # PID mappings header rather than by indentation.
+    def __init__(self, name='anr', section=r'^\s*All known processes:', end=r'^\s*PID mappings:'):
+        # section=None takes every line, for output already cut down to the list.
+        super().__init__(name, r'notResponding=true', section)
+        self.end = re.compile(end)
+        self.value = None
+        self.records = []
+        self.record = ""
+
+    @property
+    def done(self):
+        return self.closed
+
+    def feed(self, line, indent):
+        if self.header_indent is None:
+            if self.section.search(line):
+                self.header_indent = indent
+            return
+        if self.end.search(line):
+            self.closed = True
+        elif 'notResponding=true' in line:
+            self.records.append(f"ANR: {self.record.strip()}")
+        elif 'ProcessRecord{' in line:
+            self.record = line
+
+class DumpScanner:
+    # Hands each line of a dump to its fields and reports done once all of them
+    # are, so the reader can stop the producer there.
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.bytes = 0
+        self.lines = 0
+
+    @property
+    def done(self):
+        return all(field.done for field in self.fields)
+
+    def feed(self, line):
+        self.bytes += len(line) + 1
+        self.lines += 1
+        indent = len(line) - len(line.lstrip())
+        for field in self.fields:
+            if not field.done:
+                field.feed(line, indent)
+
+    def values(self):
+        return {field.name: field.records if isinstance(field, AnrField) else field.value for field in self.fields}
+
+def stream_shell_command(command, scanner, timeout=10):
+    # Reads a command's stdout line by line into scanner and kills the producer
+    # (its whole process group, and the pipe is closed for anything that escaped
+    # it, e.g. behind su) as soon as the scanner has what it needs. Unlike
+    # run_shell_command the dump is never buffered whole, and a dump that is
+    # still being generated is cut short.
+    started = time.monotonic()
+    family = (('family', command_family(command)),)
+    early = False
+    try:
+        if command_backend is not None:
+            for line in command_backend.run(command, timeout).stdout.splitlines():
+                scanner.feed(line)
+                if scanner.done:
+                    early = True
+                    break
+        else:
+            process = subprocess.Popen(_shell_argv(command, platform_info), stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, start_new_session=True)
+            def kill():
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            try:
+                for raw in process.stdout:
+                    scanner.feed(raw.decode('utf-8', 'replace').rstrip('\n'))
+                    if scanner.done:
+                        early = True
+                        break
+            finally:
+                timer.cancel()
+                if process.poll() is None:
+                    kill()
+                process.stdout.close()
+                process.wait()
+            if not early and time.monotonic() - started >= timeout:
+                metrics.inc('rejoiner_shell_command_timeouts_total', family)
+                print_formatted("WARNING", f"Command timeout: {command}")
+        elapsed = time.monotonic() - started
+        metrics.observe('rejoiner_shell_command_seconds', elapsed, family)
+        metrics.inc('rejoiner_stream_bytes_total', family, scanner.bytes)
+        if early:
+            metrics.inc('rejoiner_stream_early_exits_total', family)
+        if log_enabled("DEBUG"):
+            print_formatted("DEBUG", f"$ {command} ({elapsed:.3f}s, {scanner.bytes} bytes streamed"
+                                     f"{', stopped early' if early else ''})")
+    except Exception as e:
+        metrics.inc('rejoiner_shell_command_errors_total', family)
+        print_formatted("ERROR", f"Command failed: {command} - {str(e)}")
+    return scanner.values()
+
+def package_dump_fields(package):
+    # Launcher entry from the resolver table, the rest from the package's own block;
+    # dexopt, compiler stats and permission tables after it are never read.
+    block = r'^\s*Package \[' + re.escape(package) + r'\]'
+    return [
+        DumpField('launcher', re.escape(package) + r'/([A-Za-z0-9._$]+)', r'android\.intent\.action\.MAIN:'),
+        DumpField('uid', r'userId=(\d+)', block),
+        DumpField('version_code', r'versionCode=(\d+)', block),
+        DumpField('version_name', r'versionName=(\S+)', block),
+        DumpField('first_install_time', r'firstInstallTime=([^\n]+)', block),
+        DumpField('last_update_time', r'lastUpdateTime=([^\n]+)', block)
+    ]
+
+_android_sdk = None
+
+def android_sdk():
+    global _android_sdk
+    if _android_sdk is None:
+        sdk = run_shell_command("getprop ro.build.version.sdk", platform_info=platform_info).strip()
+        _android_sdk = int(sdk) if sdk.isdigit() else 0
+    return _android_sdk
+
+# Device Snapshot
+SNAPSHOT_SECTIONS = [
+    ('activities', "dumpsys activity activities | grep -E 'ResumedActivity|ActivityRecord'"),
+    ('windows', "dumpsys window windows | grep -E 'mCurrentFocus|Window #'"),
+    # sed quits at the end of the process list, which stops dumpsys before the LRU/OOM tables.
+    ('anr', "dumpsys activity processes | sed '/^  PID mappings:/q' | grep -E 'ProcessRecord\\{|notResponding=true'")
+]
+# Focus only, for a single instance on Android 10+ where window displays carries mCurrentFocus.
+SNAPSHOT_FOCUS_SECTION = ('windows', "dumpsys window displays | grep -E 'mCurrentFocus'")
+snapshot_window_list = True
+SNAPSHOT_MARKER = "@@section "
+
+def sectioned_command(sections):
+    return "\n".join(f"echo '{SNAPSHOT_MARKER}{name}'\n{command}" for name, command in sections)
+
+def split_sections(output, names=()):
+    sections = {name: [] for name in names}
+    current = None
+    for line in output.splitlines():
+        if line.startswith(SNAPSHOT_MARKER):
+            current = line[len(SNAPSHOT_MARKER):].strip()
+            sections.setdefault(current, [])
+        elif current is not None:
+            sections[current].append(line)
+    return sections
+
+class DeviceSnapshot:
+    # Activity records, window list and ANR state gathered in one batched shell
+    # invocation with sectioned output; processes come from the proc index.
+    def __init__(self, output="", duration=0):
+        self.sections = split_sections(output, [name for name, _ in SNAPSHOT_SECTIONS])
+        self.processes = {}
+        self.activities = "\n".join(self.sections['activities'])
+        self.resumed = "\n".join(line for line in self.sections['activities'] if 'ResumedActivity' in line)
+        self.windows = "\n".join(self.sections['windows'])
+        self.focus = "\n".join(line for line in self.sections['windows'] if 'mCurrentFocus' in line)
+        # notResponding=true is printed below the ProcessRecord it belongs to.
+        anr = DumpScanner([AnrField(section=None)])
+        for line in self.sections['anr']:
+            anr.feed(line)
+        self.anr = "\n".join(anr.values()['anr'])
+        self.collected_at = time.time()
+        self.duration = duration
+
+    @staticmethod
+    def command():
+        # Background instances are judged by their surfaces in the full window list.
+        if snapshot_window_list or android_sdk() < 29:
+            return sectioned_command(SNAPSHOT_SECTIONS)
+        return sectioned_command([SNAPSHOT_FOCUS_SECTION if name == 'windows' else (name, command)
+                                  for name, command in SNAPSHOT_SECTIONS])
+
+    @classmethod
+    def collect(cls):
+        # The proc index's pid revalidation rides along as one more section.
+        index = get_proc_index()
+        stat_command, stat_pids = index.stat_command()
+        command = cls.command()
+        if stat_command:
+            command += "\n" + sectioned_command([('procstat', stat_command)])
+        start = time.time()
+        output = run_shell_command(command, timeout=20, platform_info=platform_info)
+        snapshot = cls(output, time.time() - start)
+        if stat_command:
+            index.absorb_stats(stat_pids, snapshot.sections.get('procstat', []), start)
+        return snapshot
+
+    def age(self):
+        return time.time() - self.collected_at
+
+    def pids(self, package):
+        # Process discovery comes from the proc index, once per package per snapshot.
+        if package not in self.processes:
+            self.processes[package] = get_proc_index().lookup(package)
+        return self.processes[package]
+
+    def is_resumed(self, package):
+        return f"{package}/" in self.resumed
+
+    def is_running(self, package, resumed=True):
+        # resumed=False accepts any activity record, for instances in the background.
+        activities = self.resumed if resumed else self.activities
+        return bool(self.pids(package)) and f"{package}/" in activities
+
+    def focused_on_game(self, package):
+        return f"{package}/" in self.focus and is_game_activity(self.focus)
+
+    def in_game(self, package):
+        # The focused window only covers one instance; background instances are
+        # judged by their own game surface in the window list.
+        return any(f"{package}/" in line and is_game_activity(line) for line in self.windows.splitlines())
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+snapshot_ttl = 2
+
+def get_device_snapshot(max_age=None):
+    global _snapshot
+    max_age = snapshot_ttl if max_age is None else max_age
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.age() > max_age:
+            _snapshot = DeviceSnapshot.collect()
+        return _snapshot
+
+def set_snapshot_window_list(enabled):
+    global snapshot_window_list
+    if snapshot_window_list != enabled:
+        snapshot_window_list = enabled
+        invalidate_device_snapshot()
+
+def invalidate_device_snapshot():
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+# Package Metadata
+class PackageMetadataCache:
+    # Launcher activity, version, install times and uid resolved once per package
+    # and persisted. In steady state an entry is only re-validated with a stat of
+    # the base APK; a changed mtime (update or reinstall) triggers a new lookup.
+    VALIDATE_INTERVAL = 60
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file or PACKAGE_CACHE_FILE
+        self.entries = {}
+        self.validated = {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                self.entries = json.load(f)
+        except Exception:
+            self.entries = {}
+
+    def get(self, package):
+        entry = self.entries.get(package)
+        if entry and time.time() - self.validated.get(package, 0) < self.VALIDATE_INTERVAL:
+            return entry
+        if entry and self._still_valid(entry):
+            self.validated[package] = time.time()
+            return entry
+        entry = self._resolve(package)
+        if entry:
+            self.entries[package] = entry
+            self.validated[package] = time.time()
+            self._save()
+        else:
+            self.entries.pop(package, None)
+        return entry
+
+    def invalidate(self, package):
+        self.validated.pop(package, None)
+        self.entries.pop(package, None)
+
+    def _still_valid(self, entry):
+        if not entry.get('apk_path'):
+            return False
+        mtime = run_shell_command(f"stat -c %Y {entry['apk_path']} 2>/dev/null", platform_info=platform_info)
+        return mtime.strip() == str(entry.get('apk_mtime'))
+
+    def _resolve(self, package):
+        output = run_shell_command(sectioned_command([
+            ('apk', f"for f in $(pm path {package} | sed 's/^package://'); do stat -c '%Y %n' $f; done"),
+            ('launcher', f"cmd package resolve-activity --brief -c android.intent.category.LAUNCHER {package} 2>/dev/null")
+        ]), timeout=20, platform_info=platform_info)
+        sections = split_sections(output, ['apk', 'launcher'])
+        apk_lines = [line.split(' ', 1) for line in sections['apk'] if ' ' in line]
+        base = next((parts for parts in apk_lines if parts[1].endswith('/base.apk')), apk_lines[0] if apk_lines else None)
+        if base is None:
+            return None
+        details = stream_shell_command(f"dumpsys package {package}", DumpScanner(package_dump_fields(package)), timeout=20)
+        launcher = None
+        for line in reversed(sections['launcher']):
+            if line.strip().startswith(f"{package}/"):
+                launcher = line.strip().split('/', 1)[1]
+                break
+        return {
+            'apk_path': base[1],
+            'apk_mtime': base[0],
+            'launcher_activity': launcher or details['launcher'],
+            'version_name': details['version_name'],
+            'version_code': details['version_code'],
+            'first_install_time': details['first_install_time'],
+            'last_update_time': details['last_update_time'],
+            'uid': details['uid'],
+            'resolved_at': time.time()
+        }
+
+    def _save(self):
+        try:
+            write_json_atomic(self.cache_file, self.entries)
+        except Exception as e:
+            print_formatted("WARNING", f"Could not save package cache: {e}")
+
+package_cache = None
+
+def get_package_metadata(package=ROBLOX_PACKAGE):
+    global package_cache
+    if package_cache is None:
+        package_cache = PackageMetadataCache()
+    return package_cache.get(package)
+
+# Roblox Control Functions
+def verify_roblox_installation(package=ROBLOX_PACKAGE):
+    try:
+        metadata = get_package_metadata(package)
+        if not metadata:
+            print_formatted("ERROR", f"Roblox not installed ({package}).")
+            return False
+        print_formatted("INFO", f"Roblox version: {metadata.get('version_name') or 'Unknown'}")
+        return True
+    except Exception as e:
+        print_formatted("ERROR", f"Roblox verification error: {e}")
+        return False
+
+def process_name_pattern(package):
+    # Matches the package's main process and its ":subprocess" names, but not
+    # cloned packages that merely share the prefix (com.roblox.client2).
+    return f"{re.escape(package)}(:[^[:space:]]*)?$"
+
+def get_package_pids(package=ROBLOX_PACKAGE, max_age=None):
+    return get_device_snapshot(max_age).pids(package)
+
+def is_roblox_running(retries=3, delay=2, package=ROBLOX_PACKAGE):
+    try:
+        for attempt in range(retries):
+            # The first attempt may reuse a fresh snapshot; retries always re-probe.
+            snapshot = get_device_snapshot(None if attempt == 0 else 0)
+            process_running = bool(snapshot.pids(package))
+            activity_running = snapshot.is_resumed(package)
+            if process_running and activity_running:
+                print_formatted("INFO", "Roblox process and activity confirmed running")
+                return True
+            elif process_running:
+                print_formatted("INFO", f"Roblox process running, attempt {attempt+1}/{retries}, retrying...")
+            elif activity_running:
+                print_formatted("INFO", f"Roblox activity detected, attempt {attempt+1}/{retries}, retrying...")
+            time.sleep(delay)
+        print_formatted("INFO", "Roblox not fully running after retries")
+        return False
+    except Exception as e:
+        print_formatted("ERROR", f"Process check error: {str(e)}")
+        return False
+
+def close_roblox(config=None, package=None):
+    # Captures the package's pids, stops it once and waits for exactly those pids
+    # to exit, escalating force-stop -> SIGKILL of the pids -> killall/pkill only
+    # when a step's wait runs out.
+    try:
+        package = package or (config or {}).get('package', ROBLOX_PACKAGE)
+        print_formatted("INFO", f"Closing Roblox ({package})...")
+        started = time.monotonic()
+        index = get_proc_index()
+        index.forget(package)
+        index.lookup(package)
+        processes = index.processes(package)
+        grace = (config or {}).get("close_grace", 5)
+        kill_wait = max((config or {}).get("force_kill_delay", 10), 1)
+        remaining = processes
+        step = 'none'
+        for step, wait in (('force_stop', grace), ('kill', kill_wait), ('killall', kill_wait)):
+            if step == 'force_stop':
+                command = f"am force-stop {package}"
+            elif step == 'kill':
+                command = "kill -9 " + " ".join(str(pid) for pid in remaining)
+            else:
+                command = f"killall -9 {package}; pkill -9 -f '^{process_name_pattern(package)}'"
+            run_shell_command(command, platform_info=platform_info)
+            remaining = index.wait_gone(remaining, wait) if remaining else {}
+            if not remaining:
+                break
+            print_formatted("WARNING", f"Roblox pids {sorted(remaining)} survived {step}, escalating...")
+        invalidate_device_snapshot()
+        index.forget(package)
+        duration = time.monotonic() - started
+        result = 'closed' if not remaining else 'failed'
+        metrics.observe('rejoiner_close_seconds', duration, (('step', step), ('result', result)), LATENCY_BUCKETS)
+        if remaining:
+            print_formatted("ERROR", f"Failed to close Roblox: pids {sorted(remaining)} still alive after {duration:.2f}s")
+            return False
+        if processes:
+            print_formatted("SUCCESS", f"Roblox closed in {duration:.2f}s ({step})")
+        else:
+            print_formatted("INFO", "Roblox was not running")
+        return True
+    except Exception as e:
+        print_formatted("ERROR", f"Failed to close Roblox: {str(e)}")
+        return False
+
+def get_main_activity(package=ROBLOX_PACKAGE):
+    try:
+        metadata = get_package_metadata(package)
+        if metadata and metadata.get('launcher_activity'):
+            return metadata['launcher_activity']
+        fallbacks = ['.startup.ActivitySplash', '.MainActivity', '.HomeActivity']
+        # One pass over the dump for the MAIN entry and every fallback name.
+        found = stream_shell_command(f"dumpsys package {package}", DumpScanner(
+            [DumpField('main', re.escape(package) + r'/([A-Za-z0-9._$]+)', r'android\.intent\.action\.MAIN:')] +
+            [DumpField(fallback, re.escape(fallback)) for fallback in fallbacks]))
+        if found['main']:
+            print_formatted("INFO", f"Detected main activity: {found['main']}")
+            return found['main']
+        for fallback in fallbacks:
+            if found[fallback]:
+                return fallback
+        return '.MainActivity'
+    except Exception as e:
+        print_formatted("WARNING", f"Main activity detection error: {str(e)}")
+        return '.MainActivity'
+
+def build_game_url(game_id, private_server=''):
+    try:
+        base_url = "roblox://experiences/start?placeId="
+        url = base_url + str(game_id)
+        if private_server:
+            code = extract_private_server_code(private_server)
+            if code:
+                url += f"&privateServerLinkCode={code}"
+        print_formatted("INFO", f"Built game URL: {url}")
+        return url
+    except Exception as e:
+        print_formatted("ERROR", f"URL build error: {e}")
+        return f"roblox://experiences/start?placeId={game_id}"
+
+def extract_private_server_code(link):
+    try:
+        patterns = [
+            r'privateServerLinkCode=([^&]+)',
+            r'share\?code=([^&]+)',
+            r'linkCode=([^&]+)',
+            r'code=([^&]+)'
+        ]
+        for pattern in patterns:
+            match = re.search(pattern, link)
+            if match:
+                return match.group(1)
+        for separator in ['privateServerLinkCode=', 'share?code=', '&linkCode=', '=']:
+            if separator in link:
+                code = link.split(separator)[1].split('&')[0].strip()
+                if code:
+                    return code
+        return None
+    except:
+        return None
+
+# Game Launch Functions
+def launch_via_deep_link(game_id, private_server='', package=ROBLOX_PACKAGE, machine=None):
+    try:
+        print_formatted("INFO", f"Launching via deep link: Game ID {game_id}")
+        machine = machine or JoinStateMachine({'package': package, 'game_id': game_id})
+        url = build_game_url(game_id, private_server)
+        command = f'am start -a android.intent.action.VIEW -d "{url}" -p {package}'
+        result = run_shell_command(command, platform_info=platform_info)
+        invalidate_device_snapshot()
+        if machine.advance('activity_resumed'):
+            print_formatted("SUCCESS", "Roblox launched via deep link")
+            return True
+        print_formatted("WARNING", f"Deep link launched but Roblox not running: {machine.failure}")
+        return False
+    except Exception as e:
+        print_formatted("ERROR", f"Deep link launch failed: {str(e)}")
+        return False
+
+def launch_via_intent(game_id, private_server='', package=ROBLOX_PACKAGE, machine=None):
+    try:
+        print_formatted("INFO", f"Launching via intent: Game ID {game_id}")
+        machine = machine or JoinStateMachine({'package': package, 'game_id': game_id})
+        main_activity = get_main_activity(package)
+        command = f'am start -n {package}/{main_activity}'
+        run_shell_command(command, platform_info=platform_info)
+        invalidate_device_snapshot()
+        if not machine.advance('activity_resumed'):
+            print_formatted("WARNING", f"Intent launched but Roblox not running: {machine.failure}")
+            return False
+        url = build_game_url(game_id, private_server)
+        intent_command = f'am start -a android.intent.action.VIEW -d "{url}" {package}'
+        result = run_shell_command(intent_command, platform_info=platform_info)
+        print_formatted("SUCCESS", "Roblox launched via intent")
+        return True
+    except Exception as e:
+        print_formatted("ERROR", f"Intent launch failed: {str(e)}")
+        return False
+
+def launch_via_browser_redirect(game_id, private_server='', package=ROBLOX_PACKAGE, machine=None):
+    try:
+        print_formatted("INFO", f"Launching via browser redirect: Game ID {game_id}")
+        machine = machine or JoinStateMachine({'package': package, 'game_id': game_id})
+        if private_server:
+            web_url = f"https://www.roblox.com/games/{game_id}?privateServerLinkCode={extract_private_server_code(private_server)}"
+        else:
+            web_url = f"https://www.roblox.com/games/{game_id}"
+        command = f'am start -a android.intent.action.VIEW -d "{web_url}"'
+        run_shell_command(command, platform_info=platform_info)
+        invalidate_device_snapshot()
+        if machine.advance('activity_resumed'):
+            print_formatted("SUCCESS", "Roblox launched via browser redirect")
+            return True
+        print_formatted("WARNING", f"Browser redirect launched but Roblox not running: {machine.failure}")
+        return False
+    except Exception as e:
+        print_formatted("ERROR", f"Browser redirect launch failed: {str(e)}")
+        return False
+
+LAUNCH_METHODS = {
+    'launch_via_deep_link': launch_via_deep_link,
+    'launch_via_intent': launch_via_intent,
+    'launch_via_browser_redirect': launch_via_browser_redirect
+}
+
+# Log Classification
+class LogClassifier:
+    # All categories are merged into one word-bounded alternation regex over
+    # lowercased text. A plain substring prefilter runs first: every pattern
+    # contributes the literal that any match of it must contain, each literal is
+    # located with str.find (the same C substring search the old matcher used),
+    # and only lines holding one reach the regex. Matched tokens are mapped back
+    # to their category (cached), and when a line matches several categories the
+    # one listed first in the table wins.
+    WINDOW = 65536
+
+    def __init__(self, categories):
+        self.priority = {name: index for index, name in enumerate(categories)}
+        self.token_matchers = [(name, re.compile(f"(?:{'|'.join(patterns)})$"))
+                               for name, patterns in categories.items()]
+        patterns = [pattern for patterns in categories.values() for pattern in patterns]
+        # The lookahead lets the engine skip non-letters before trying the word boundary.
+        self.regex = re.compile(f"(?=[a-z])\\b(?:{'|'.join(patterns)})\\b")
+        self.regex_ignorecase = re.compile(self.regex.pattern, re.IGNORECASE)
+        self.category_literals = {name: self._literals(patterns) for name, patterns in categories.items()}
+        self.literals = self._literals(patterns)
+        self.token_cache = {}
+
+    @classmethod
+    def _literals(cls, patterns):
+        # None when some pattern has no literal, and the prefilter cannot be used.
+        literals = [cls._literal(pattern) for pattern in patterns]
+        if not all(literals):
+            return None
+        # A literal containing a shorter one adds no candidates.
+        literals = sorted(set(literals), key=len)
+        return [literal for index, literal in enumerate(literals)
+                if not any(shorter in literal for shorter in literals[:index])]
+
+    @staticmethod
+    def _literal(pattern):
+        # Longest run of plain characters outside groups, classes and optional
+        # characters; '' when there is none or the pattern has a top-level '|'.
+        stripped = re.sub(r'\(\?:[^()]*\)[?*]?|\[[^\]]*\][?*]?|\\?.[?*]', '\0', pattern)
+        if '|' in stripped:
+            return ''
+        return max(re.split(r'[\0().?*+\\\[\]{}^$]', stripped), key=len)
+
+    def _category(self, token):
+        category = self.token_cache.get(token)
+        if category is None:
+            lowered = token.lower()
+            category = next((name for name, matcher in self.token_matchers if matcher.match(lowered)), None)
+            if len(self.token_cache) < 512:
+                self.token_cache[token] = category
+        return category
+
+    def _best(self, regex, text, start=0, end=None):
+        best = None
+        for match in regex.finditer(text, start, len(text) if end is None else end):
+            category = self._category(match.group())
+            if best is None or self.priority[category] < self.priority[best]:
+                best = category
+        return best
+
+    def _candidates(self, lowered, literals):
+        # (start, end) of every line containing one of the literals, in order.
+        spans = set()
+        for literal in literals:
+            position = lowered.find(literal)
+            while position != -1:
+                end = lowered.find("\n", position)
+                if end == -1:
+                    end = len(lowered)
+                spans.add((lowered.rfind("\n", 0, position) + 1, end))
+                position = lowered.find(literal, end)
+        return sorted(spans)
+
+    def _lines(self, text):
+        spans, position = [], 0
+        for line in text.split("\n"):
+            spans.append((position, position + len(line)))
+            position += len(line) + 1
+        return spans
+
+    def scan(self, text):
+        # Yields (category, line) for every line of text containing a match.
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Lowercasing moved offsets (rare non-ASCII case folding); no prefilter.
+            lowered, regex, spans = text, self.regex_ignorecase, self._lines(text)
+        elif self.literals is None:
+            regex, spans = self.regex, self._lines(text)
+        else:
+            regex, spans = self.regex, self._candidates(lowered, self.literals)
+        for start, end in spans:
+            best = self._best(regex, lowered, start, end)
+            if best is not None:
+                yield best, text[start:end]
+
+    def classify(self, line):
+        lowered = line.lower()
+        if len(lowered) != len(line):
+            return self._best(self.regex_ignorecase, line)
+        if self.literals is not None:
+            for literal in self.literals:
+                if literal in lowered:
+                    break
+            else:
+                return None
+        return self._best(self.regex, lowered)
+
+    def classify_text(self, text):
+        # Returns the best category in text and the first line holding it. The
+        # text is lowered and searched a window at a time, each window only for
+        # categories better than the best found so far, so like the old substring
+        # check a dump stops being read once its top category is confirmed.
+        if self.literals is None:
+            return self._scan_best(text)
+        best = None
+        start = 0
+        while start < len(text):
+            end = text.find("\n", start + self.WINDOW) + 1 or len(text)
+            window = text[start:end]
+            lowered = window.lower()
+            if len(lowered) != len(window):
+                return self._scan_best(text)
+            for category, literals in self.category_literals.items():
+                if best is not None and self.priority[category] >= self.priority[best[0]]:
+                    break
+                for line_start, line_end in self._candidates(lowered, literals):
+                    # Better categories matched nowhere in this window, so the line's best is this one or none.
+                    if self._best(self.regex, lowered, line_start, line_end) == category:
+                        best = (category, window[line_start:line_end])
+                        break
+            if best is not None and self.priority[best[0]] == 0:
+                break
+            start = end
+        return best or (None, "")
+
+    def _scan_best(self, text):
+        best = None
+        for category, line in self.scan(text):
+            if best is None or self.priority[category] < self.priority[best[0]]:
+                best = (category, line)
+                if self.priority[category] == 0:
+                    break
+        return best or (None, "")
+
+    def classify_lines(self, lines):
+        for line in lines:
+            category = self.classify(line)
+            if category:
+                yield category, line
+
+LOG_ERROR_PATTERNS = {
+    # Exception class names (java.lang.NullPointerException) count, as they did for the substring check.
+    'crash': [r'crash(?:ed|es)?', r'fatal', r'[a-z]*exception', r'sigsegv', r'segmentation fault'],
+    'kicked': [r'disconnected', r'unexpected disconnect', r'kick(?:ed)?', r'ban(?:ned)?', r'error code'],
+    'frozen': [r'anr', r'(?:application )?not responding', r'time(?:out|d out)', r'freez(?:e|ing)', r'frozen'],
+    'script_error': [r'luaerror', r'processerror']
+}
+LOG_JOIN_PATTERNS = [r'place[._]?id', r'game[._]?id', r'joining', r'game[._]?join', r'(?:privateserver)?linkcode']
+LOG_ERROR_GREP = 'crash|fatal|disconnected|kicked|banned|anr|timeout|luaerror|processerror|sigsegv|segmentation fault|unexpected disconnect|error code|ban|kick|freeze|not responding|application not responding'
+LOG_CLASSIFIER = LogClassifier({'join': LOG_JOIN_PATTERNS, **LOG_ERROR_PATTERNS})
+LOG_ERROR_CLASSIFIER = LogClassifier(LOG_ERROR_PATTERNS)
+LOGCAT_LINE_RE = re.compile(r'^(\d\d-\d\d \d\d:\d\d:\d\d\.\d+)\s+(\d+)\s+(\d+)\s+([VDIWEFA])\s+(.*?)\s*:\s(.*)$')
+LOG_JOIN_RE = re.compile(r'(?:place[._]?id|game[._]?id|joining|game[._]?join)\D{0,20}?(\d{3,})', re.IGNORECASE)
+LOG_LINK_CODE_RE = re.compile(r'(?:privateServerLinkCode|linkCode)=([A-Za-z0-9_-]+)', re.IGNORECASE)
+
+@functools.lru_cache(maxsize=32)
+def compile_join_patterns(game_id, link_code=None):
+    # Returns the device-side grep expression and the compiled confirmation regex
+    # for one game, built once per (game_id, link_code) instead of on every poll.
+    game_id = re.escape(str(game_id))
+    patterns = [
+        f"place[._]?id.*{game_id}",
+        f"game[._]?id.*{game_id}",
+        f"joining.*{game_id}",
+        f"placeId={game_id}",
+        f"game[._]?join.*{game_id}"
+    ]
+    if link_code:
+        code = re.escape(link_code)
+        patterns.extend([f"linkCode={code}", f"privateServer.*{code}"])
+    grep_pattern = '|'.join(patterns).replace('\\', '')
+    return grep_pattern, re.compile('|'.join(patterns), re.IGNORECASE)
+
+# Logcat Monitoring
+log_cursor = None
+logcat_follower = None
+
+def classify_log_line(line):
+    return LOG_ERROR_CLASSIFIER.classify(line)
+
+def logcat_timestamp(line):
+    if len(line) > 18 and line[2] == '-' and line[5] == ' ' and line[8] == ':':
+        return line[:18]
+    return None
+
+def parse_logcat_line(line, category=None):
+    category = category or LOG_CLASSIFIER.classify(line)
+    if category is None:
+        return None
+    line = line.rstrip('\n')
+    event = {'type': category, 'timestamp': None, 'pid': None, 'tag': '', 'message': line, 'line': line}
+    match = LOGCAT_LINE_RE.match(line)
+    if match:
+        event.update({
+            'timestamp': match.group(1),
+            'pid': int(match.group(2)),
+            'tag': match.group(5),
+            'message': match.group(6)
+        })
+    if category == 'join':
+        join_match = LOG_JOIN_RE.search(line)
+        code_match = LOG_LINK_CODE_RE.search(line)
+        if not (join_match or code_match):
+            error_type = classify_log_line(line)
+            if error_type is None:
+                return None
+            event['type'] = error_type
+            return event
+        event['place_id'] = join_match.group(1) if join_match else None
+        event['link_code'] = code_match.group(1) if code_match else None
+    return event
+
+class LogcatFollower:
+    # Runs one continuous logcat process (or reads a recorded file/pipe) and turns
+    # matching lines into typed events on a queue. After the process dies it is
+    # resumed from the last timestamp seen instead of replaying the whole buffer.
+    def __init__(self, source=None, platform_info=None, max_events=1000, follow=False):
+        self.source = source
+        self.platform_info = platform_info
+        self.follow = follow
+        self.events = queue.Queue(maxsize=max_events)
+        self.error_signal = threading.Event()
+        self.recent_joins = []
+        self.pending = []
+        self.cursor = None
+        self.cursor_lines = set()
+        self.resuming = False
+        self.process = None
+        self.thread = None
+        self.running = False
+        self.lines_read = 0
+
+    def start(self):
+        if self.is_alive():
+            return True
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        process, self.process = self.process, None
+        if process is not None:
+            try:
+                process.kill()
+                process.wait(timeout=2)
+            except Exception:
+                pass
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+
+    def is_alive(self):
+        return self.running and self.thread is not None and self.thread.is_alive()
+
+    def _logcat_command(self):
+        since = f"'{self.cursor}'" if self.cursor else '1'
+        return f"logcat -v threadtime -T {since}"
+
+    def _open_stream(self):
+        if self.source is None and command_backend is not None:
+            return command_backend.logcat_stream(self._logcat_command())
+        if self.source is None:
+            self.process = subprocess.Popen(
+                _shell_argv(self._logcat_command(), self.platform_info),
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL
+            )
+            return self.process.stdout
+        if isinstance(self.source, str):
+            return open(self.source, 'rb')
+        return self.source
+
+    def _read_chunk(self, stream, decoder):
+        # Raw reads return whatever logcat has written so far, so a burst of lines
+        # is classified as one chunk while a quiet stream still wakes immediately.
+        if hasattr(stream, 'readline') and not hasattr(stream, 'raw'):
+            return stream.readline()
+        data = os.read(stream.fileno(), 65536)
+        return decoder.decode(data, final=not data) if data else ''
+
+    def _run(self):
+        while self.running:
+            stream = None
+            pending = ''
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            try:
+                stream = self._open_stream()
+                while self.running:
+                    chunk = self._read_chunk(stream, decoder)
+                    if not chunk:
+                        if self.follow and self.source is not None:
+                            time.sleep(0.5)
+                            continue
+                        break
+                    pending += chunk
+                    cut = pending.rfind('\n') + 1
+                    if cut:
+                        self.feed_text(pending[:cut])
+                        pending = pending[cut:]
+                if pending:
+                    self.feed_text(pending)
+            except Exception as e:
+                print_formatted("WARNING", f"Logcat follower error: {str(e)}")
+            finally:
+                if stream is not None and stream is not self.source:
+                    try:
+                        stream.close()
+                    except Exception:
+                        pass
+            if self.source is not None:
+                break
+            self.resuming = self.cursor is not None
+            time.sleep(1)
+        self.running = False
+
+    def feed(self, line):
+        events = self.feed_text(line if line.endswith('\n') else line + '\n')
+        return events[0] if events else None
+
+    def feed_text(self, text):
+        if self.resuming:
+            text = self._skip_replayed(text)
+        self.lines_read += text.count('\n')
+        self._advance_cursor(text)
+        events = []
+        for category, line in LOG_CLASSIFIER.scan(text):
+            event = parse_logcat_line(line, category)
+            if event is not None:
+                self._publish(event)
+                events.append(event)
+        return events
+
+    def _skip_replayed(self, text):
+        # logcat -T is inclusive, so a resumed stream repeats lines already seen at the cursor.
+        lines = text.splitlines(True)
+        index = 0
+        while index < len(lines):
+            line = lines[index].rstrip('\n')
+            timestamp = logcat_timestamp(line)
+            if timestamp and (timestamp > self.cursor or line not in self.cursor_lines):
+                self.resuming = False
+                break
+            index += 1
+        return ''.join(lines[index:])
+
+    def _advance_cursor(self, text):
+        lines = text.rstrip('\n').split('\n')
+        last = None
+        at_last = set()
+        for line in reversed(lines):
+            timestamp = logcat_timestamp(line)
+            if timestamp is None:
+                continue
+            if last is None:
+                last = timestamp
+            elif timestamp != last:
+                break
+            at_last.add(line)
+        if last is None:
+            return
+        if last == self.cursor:
+            self.cursor_lines |= at_last
+        else:
+            self.cursor = last
+            self.cursor_lines = at_last
+
+    def _publish(self, event):
+        event['received'] = time.time()
+        if event['type'] == 'join':
+            self.recent_joins.append(event)
+            del self.recent_joins[:-50]
+        else:
+            self.error_signal.set()
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                pass
+            self.events.put_nowait(event)
+
+    def drain(self):
+        drained = []
+        while True:
+            try:
+                drained.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return drained
+
+    def _collect(self):
+        # Events stay pending until an instance claims them, so several instances
+        # can share one follower without consuming each other's errors.
+        now = time.time()
+        self.pending = [event for event in self.pending + self.drain()
+                        if event['type'] != 'join' and now - event['received'] < 300]
+        if not self.pending:
+            self.error_signal.clear()
+
+    def clear(self, match=None):
+        self._collect()
+        self.pending = [event for event in self.pending if match is not None and not match(event)]
+        self.recent_joins = [event for event in self.recent_joins if match is not None and not match(event)]
+        if not self.pending:
+            self.error_signal.clear()
+
+    def pop_errors(self, match=None):
+        self._collect()
+        claimed = [event for event in self.pending if match is None or match(event)]
+        self.pending = [event for event in self.pending if event not in claimed]
+        if not self.pending:
+            self.error_signal.clear()
+        return claimed
+
+    def saw_join(self, game_id, link_code=None, match=None):
+        for event in reversed(self.recent_joins):
+            if match is not None and not match(event):
+                continue
+            if game_id and event.get('place_id') == str(game_id):
+                return True
+            if link_code and event.get('link_code') == link_code:
+                return True
+        return False
+
+    def has_errors(self, match=None):
+        self._collect()
+        return any(match is None or match(event) for event in self.pending)
+
+    def settle(self, owners=None):
+        # Called at the start of each supervisor cycle, before the instances look
+        # at pending events: the signal then only stands for events that arrive
+        # later, and with owners (one match per instance) events no instance
+        # claims are dropped instead of staying pending for 300s.
+        self.error_signal.clear()
+        self._collect()
+        if owners is not None:
+            self.pending = [event for event in self.pending if any(owner(event) for owner in owners)]
+
+    def wait_for_error(self, timeout):
+        return self.error_signal.wait(timeout)
+
+def start_logcat_follower():
+    global logcat_follower
+    if logcat_follower is None or not logcat_follower.is_alive():
+        logcat_follower = LogcatFollower(platform_info=platform_info)
+        logcat_follower.start()
+    return logcat_follower
+
+def stop_logcat_follower():
+    global logcat_follower
+    if logcat_follower is not None:
+        logcat_follower.stop()
+        logcat_follower = None
+
+def follower_active():
+    return logcat_follower is not None and logcat_follower.is_alive()
+
+def log_event_owner(package, pids=None):
+    # Matches follower events that belong to one package: lines from its own
+    # processes, or system lines (ActivityManager ANR/crash reports) naming it.
+    pids = set(pids or [])
+    return lambda event: event.get('pid') in pids or package in event.get('line', '')
+
+def reset_log_cursor(match=None):
+    # Replaces "logcat -c": only our view of the log moves forward, the device
+    # buffer is left intact for other apps.
+    global log_cursor
+    if follower_active():
+        logcat_follower.clear(match)
+        return
+    log_cursor = run_shell_command("date +'%m-%d %H:%M:%S.000'", platform_info=platform_info) or None
+
+def dump_logcat(grep_pattern):
+    since = f" -T '{log_cursor}'" if log_cursor else ""
+    return run_shell_command(f"logcat -d{since} | grep -iE '{grep_pattern}'", platform_info=platform_info)
+
+LOG_WAKEUP_INTERVAL = 2
+last_log_wakeup = 0
+
+def wait_for_monitor_event(timeout, watcher=None, current=None, stop=None):
+    # Returns 'log' on a follower error event, 'frozen' when the freeze detector
+    # reports a stall, a new config dict when the watcher sees a valid change,
+    # 'stopped' once the stop event is set, or None once timeout has passed. Log
+    # events wake the loop at most once per LOG_WAKEUP_INTERVAL.
+    global last_log_wakeup
+    deadline = time.time() + timeout
+    while True:
+        if stop is not None and stop.is_set():
+            return 'stopped'
+        if freeze_detector.signal.is_set():
+            return 'frozen'
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        step = min(remaining, watcher.interval) if watcher else remaining
+        if freeze_detector.watched:
+            step = min(step, 1)
+        hold = last_log_wakeup + LOG_WAKEUP_INTERVAL - time.time()
+        if follower_active() and hold <= 0:
+            # The follower's signal and the stop event cannot be waited on together,
+            # so stop is rechecked at least every second.
+            if logcat_follower.wait_for_error(min(step, 1) if stop is not None else step):
+                last_log_wakeup = time.time()
+                return 'log'
+        else:
+            if follower_active():
+                step = min(step, hold)
+            if stop is not None:
+                stop.wait(step)
+            else:
+                time.sleep(step)
+        if watcher:
+            config = watcher.poll(current)
+            if config is not None:
+                return config
+
+# Freeze Detection
+class FreezeDetector:
+    # A hung render thread often leaves no ANR and no log line. While a package is
+    # watched (in game), a sampler thread reads the present timestamps of its
+    # SurfaceView layer from SurfaceFlinger --latency and the gfxinfo frame
+    # counter, and flags the package frozen once no new frame has appeared for
+    # stall_window seconds. SurfaceFlinger records every frame the game surface
+    # presents, so its data is trusted as soon as the layer has any; the gfxinfo
+    # counter only covers HWUI-drawn frames and counts once it has been seen
+    # moving, so a counter the game never advances cannot cause a false freeze.
+    # With several instances only the focused one is timed: background clients
+    # stop presenting frames or lose their layer while perfectly healthy.
+    INT64_MAX = 2 ** 63 - 1
+
+    def __init__(self, stall_window=20, interval=5):
+        self.stall_window = stall_window
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.watched = {}
+        self.frozen = {}
+        self.signal = threading.Event()
+        self.thread = None
+        self.running = False
+
+    def configure(self, stall_window=20, interval=5):
+        self.stall_window = stall_window
+        self.interval = interval
+
+    def watch(self, package):
+        with self.lock:
+            if package not in self.watched:
+                self.watched[package] = {'layer': None, 'frame': None, 'count': None, 'live': set(),
+                                         'progress': time.time()}
+        self.start()
+
+    def unwatch(self, package):
+        with self.lock:
+            self.watched.pop(package, None)
+            self.frozen.pop(package, None)
+            if not self.frozen:
+                self.signal.clear()
+
+    def pop_frozen(self, package):
+        with self.lock:
+            stall = self.frozen.pop(package, None)
+            if not self.frozen:
+                self.signal.clear()
+            return stall
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="freeze-detector", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        with self.lock:
+            self.watched.clear()
+            self.frozen.clear()
+            self.signal.clear()
+
+    def _run(self):
+        while self.running:
+            started = time.time()
+            # Skipping a round cannot fake a freeze: the next sample still sees the new frames.
+            packages = list(self.watched) if admission.allow_probe() else []
+            try:
+                focus = get_device_snapshot().focus if len(packages) > 1 else None
+            except Exception:
+                packages = []
+            for package in packages:
+                try:
+                    self.sample(package, focus is None or f"{package}/" in focus)
+                except Exception as e:
+                    print_formatted("WARNING", f"Frame sampling failed for {package}: {str(e)}")
+            time.sleep(max(self.interval - (time.time() - started), 0.1))
+
+    @classmethod
+    def parse_latency(cls, output):
+        # First line is the refresh period; each row holds desired-present,
+        # actual-present and frame-ready times in ns (0 unused, INT64_MAX pending).
+        latest = None
+        for line in output.splitlines()[1:]:
+            parts = line.split()
+            if len(parts) != 3:
+                continue
+            for value in (parts[1], parts[0]):
+                if value.isdigit() and 0 < int(value) < cls.INT64_MAX:
+                    latest = max(latest or 0, int(value))
+                    break
+        return latest
+
+    @staticmethod
+    def parse_frame_count(output):
+        counts = [int(count) for count in re.findall(r'Total frames rendered:\s*(\d+)', output)]
+        return sum(counts) if counts else None
+
+    def command(self, package, layer):
+        if layer:
+            frames = ('latency', f"dumpsys SurfaceFlinger --latency '{layer}'")
+        else:
+            frames = ('layers', f"dumpsys SurfaceFlinger --list | grep -F 'SurfaceView' | grep -F '{package}/'")
+        return sectioned_command([frames, ('gfx', f"dumpsys gfxinfo {package} | grep -E 'Total frames rendered'")])
+
+    def sample(self, package, focused=True):
+        with self.lock:
+            entry = self.watched.get(package)
+            layer = entry['layer'] if entry else None
+            if entry is not None and not focused:
+                # Stall timer suspended; the baseline is taken again once it is focused.
+                entry.update(frame=None, count=None, progress=time.time())
+                return 0
+        if entry is None:
+            return None
+        output = run_shell_command(self.command(package, layer), platform_info=platform_info)
+        sections = split_sections(output, ['latency', 'layers', 'gfx'])
+        frame = self.parse_latency("\n".join(sections['latency'])) if layer else None
+        count = self.parse_frame_count("\n".join(sections['gfx']))
+        now = time.time()
+        with self.lock:
+            entry = self.watched.get(package)
+            if entry is None:
+                return None
+            if not layer:
+                layers = [line.strip() for line in sections['layers'] if line.strip()]
+                entry['layer'] = layers[-1] if layers else None
+            elif frame is None:
+                # Layer gone or renamed (activity recreated); look it up again next time.
+                entry['layer'] = None
+            moved = set()
+            if frame is not None and entry['frame'] is not None and frame > entry['frame']:
+                moved.add('surfaceflinger')
+            if count is not None and entry['count'] is not None and count != entry['count']:
+                moved.add('gfxinfo')
+            if frame is not None:
+                entry['frame'] = frame
+                entry['live'].add('surfaceflinger')
+            if count is not None:
+                entry['count'] = count
+            entry['live'] |= moved
+            if moved or not entry['live']:
+                entry['progress'] = now
+            stalled = now - entry['progress']
+            if stalled >= self.stall_window and package not in self.frozen:
+                self.frozen[package] = {'stalled': round(stalled, 1), 'sources': sorted(entry['live'])}
+                self.signal.set()
+                print_formatted("WARNING", f"No new frames from {package} for {stalled:.0f}s ({', '.join(sorted(entry['live']))})")
+            return stalled
+
+freeze_detector = FreezeDetector()
+
+def configure_freeze_detector(config):
+    freeze_detector.configure(config.get('freeze_stall_window', 20), config.get('freeze_sample_interval', 5))
+    if not config.get('freeze_detection', True):
+        freeze_detector.stop()
+
+# Resource Watchdog
+class ResourceWatchdog:
+    # Samples CPU time, RSS/PSS and thread count of each monitored package's main
+    # process into a rolling window, fits a linear RSS trend and asks for a
+    # planned restart at a quiet moment when the trend would reach the memory
+    # ceiling within the restart horizon, before the low-memory killer does it.
+    # The climb while a fresh client loads assets is left out of the fit, and a
+    # hard memory limit only applies when memory_limit_mb is set: the client's
+    # RSS (shared libraries and GPU mappings included) passes 1 GB on healthy
+    # 2-3 GB devices.
+    MIN_SAMPLES = 5
+    MIN_FIT = 0.6
+    CLOCK_TICKS = 100
+
+    def __init__(self):
+        self.windows = {}
+        self.configure({})
+
+    def configure(self, config):
+        self.enabled = config.get('resource_watchdog', True)
+        self.interval = config.get('resource_sample_interval', 30)
+        self.window_size = int(config.get('resource_window', 120))
+        self.limit_mb = config.get('memory_limit_mb', 0)
+        self.settle = config.get('resource_settle_minutes', 5) * 60
+        # The free memory the admission controller keeps for launches; below it the
+        # low-memory killer is already reclaiming.
+        self.reserve_kb = config.get('admission_min_mem_mb', 400) * 1024
+        self.horizon = config.get('restart_horizon_minutes', 10) * 60
+        self.max_threads = config.get('max_threads', 0)
+
+    def forget(self, package):
+        self.windows.pop(package, None)
+
+    def memory_ceiling_kb(self, rss):
+        # The configured limit, or else the RSS at which the device would be down
+        # to its reserve: what the client holds now plus MemAvailable above it.
+        if self.limit_mb:
+            return self.limit_mb * 1024
+        match = re.search(r'MemAvailable:\s+(\d+)', read_proc_files(['meminfo'])['meminfo'])
+        if not match:
+            return None
+        return rss + max(int(match.group(1)) - self.reserve_kb, 0)
+
+    def sample(self, package, pid):
+        window = self.windows.get(package)
+        if window is None or window['pid'] != pid:
+            window = self.windows[package] = {'pid': pid, 'samples': collections.deque(maxlen=self.window_size),
+                                              'last': 0, 'since': time.time()}
+        now = time.time()
+        if now - window['last'] < self.interval:
+            return None
+        window['last'] = now
+        index = get_proc_index()
+        sample = {'time': now}
+        psutil = optional_import('psutil') if not index.use_shell and index.proc_root == '/proc' else None
+        if psutil is not None:
+            try:
+                process = psutil.Process(pid)
+                with process.oneshot():
+                    sample['cpu'] = sum(process.cpu_times()[:2])
+                    sample['rss'] = process.memory_info().rss // 1024
+                    sample['threads'] = process.num_threads()
+                sample['pss'] = self._parse_kb(read_proc_files([f"{pid}/smaps_rollup"])[f"{pid}/smaps_rollup"], 'Pss')
+            except Exception:
+                return None
+        else:
+            texts = read_proc_files([f"{pid}/stat", f"{pid}/status", f"{pid}/smaps_rollup"])
+            stat = texts[f"{pid}/stat"]
+            fields = stat[stat.rfind(')') + 2:].split()
+            if len(fields) < 22:
+                return None
+            sample['cpu'] = (int(fields[11]) + int(fields[12])) / self.CLOCK_TICKS
+            sample['rss'] = self._parse_kb(texts[f"{pid}/status"], 'VmRSS') or int(fields[21]) * 4
+            threads = re.search(r'Threads:\s+(\d+)', texts[f"{pid}/status"])
+            sample['threads'] = int(threads.group(1)) if threads else int(fields[17])
+            sample['pss'] = self._parse_kb(texts[f"{pid}/smaps_rollup"], 'Pss')
+        samples = window['samples']
+        if samples and now > samples[-1]['time']:
+            sample['cpu_percent'] = max(sample['cpu'] - samples[-1]['cpu'], 0) / (now - samples[-1]['time']) * 100
+        samples.append(sample)
+        labels = (('package', package),)
+        metrics.set_gauge('rejoiner_process_rss_bytes', sample['rss'] * 1024, labels)
+        metrics.set_gauge('rejoiner_process_threads', sample['threads'], labels)
+        return sample
+
+    @staticmethod
+    def _parse_kb(text, field):
+        match = re.search(field + r':\s+(\d+)\s*kB', text or '')
+        return int(match.group(1)) if match else None
+
+    def trend(self, package):
+        # Least-squares RSS slope in kB/s over the window, with its r^2; samples
+        # from the settle period after the pid appeared are left out.
+        window = self.windows.get(package, {})
+        samples = [sample for sample in window.get('samples', []) if sample['time'] - window['since'] >= self.settle]
+        if len(samples) < self.MIN_SAMPLES:
+            return None, None
+        start = samples[0]['time']
+        xs = [sample['time'] - start for sample in samples]
+        ys = [sample['rss'] for sample in samples]
+        count = len(xs)
+        mean_x = sum(xs) / count
+        mean_y = sum(ys) / count
+        sxx = sum((x - mean_x) ** 2 for x in xs)
+        syy = sum((y - mean_y) ** 2 for y in ys)
+        sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+        if sxx == 0:
+            return None, None
+        slope = sxy / sxx
+        fit = (sxy * sxy) / (sxx * syy) if syy else 0
+        return slope, fit
+
+    def check(self, package, pid, quiet=True):
+        if not self.enabled or not pid:
+            return None
+        sample = self.sample(package, pid)
+        if sample is None:
+            return None
+        if self.limit_mb and sample['rss'] >= self.limit_mb * 1024:
+            print_formatted("WARNING", f"{package} RSS {sample['rss'] // 1024} MB reached the {self.limit_mb} MB limit")
+            return 'memory_limit'
+        if self.max_threads and sample['threads'] >= self.max_threads:
+            print_formatted("WARNING", f"{package} has {sample['threads']} threads (limit {self.max_threads})")
+            return 'thread_limit'
+        slope, fit = self.trend(package)
+        if slope is None or slope <= 0 or fit < self.MIN_FIT:
+            return None
+        limit = self.memory_ceiling_kb(sample['rss'])
+        if not limit:
+            return None
+        remaining = max(limit - sample['rss'], 0) / slope
+        if remaining > self.horizon:
+            return None
+        samples = self.windows[package]['samples']
+        cpu = sorted(entry.get('cpu_percent', 0) for entry in samples)
+        # Quiet: no other launch in flight and the client below its usual CPU load,
+        # unless the projected OOM is too close to keep waiting for one.
+        lull = sample.get('cpu_percent', 0) <= cpu[len(cpu) // 2]
+        if not (quiet and lull) and remaining > self.horizon / 3:
+            return None
+        print_formatted("WARNING", f"{package} RSS {sample['rss'] // 1024} MB growing {slope * 60 / 1024:.1f} MB/min, "
+                                   f"ceiling {limit // 1024} MB in ~{remaining / 60:.1f} min; planning a restart")
+        return 'planned_restart'
+
+    def summary(self, package):
+        window = self.windows.get(package)
+        if not window or not window['samples']:
+            return None
+        sample = window['samples'][-1]
+        slope, fit = self.trend(package)
+        return {
+            'pid': window['pid'],
+            'rss_mb': round(sample['rss'] / 1024, 1),
+            'pss_mb': round(sample['pss'] / 1024, 1) if sample.get('pss') else None,
+            'threads': sample['threads'],
+            'cpu_percent': round(sample.get('cpu_percent', 0), 1),
+            'rss_trend_mb_per_min': round(slope * 60 / 1024, 2) if slope is not None else None,
+            'trend_fit': round(fit, 2) if fit is not None else None
+        }
+
+resource_watchdog = ResourceWatchdog()
+
+# Network Flow Detection
+class NetFlowDetector:
+    # Confirms a live game session from the kernel socket tables instead of the
+    # focused window: the client's uid owns a connected UDP socket to the game
+    # server while it is in a game. Each poll reads /proc/net/{udp,udp6,tcp,tcp6}
+    # (from net_root when set, e.g. a directory of captured tables), keeps the
+    # sockets owned by the uid and diffs them against the previous poll. After
+    # a game flow has been seen, its disappearance for idle_timeout seconds means
+    # the client fell back to a menu or disconnect screen ('idle'), and a receive
+    # queue that only grows for as long means the client stopped reading ('stalled').
+    # Only remote ports in game_ports count: Roblox game servers use the dynamic
+    # range, so DNS (53) and QUIC (443) from a client idling in the menu do not.
+    TABLES = ('udp', 'udp6', 'tcp', 'tcp6')
+    TCP_ESTABLISHED = '01'
+    GAME_PORTS = (49152, 65535)
+
+    def __init__(self, net_root=None, idle_timeout=20):
+        self.enabled = True
+        self.net_root = net_root
+        self.idle_timeout = idle_timeout
+        self.game_ports = self.GAME_PORTS
+        self.flows = {}
+
+    def configure(self, config):
+        self.enabled = config.get('net_detection', True)
+        self.net_root = config.get('net_root') or None
+        self.idle_timeout = config.get('net_idle_timeout', 20)
+        ports = config.get('net_game_ports', list(self.GAME_PORTS))
+        if (isinstance(ports, (list, tuple)) and len(ports) == 2
+                and all(isinstance(port, int) and 0 < port < 65536 for port in ports) and ports[0] <= ports[1]):
+            self.game_ports = tuple(ports)
+        else:
+            print_formatted("WARNING", f"Invalid net_game_ports {ports!r}, using {list(self.GAME_PORTS)}")
+            self.game_ports = self.GAME_PORTS
+
+    def forget(self, package):
+        self.flows.pop(package, None)
+
+    @staticmethod
+    def parse_address(text):
+        # "0100007F:1F90" for IPv4, 32 hex digits for IPv6; each 32-bit word is
+        # stored in host (little-endian) order.
+        address, _, port = text.partition(':')
+        words = [address[index:index + 8] for index in range(0, len(address), 8)]
+        raw = b"".join(bytes.fromhex(word)[::-1] for word in words)
+        if len(raw) == 16 and raw[:12] == b'\0' * 10 + b'\xff' * 2:
+            raw = raw[12:]
+        if len(raw) == 4:
+            host = ".".join(str(byte) for byte in raw)
+        else:
+            host = ":".join(raw[index:index + 2].hex() for index in range(0, 16, 2))
+        return host, int(port, 16)
+
+    @classmethod
+    def parse_table(cls, text, uid, protocol='udp'):
+        # {(protocol, local, remote, inode): {'state', 'tx_queue', 'rx_queue'}} for
+        # sockets owned by uid; header and malformed rows are skipped.
+        sockets = {}
+        for line in text.splitlines():
+            fields = line.split()
+            if len(fields) < 10 or not fields[0].endswith(':') or not fields[7].isdigit() or int(fields[7]) != uid:
+                continue
+            try:
+                local = cls.parse_address(fields[1])
+                remote = cls.parse_address(fields[2])
+                tx_queue, rx_queue = (int(value, 16) for value in fields[4].split(':'))
+            except ValueError:
+                continue
+            sockets[(protocol, local, remote, fields[9])] = {'state': fields[3], 'tx_queue': tx_queue, 'rx_queue': rx_queue}
+        return sockets
+
+    def is_game_flow(self, key, entry):
+        protocol, _, (host, port), _ = key
+        return (protocol.startswith('udp') and self.game_ports[0] <= port <= self.game_ports[1]
+                and host not in ('127.0.0.1', '0000:0000:0000:0000:0000:0000:0000:0001'))
+
+    def read_tables(self):
+        if self.net_root:
+            texts = {}
+            for table in self.TABLES:
+                try:
+                    with open(os.path.join(self.net_root, table), 'r') as f:
+                        texts[table] = f.read()
+                except OSError:
+                    texts[table] = ''
+            return texts
+        texts = read_proc_files([f"net/{table}" for table in self.TABLES])
+        return {table: texts[f"net/{table}"] for table in self.TABLES}
+
+    def sample(self, package, uid):
+        texts = self.read_tables()
+        sockets = {}
+        for table in self.TABLES:
+            sockets.update(self.parse_table(texts.get(table, ''), uid, table))
+        now = time.time()
+        state = self.flows.setdefault(package, {'game': {}, 'seen': False, 'lost_since': None, 'growing_since': None,
+                                                'opened': 0, 'closed': 0, 'tcp': 0})
+        game = {key: entry for key, entry in sockets.items() if self.is_game_flow(key, entry)}
+        previous = state['game']
+        state['opened'] += len(game.keys() - previous.keys())
+        state['closed'] += len(previous.keys() - game.keys())
+        state['tcp'] = sum(1 for (protocol, _, _, _), entry in sockets.items()
+                           if protocol.startswith('tcp') and entry['state'] == self.TCP_ESTABLISHED)
+        if game:
+            state['seen'] = True
+            state['lost_since'] = None
+            kept = game.keys() & previous.keys()
+            growing = kept and all(game[key]['rx_queue'] > previous[key]['rx_queue'] for key in kept)
+            if not growing:
+                state['growing_since'] = None
+            elif state['growing_since'] is None:
+                state['growing_since'] = now
+        elif state['seen'] and state['lost_since'] is None:
+            state['lost_since'] = now
+        state['game'] = game
+        return state
+
+    def check(self, package, uid):
+        if not self.enabled or uid is None:
+            return None
+        state = self.sample(package, uid)
+        now = time.time()
+        if state['lost_since'] is not None and now - state['lost_since'] >= self.idle_timeout:
+            return 'idle'
+        if state['growing_since'] is not None and now - state['growing_since'] >= self.idle_timeout:
+            return 'stalled'
+        if state['game']:
+            return 'connected'
+        return None
+
+    def summary(self, package):
+        state = self.flows.get(package)
+        if not state:
+            return None
+        return {
+            'game_flows': [f"{remote[0]}:{remote[1]}" for (_, _, remote, _) in state['game']],
+            'rx_queue': sum(entry['rx_queue'] for entry in state['game'].values()),
+            'tcp_established': state['tcp'],
+            'opened': state['opened'],
+            'closed': state['closed'],
+            'lost_for': round(time.time() - state['lost_since'], 1) if state['lost_since'] else None
+        }
+
+net_flows = NetFlowDetector()
+
+# Admission Control
+class AdmissionController:
+    # Decides whether the device has room for a launch or a heavy probe, from
+    # /proc/loadavg (per CPU), MemAvailable, PSI some-avg10 of cpu/memory/io and
+    # the hottest thermal zone. Signals a device does not expose are ignored.
+    # Automated launches wait (jittered, doubling) while the device is saturated,
+    # but never longer than max_defer; heavy probes simply skip their round.
+    SAMPLE_TTL = 2
+    BASE_DELAY = 5
+    MAX_DELAY = 60
+    PRESSURE = ('cpu', 'memory', 'io')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cpus = None
+        self.decision = None
+        self.deferrals = 0
+        self.configure({})
+
+    def configure(self, config):
+        self.enabled = config.get('admission_control', True)
+        self.max_load = config.get('admission_max_load', 2.0)
+        self.min_mem_mb = config.get('admission_min_mem_mb', 400)
+        self.max_psi = config.get('admission_max_psi', 40)
+        self.max_temp = config.get('admission_max_temp', 90)
+        self.max_defer = config.get('admission_max_defer', 300)
+        self.decision = None
+
+    def cpu_count(self):
+        if self.cpus is None:
+            index = get_proc_index()
+            if not index.use_shell and index.proc_root == '/proc':
+                self.cpus = os.cpu_count() or 1
+            else:
+                stat = read_proc_files(['stat'])['stat']
+                self.cpus = len(re.findall(r'^cpu\d+ ', stat, re.MULTILINE)) or 1
+        return self.cpus
+
+    def read_temperature(self):
+        # Millidegrees per zone; zones reporting nonsense (0, negative, >150 C) are skipped.
+        index = get_proc_index()
+        if index.use_shell:
+            output = run_shell_command("cat /sys/class/thermal/thermal_zone*/temp 2>/dev/null", platform_info=platform_info)
+            values = output.split()
+        elif index.proc_root == '/proc':
+            values = []
+            for zone in glob.glob('/sys/class/thermal/thermal_zone*/temp'):
+                try:
+                    with open(zone) as f:
+                        values.append(f.read().strip())
+                except OSError:
+                    continue
+        else:
+            values = read_proc_files(['thermal'])['thermal'].split()
+        temps = [int(value) / 1000 for value in values if value.lstrip('-').isdigit() and 0 < int(value) < 150000]
+        return max(temps) if temps else None
+
+    def sample(self):
+        texts = read_proc_files(['loadavg', 'meminfo'] + [f"pressure/{name}" for name in self.PRESSURE])
+        loadavg = texts['loadavg'].split()
+        memory = re.search(r'MemAvailable:\s+(\d+)', texts['meminfo'])
+        psi = {}
+        for name in self.PRESSURE:
+            match = re.search(r'some avg10=([\d.]+)', texts[f"pressure/{name}"])
+            if match:
+                psi[name] = float(match.group(1))
+        return {
+            'load': round(float(loadavg[0]) / self.cpu_count(), 2) if loadavg else None,
+            'mem_available_mb': int(memory.group(1)) // 1024 if memory else None,
+            'psi': psi,
+            'temp': self.read_temperature()
+        }
+
+    def decide(self):
+        with self.lock:
+            if self.decision and time.time() - self.decision['checked_at'] < self.SAMPLE_TTL:
+                return self.decision
+            reasons = []
+            try:
+                signals = self.sample() if self.enabled else {}
+            except Exception as e:
+                print_formatted("DEBUG", f"Admission sample failed: {str(e)}")
+                signals = {}
+            if signals.get('load') is not None and signals['load'] > self.max_load:
+                reasons.append(f"load {signals['load']}/cpu")
+            if signals.get('mem_available_mb') is not None and signals['mem_available_mb'] < self.min_mem_mb:
+                reasons.append(f"{signals['mem_available_mb']} MB available")
+            for name, value in signals.get('psi', {}).items():
+                if value > self.max_psi:
+                    reasons.append(f"{name} pressure {value:.0f}%")
+            if signals.get('temp') is not None and signals['temp'] > self.max_temp:
+                reasons.append(f"{signals['temp']:.0f} C")
+            self.decision = dict(signals, admit=not reasons, reasons=reasons, checked_at=time.time())
+            metrics.set_gauge('rejoiner_admission_open', 0 if reasons else 1)
+            return self.decision
+
+    def allow_probe(self):
+        return self.decide()['admit']
+
+    def wait_for_launch(self, stop=None):
+        # True once admitted (or after max_defer), False when stop is set while waiting.
+        # With max_defer 0 launches are never deferred, so there is nothing to check or report.
+        if self.max_defer <= 0:
+            return True
+        started = time.time()
+        delay = self.BASE_DELAY
+        while True:
+            decision = self.decide()
+            if decision['admit']:
+                return True
+            waited = time.time() - started
+            if waited >= self.max_defer:
+                print_formatted("WARNING", f"Device still saturated ({', '.join(decision['reasons'])}) "
+                                           f"after {waited:.0f}s, launching anyway")
+                return True
+            pause = min(delay * random.uniform(0.5, 1.5), self.max_defer - waited)
+            delay = min(delay * 2, self.MAX_DELAY)
+            self.deferrals += 1
+            metrics.inc('rejoiner_admission_deferrals_total')
+            print_formatted("INFO", f"Deferring launch {pause:.0f}s: {', '.join(decision['reasons'])}")
+            if stop is not None:
+                if stop.wait(pause):
+                    return False
+            else:
+                time.sleep(pause)
+
+    def summary(self):
+        decision = self.decision or self.decide()
+        return dict({key: value for key, value in decision.items() if key != 'checked_at'}, deferrals=self.deferrals)
+
+admission = AdmissionController()
+
+# Cache Management
+class CacheManager:
+    # Keeps the client cache directories under cache_budget_mb. A low-priority
+    # background thread walks them incrementally into a size index (path ->
+    # last use, size) and, after each full pass, evicts the least recently used
+    # files down to the low watermark. Launches hold a guard for their whole
+    # duration; the walker and evictor only touch files while none is active
+    # and never delete more than one batch before checking again.
+    CHUNK = 256
+    BATCH = 64
+    SHELL_DIRS = 16
+    LOW_WATERMARK = 0.9
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.launches = 0
+        self.idle = threading.Event()
+        self.idle.set()
+        self.index = {}
+        self.total = 0
+        self.evicted = 0
+        self.last_pass = None
+        self.thread = None
+        self.running = False
+        self.configure({})
+
+    def configure(self, config, instances=()):
+        self.budget = config.get('cache_budget_mb', 512) * 1024 * 1024
+        self.interval = config.get('cache_scan_interval', 600)
+        self.pause = config.get('cache_scan_pause', 0.05)
+        # Every configured account's package has its own cache, not just the top-level one.
+        packages = list(dict.fromkeys(instance.package for instance in instances)) or [config.get('package', ROBLOX_PACKAGE)]
+        self.directories = [template.format(package=package) for package in packages
+                            for template in config.get('cache_dirs', DEFAULT_CACHE_DIRS)]
+
+    @contextlib.contextmanager
+    def launch_guard(self):
+        with self.lock:
+            self.launches += 1
+            self.idle.clear()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.launches -= 1
+                if not self.launches:
+                    self.idle.set()
+
+    def start(self):
+        if not self.budget or (self.thread is not None and self.thread.is_alive()):
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="cache-manager", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.idle.set()
+
+    def _run(self):
+        self._lower_priority()
+        while self.running:
+            started = time.time()
+            if not admission.allow_probe():
+                time.sleep(min(self.interval, 30))
+                continue
+            try:
+                self.scan()
+                if self.running and self.total > self.budget:
+                    self.evict()
+            except Exception as e:
+                print_formatted("WARNING", f"Cache maintenance failed: {str(e)}")
+            while self.running and time.time() - started < self.interval:
+                time.sleep(1)
+
+    @staticmethod
+    def _lower_priority():
+        # Per-thread nice and idle I/O class; the shell fallback wraps its commands instead.
+        try:
+            tid = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, tid, 19)
+            if shutil.which('ionice'):
+                subprocess.run(['ionice', '-c', '3', '-p', str(tid)], capture_output=True, timeout=5)
+        except Exception:
+            pass
+
+    def _wait_idle(self):
+        while self.running and not self.idle.wait(1):
+            pass
+        return self.running
+
+    def scan(self):
+        index = {}
+        for directory in self.directories:
+            if os.access(directory, os.R_OK | os.X_OK):
+                self._walk_local(directory, index)
+            else:
+                self._walk_shell(directory, index)
+            if not self.running:
+                return
+        self.index = index
+        self.total = sum(size for _, size in index.values())
+        self.last_pass = time.time()
+        metrics.set_gauge('rejoiner_cache_bytes', self.total)
+        print_formatted("DEBUG", f"Cache index: {len(index)} files, {self.total / 1048576:.1f} MB "
+                                 f"(budget {self.budget / 1048576:.0f} MB)")
+
+    def _walk_local(self, directory, index):
+        pending = [directory]
+        seen = 0
+        while pending and self._wait_idle():
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                stat = entry.stat(follow_symlinks=False)
+                                index[entry.path] = (max(stat.st_atime, stat.st_mtime), stat.st_size)
+                        except OSError:
+                            continue
+                        seen += 1
+                        if seen % self.CHUNK == 0:
+                            time.sleep(self.pause)
+            except OSError:
+                continue
+
+    def _walk_shell(self, directory, index):
+        # One level of up to SHELL_DIRS directories per command, each in its own
+        # low-priority process (never the shared session the rejoin path uses),
+        # with the launch guard checked between chunks like the local walk.
+        pending = [directory]
+        while pending and self._wait_idle():
+            chunk, pending = pending[:self.SHELL_DIRS], pending[self.SHELL_DIRS:]
+            roots = " ".join(shlex.quote(path) for path in chunk)
+            output = run_shell_command(f"nice -n 19 ionice -c 3 find {roots} -mindepth 1 -maxdepth 1 "
+                                       f"\\( -type d -o -type f \\) -exec stat -c '%f %X %Y %s %n' {{}} + 2>/dev/null",
+                                       timeout=30, platform_info=platform_info, background=True)
+            for line in (output or '').splitlines():
+                parts = line.split(' ', 4)
+                if len(parts) != 5 or not all(part.isdigit() for part in parts[1:4]):
+                    continue
+                try:
+                    mode = int(parts[0], 16)
+                except ValueError:
+                    continue
+                if stat.S_ISDIR(mode):
+                    pending.append(parts[4])
+                elif stat.S_ISREG(mode):
+                    index[parts[4]] = (max(int(parts[1]), int(parts[2])), int(parts[3]))
+            time.sleep(self.pause)
+
+    def evict(self):
+        target = int(self.budget * self.LOW_WATERMARK)
+        victims = sorted(self.index.items(), key=lambda item: item[1][0])
+        freed = 0
+        removed = 0
+        while victims and self.total > target and self._wait_idle():
+            batch = []
+            while victims and len(batch) < self.BATCH and self.total - sum(size for _, (_, size) in batch) > target:
+                batch.append(victims.pop(0))
+            with self.lock:
+                # A launch that started while the batch was being picked wins.
+                if self.launches:
+                    victims[:0] = batch
+                    continue
+                deleted = self._delete([path for path, _ in batch])
+            for path, (_, size) in batch:
+                if path in deleted:
+                    self.index.pop(path, None)
+                    self.total -= size
+                    freed += size
+                    removed += 1
+            if not deleted:
+                break
+        self.evicted += freed
+        metrics.set_gauge('rejoiner_cache_bytes', self.total)
+        metrics.inc('rejoiner_cache_evicted_bytes_total', (), freed)
+        if removed:
+            print_formatted("INFO", f"Evicted {removed} cached files ({freed / 1048576:.1f} MB), "
+                                    f"cache now {self.total / 1048576:.1f} MB")
+
+    def _delete(self, paths):
+        local = [path for path in paths if os.access(os.path.dirname(path), os.W_OK)]
+        deleted = set()
+        for path in local:
+            try:
+                os.remove(path)
+                deleted.add(path)
+            except FileNotFoundError:
+                deleted.add(path)
+            except OSError:
+                pass
+        remote = [path for path in paths if path not in local]
+        if remote:
+            # rm -f succeeds whatever it could remove, so only paths the shell then
+            # reports gone count; a failed or timed-out command frees nothing.
+            quoted = " ".join(shlex.quote(path) for path in remote)
+            output = run_shell_command(f"rm -f {quoted} 2>/dev/null; for f in {quoted}; do [ -e \"$f\" ] || echo \"$f\"; done",
+                                       timeout=30, platform_info=platform_info, background=True)
+            deleted.update(line for line in (output or '').splitlines() if line in remote)
+        return deleted
+
+    def summary(self):
+        return {
+            'files': len(self.index),
+            'mb': round(self.total / 1048576, 1),
+            'budget_mb': round(self.budget / 1048576),
+            'evicted_mb': round(self.evicted / 1048576, 1),
+            'last_pass': self.last_pass
+        }
+
+cache_manager = CacheManager()
+
+# Presence Verification
+class PresenceChecker:
+    # Asks the Roblox presence API where the configured accounts are. Every
+    # lookup refreshes all registered user IDs at once (PRESENCE_BATCH per POST)
+    # over one keep-alive session, answers are cached for cache_ttl seconds, and
+    # a 429 or 5xx backs off (Retry-After when given) during which callers get
+    # None and fall back to the on-device checks. base_url may contain {service}
+    # ("users", "presence"); without it every endpoint goes to one host, which
+    # is how bench/presence_stub.py is used.
+    # Only Offline is a definite "not in game": Online (1) is also what a game
+    # hidden from this session by privacy settings looks like, and Studio (3) and
+    # Invisible (4) say nothing about the client either.
+    PRESENCE_BATCH = 50
+    OFFLINE = 0
+    IN_GAME = 2
+    MAX_BACKOFF = 300
+    MIN_RECHECK = 10
+
+    def __init__(self):
+        self.session = None
+        self.lock = threading.Lock()
+        self.user_ids = {}
+        self.bad_ids = set()
+        self.presences = {}
+        self.fetched_at = 0
+        self.backoff_until = 0
+        self.failures = 0
+        self.configure({})
+
+    def configure(self, config, instances=()):
+        self.enabled = config.get('presence_check', False)
+        self.base_url = config.get('presence_base_url', "https://{service}.roblox.com").rstrip('/')
+        self.cache_ttl = config.get('presence_cache_ttl', 30)
+        self.timeout = config.get('presence_timeout', 5)
+        cookie = config.get('presence_cookie', '')
+        with self.lock:
+            if self.session is None and not self.enabled:
+                self.accounts = [instance.config for instance in instances]
+                return
+            if self.session is None:
+                import requests
+                self.session = requests.Session()
+                self.session.headers.update({'Accept': 'application/json', 'User-Agent': 'Rejoiner'})
+            if cookie:
+                self.session.cookies.set('.ROBLOSECURITY', cookie, domain='.roblox.com')
+            else:
+                self.session.cookies.clear()
+            self.accounts = [instance.config for instance in instances]
+            self.fetched_at = 0
 
-def is_roblox_running(retries=3, delay=2):
-    try:
-        for attempt in range(retries):
-            process_output = run_shell_command(f"ps -A | grep {ROBLOX_PACKAGE} | grep -v grep", platform_info=platform_info)
-            process_running = bool(process_output.strip())
-            activity_output = run_shell_command(f"dumpsys activity | grep {ROBLOX_PACKAGE}", platform_info=platform_info)
-            activity_running = ROBLOX_PACKAGE in activity_output and "mResumedActivity" in activity_output
-            if process_running and activity_running:
-                print_formatted("INFO", "Roblox process and activity confirmed running")
-                return True
-            elif process_running:
-                print_formatted("INFO", f"Roblox process running, attempt {attempt+1}/{retries}, retrying...")
-            elif activity_running:
-                print_formatted("INFO", f"Roblox activity detected, attempt {attempt+1}/{retries}, retrying...")
-            time.sleep(delay)
-        print_formatted("INFO", "Roblox not fully running after retries")
-        return False
-    except Exception as e:
-        print_formatted("ERROR", f"Process check error: {str(e)}")
-        return False
+    def url(self, service, path):
+        return self.base_url.replace('{service}', service) + path
 
-def close_roblox(config=None):
-    try:
-        print_formatted("INFO", "Closing Roblox...")
-        max_tries = 3
-        for attempt in range(max_tries):
-            run_shell_command("input keyevent KEYCODE_HOME", platform_info=platform_info)
-            time.sleep(2)
-            run_shell_command(f"am force-stop {ROBLOX_PACKAGE}", platform_info=platform_info)
-            time.sleep(2)
-            run_shell_command(f"killall -9 {ROBLOX_PACKAGE}", platform_info=platform_info)
-            run_shell_command(f"pkill -9 -f {ROBLOX_PACKAGE}", platform_info=platform_info)
-            force_kill_delay = config.get("force_kill_delay", 10) if config else 10
-            time.sleep(force_kill_delay)
-            if not is_roblox_running():
-                print_formatted("SUCCESS", "Roblox closed successfully")
-                return True
-            print_formatted("WARNING", f"Roblox still running after attempt {attempt+1}, retrying...")
-            run_shell_command(f"rm -rf /data/data/{ROBLOX_PACKAGE}/cache/*", platform_info=platform_info)
-            time.sleep(5)
-        print_formatted("ERROR", "Failed to close Roblox completely after max attempts")
-        return False
-    except Exception as e:
-        print_formatted("ERROR", f"Failed to close Roblox: {str(e)}")
-        return False
+    def _post(self, service, path, payload):
+        import requests
+        if time.time() < self.backoff_until:
+            return None
+        try:
+            response = self.session.post(self.url(service, path), json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            self._back_off(None, f"{type(e).__name__}")
+            return None
+        metrics.inc('rejoiner_presence_requests_total', (('service', service), ('status', str(response.status_code))))
+        if response.status_code == 429 or response.status_code >= 500:
+            self._back_off(response.headers.get('Retry-After'), f"HTTP {response.status_code}")
+            return None
+        if response.status_code != 200:
+            print_formatted("WARNING", f"Presence API {service}{path} returned HTTP {response.status_code}")
+            return None
+        self.failures = 0
+        return response.json()
 
-def get_main_activity():
-    try:
-        output = run_shell_command(f"dumpsys package {ROBLOX_PACKAGE} | grep -A 5 'android.intent.action.MAIN'", platform_info=platform_info)
-        match = re.search(r'com\.roblox\.client/(\.[A-Za-z0-9.]+)', output)
-        if match:
-            activity = match.group(1)
-            print_formatted("INFO", f"Detected main activity: {activity}")
-            return activity
-        fallbacks = ['.startup.ActivitySplash', '.MainActivity', '.HomeActivity']
-        for fallback in fallbacks:
-            test_output = run_shell_command(f"dumpsys package {ROBLOX_PACKAGE} | grep {fallback}", platform_info=platform_info)
-            if fallback in test_output:
-                return fallback
-        return '.MainActivity'
-    except Exception as e:
-        print_formatted("WARNING", f"Main activity detection error: {str(e)}")
-        return '.MainActivity'
+    def _back_off(self, retry_after, reason):
+        self.failures += 1
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = min(2 ** self.failures, self.MAX_BACKOFF) * random.uniform(0.8, 1.2)
+        self.backoff_until = time.time() + delay
+        print_formatted("WARNING", f"Presence API unavailable ({reason}), backing off {delay:.0f}s")
 
-def build_game_url(game_id, private_server=''):
-    try:
-        base_url = "roblox://experiences/start?placeId="
-        url = base_url + str(game_id)
-        if private_server:
-            code = extract_private_server_code(private_server)
-            if code:
-                url += f"&privateServerLinkCode={code}"
-        print_formatted("INFO", f"Built game URL: {url}")
-        return url
-    except Exception as e:
-        print_formatted("ERROR", f"URL build error: {e}")
-        return f"roblox://experiences/start?placeId={game_id}"
+    def _configured_id(self, config):
+        # A user_id that is not a number is reported once and then ignored, so the
+        # account falls back to its username instead of failing every refresh.
+        user_id = config.get('user_id')
+        if not user_id:
+            return None
+        try:
+            return int(user_id)
+        except (TypeError, ValueError):
+            if repr(user_id) not in self.bad_ids:
+                self.bad_ids.add(repr(user_id))
+                print_formatted("WARNING", f"Ignoring non-numeric presence user_id {user_id!r}"
+                                           + (f", resolving {config['username']} instead" if config.get('username') else ""))
+            return None
 
-def extract_private_server_code(link):
-    try:
-        patterns = [
-            r'privateServerLinkCode=([^&]+)',
-            r'share\?code=([^&]+)',
-            r'linkCode=([^&]+)',
-            r'code=([^&]+)'
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, link)
-            if match:
-                return match.group(1)
-        for separator in ['privateServerLinkCode=', 'share?code=', '&linkCode=', '=']:
-            if separator in link:
-                code = link.split(separator)[1].split('&')[0].strip()
-                if code:
-                    return code
-        return None
-    except:
-        return None
+    def user_id(self, config):
+        user_id = self._configured_id(config)
+        if user_id:
+            return user_id
+        username = config.get('username')
+        return self.user_ids.get(username.lower()) if username else None
 
-# Game Launch Functions
-def launch_via_deep_link(game_id, private_server=''):
-    try:
-        print_formatted("INFO", f"Launching via deep link: Game ID {game_id}")
-        url = build_game_url(game_id, private_server)
-        command = f'am start -a android.intent.action.VIEW -d "{url}"'
-        result = run_shell_command(command, platform_info=platform_info)
-        time.sleep(120)  # Increased to 120 seconds for proper joining
-        if is_roblox_running():
-            print_formatted("SUCCESS", "Roblox launched via deep link")
-            return True
-        print_formatted("WARNING", "Deep link launched but Roblox not running after extended wait")
-        return False
-    except Exception as e:
-        print_formatted("ERROR", f"Deep link launch failed: {str(e)}")
-        return False
+    def _resolve_usernames(self):
+        missing = sorted({config['username'] for config in self.accounts
+                          if config.get('username') and not self._configured_id(config)
+                          and config['username'].lower() not in self.user_ids})
+        for start in range(0, len(missing), self.PRESENCE_BATCH):
+            data = self._post('users', '/v1/usernames/users',
+                              {'usernames': missing[start:start + self.PRESENCE_BATCH], 'excludeBannedUsers': False})
+            for user in (data or {}).get('data', []):
+                self.user_ids[user.get('requestedUsername', user.get('name', '')).lower()] = user['id']
 
-def launch_via_intent(game_id, private_server=''):
-    try:
-        print_formatted("INFO", f"Launching via intent: Game ID {game_id}")
-        main_activity = get_main_activity()
-        command = f'am start -n {ROBLOX_PACKAGE}/{main_activity}'
-        run_shell_command(command, platform_info=platform_info)
-        time.sleep(5)
-        url = build_game_url(game_id, private_server)
-        intent_command = f'am start -a android.intent.action.VIEW -d "{url}" {ROBLOX_PACKAGE}'
-        result = run_shell_command(intent_command, platform_info=platform_info)
-        time.sleep(15)
-        if is_roblox_running():
-            print_formatted("SUCCESS", "Roblox launched via intent")
-            return True
-        print_formatted("WARNING", "Intent launched but Roblox not running")
-        return False
-    except Exception as e:
-        print_formatted("ERROR", f"Intent launch failed: {str(e)}")
-        return False
+    def refresh(self):
+        self._resolve_usernames()
+        user_ids = sorted({user_id for user_id in (self.user_id(config) for config in self.accounts) if user_id})
+        presences = {}
+        for start in range(0, len(user_ids), self.PRESENCE_BATCH):
+            data = self._post('presence', '/v1/presence/users', {'userIds': user_ids[start:start + self.PRESENCE_BATCH]})
+            if data is None:
+                return False
+            for presence in data.get('userPresences', []):
+                presences[presence.get('userId')] = presence
+        self.presences = presences
+        self.fetched_at = time.time()
+        return True
 
-def launch_via_browser_redirect(game_id, private_server=''):
-    try:
-        print_formatted("INFO", f"Launching via browser redirect: Game ID {game_id}")
-        if private_server:
-            web_url = f"https://www.roblox.com/games/{game_id}?privateServerLinkCode={extract_private_server_code(private_server)}"
-        else:
-            web_url = f"https://www.roblox.com/games/{game_id}"
-        command = f'am start -a android.intent.action.VIEW -d "{web_url}"'
-        run_shell_command(command, platform_info=platform_info)
-        time.sleep(15)
-        if is_roblox_running():
-            print_formatted("SUCCESS", "Roblox launched via browser redirect")
-            return True
-        print_formatted("WARNING", "Browser redirect launched but Roblox not running")
-        return False
-    except Exception as e:
-        print_formatted("ERROR", f"Browser redirect launch failed: {str(e)}")
-        return False
+    def presence(self, config, newer_than=None):
+        # With newer_than only an answer fetched after it counts; an older cached
+        # one is refreshed early (at most every MIN_RECHECK seconds) or ignored.
+        if not self.enabled:
+            return None
+        with self.lock:
+            age = time.time() - self.fetched_at
+            outdated = newer_than is not None and self.fetched_at <= newer_than
+            if (age > self.cache_ttl or (outdated and age >= self.MIN_RECHECK)) and not self.refresh():
+                return None
+            if newer_than is not None and self.fetched_at <= newer_than:
+                return None
+            user_id = self.user_id(config)
+            return self.presences.get(user_id) if user_id else None
+
+    def awaiting(self, since):
+        # A suspicion raised by the answer fetched at since waits for a newer one,
+        # but not for longer than a few refreshes (the API may be backing off).
+        if since is None or self.fetched_at > since:
+            return False
+        return time.time() - since < max(2 * self.cache_ttl, 3 * self.MIN_RECHECK)
+
+    def in_game(self, config, newer_than=None):
+        # True/False when the API knows, None when it cannot tell (disabled,
+        # unknown account, backing off, no answer newer than newer_than, or a
+        # presence type that does not tell).
+        presence = self.presence(config, newer_than)
+        if presence is None:
+            return None
+        if presence.get('userPresenceType') == self.OFFLINE:
+            return False
+        if presence.get('userPresenceType') != self.IN_GAME:
+            return None
+        place_id = presence.get('placeId') or presence.get('rootPlaceId')
+        if not place_id:
+            return None
+        game_id = str(config.get('game_id', ''))
+        return str(place_id) == game_id or str(presence.get('rootPlaceId')) == game_id
+
+presence_checker = PresenceChecker()
 
 # Game State Detection
-def is_in_game(game_id, private_server='', confirm_game_id=False):
+def is_in_game(game_id, private_server='', confirm_game_id=False, package=ROBLOX_PACKAGE):
     try:
-        time.sleep(2)
-        activity = run_shell_command("dumpsys window windows | grep mCurrentFocus", platform_info=platform_info)
-        if not (ROBLOX_PACKAGE in activity and is_game_activity(activity)):
+        snapshot = get_device_snapshot()
+        if not snapshot.focused_on_game(package):
             print_formatted("INFO", "Not in game activity")
             return False
+        if confirm_game_id and follower_active():
+            code = extract_private_server_code(private_server) if private_server else None
+            # Only the client's own lines count: ActivityManager echoes the launch URL too.
+            pids = set(snapshot.pids(package))
+            match = (lambda event: event.get('pid') in pids) if pids else None
+            if logcat_follower.saw_join(game_id, code, match):
+                print_formatted("INFO", f"Confirmed in game: {game_id}")
+                return True
+            print_formatted("INFO", "No game logs found for confirmation")
+            return False
         if confirm_game_id:
-            patterns = [
-                f"place[._]?id.*{game_id}",
-                f"game[._]?id.*{game_id}",
-                f"joining.*{game_id}",
-                f"placeId={game_id}",
-                f"game[._]?join.*{game_id}"
-            ]
-            if private_server:
-                code = extract_private_server_code(private_server)
-                if code:
-                    patterns.extend([
-                        f"linkCode={code}",
-                        f"privateServer.*{code}"
-                    ])
-            log_command = f"logcat -d | grep -iE '{'|'.join(patterns)}'"
-            logs = run_shell_command(log_command, platform_info=platform_info)
-            if logs.strip():
+            code = extract_private_server_code(private_server) if private_server else None
+            grep_pattern, join_regex = compile_join_patterns(game_id, code)
+            logs = dump_logcat(grep_pattern)
+            if join_regex.search(logs):
                 print_formatted("INFO", f"Confirmed in game: {game_id}")
                 return True
             else:
@@ -507,135 +3410,997 @@ def is_game_activity(activity):
     ]
     return any(indicator in activity for indicator in game_indicators)
 
-def check_error_states():
+def check_error_states(package=ROBLOX_PACKAGE, probe=None, match=None):
     try:
-        time.sleep(2)
-        log_command = "logcat -d | grep -iE 'crash|fatal|disconnected|kicked|banned|anr|timeout|luaerror|processerror|sigsegv|segmentation fault|unexpected disconnect|error code|ban|kick|freeze|not responding|application not responding'"
-        logs = run_shell_command(log_command, platform_info=platform_info)
-        error_patterns = {
-            'crash': ['crash', 'fatal', 'exception', 'sigsegv', 'segmentation fault'],
-            'kicked': ['disconnected', 'kicked', 'banned', 'unexpected disconnect', 'error code', 'ban', 'kick'],
-            'frozen': ['anr', 'not responding', 'application not responding', 'timeout', 'freeze'],
-            'script_error': ['luaerror', 'processerror']
-        }
-        for error_type, patterns in error_patterns.items():
-            if any(pattern in logs.lower() for pattern in patterns):
-                print_formatted("WARNING", f"Detected error: {error_type} - Logs: {logs.strip()}")
+        if follower_active():
+            errors = logcat_follower.pop_errors(match)
+            if errors:
+                print_formatted("WARNING", f"Detected error: {errors[0]['type']} - Log: {errors[0]['line']}")
+                return errors[0]['type']
+        else:
+            logs = dump_logcat(LOG_ERROR_GREP)
+            error_type, line = LOG_ERROR_CLASSIFIER.classify_text(logs)
+            if error_type:
+                print_formatted("WARNING", f"Detected error: {error_type} - Log: {line.strip()}")
                 return error_type
-        activity = run_shell_command("dumpsys window windows | grep mCurrentFocus", platform_info=platform_info)
+        probe = probe or get_device_snapshot()
+        activity = probe.focus
+        anr_check = "\n".join(line for line in probe.anr.splitlines() if package in line) if match else probe.anr
         error_activities = ['ErrorActivity', 'CrashActivity', 'NotResponding', 'AlertDialog']
-        if any(error_activity in activity for error_activity in error_activities):
+        if (match is None or package in activity) and any(error_activity in activity for error_activity in error_activities):
             print_formatted("WARNING", f"Detected UI error in activity: {activity.strip()}")
             return 'ui_error'
-        anr_check = run_shell_command("dumpsys activity | grep 'ANR'", platform_info=platform_info)
         if anr_check.strip():
             print_formatted("WARNING", f"Detected ANR: {anr_check.strip()}")
             return 'frozen'
+        stall = freeze_detector.pop_frozen(package)
+        if stall:
+            print_formatted("WARNING", f"Detected render stall: no frames for {stall['stalled']}s")
+            return 'frozen'
         return None
     except Exception as e:
         print_formatted("ERROR", f"Error state check failed: {str(e)}")
         return None
 
+# Join State Machine
+JOIN_STATES = ['closed', 'process_up', 'activity_resumed', 'game_focused', 'joined']
+DEFAULT_JOIN_DEADLINES = {
+    'process_up': 30,
+    'activity_resumed': 30,
+    'game_focused': 90,
+    'joined': 120
+}
+join_timings = []
+
+class JoinStateMachine:
+    # Drives a launch from closed to a confirmed join. Each state is entered as
+    # soon as its condition is observed, polled with a short backoff and bounded
+    # by its own deadline, and the time spent reaching it is recorded.
+    POLL_MIN = 0.25
+    POLL_MAX = 3
+
+    def __init__(self, config, match=None):
+        self.package = config.get('package', ROBLOX_PACKAGE)
+        self.game_id = config.get('game_id')
+        private_server = config.get('private_server', '')
+        self.link_code = extract_private_server_code(private_server) if private_server else None
+        self.validate = config.get('game_validation', True)
+        self.deadlines = {**DEFAULT_JOIN_DEADLINES, **(config.get('join_deadlines') or {})}
+        self.match = match
+        self.state = 'closed'
+        self.started = time.time()
+        self.entered = self.started
+        self.transitions = []
+        self.failure = None
+        self.failure_code = None
+        self.pids = []
+
+    def reached(self, state):
+        return JOIN_STATES.index(self.state) >= JOIN_STATES.index(state)
+
+    def _enter(self, state):
+        now = time.time()
+        self.transitions.append({'state': state, 'at': round(now - self.started, 2), 'took': round(now - self.entered, 2)})
+        print_formatted("INFO", f"Join state: {self.state} -> {state} ({now - self.entered:.1f}s)")
+        self.state = state
+        self.entered = now
+
+    def _check(self, state):
+        # Checks made within one poll share a single snapshot round-trip.
+        snapshot = get_device_snapshot(self.POLL_MIN)
+        if state == 'process_up':
+            self.pids = snapshot.pids(self.package)
+            return bool(self.pids)
+        if state == 'activity_resumed':
+            return snapshot.is_resumed(self.package)
+        if state == 'game_focused':
+            return snapshot.focused_on_game(self.package)
+        if state == 'joined':
+            if not self.validate:
+                return True
+            if follower_active():
+                pids = set(self.pids)
+                match = (lambda event: event.get('pid') in pids) if pids else None
+                return logcat_follower.saw_join(self.game_id, self.link_code, match)
+            grep_pattern, join_regex = compile_join_patterns(self.game_id, self.link_code)
+            return bool(join_regex.search(dump_logcat(grep_pattern)))
+        return False
+
+    def _aborted(self):
+        # Once the client is up, a crash or the process vanishing ends the wait early.
+        if not self.reached('process_up'):
+            return None
+        if follower_active() and logcat_follower.has_errors(self.match or log_event_owner(self.package, self.pids)):
+            return "error reported in logcat while joining"
+        if self.pids and not get_package_pids(self.package, self.POLL_MIN):
+            return "Roblox process exited while joining"
+        return None
+
+    def advance(self, target='joined'):
+        while not self.reached(target):
+            next_state = JOIN_STATES[JOIN_STATES.index(self.state) + 1]
+            deadline = self.entered + self.deadlines.get(next_state, 60)
+            interval = self.POLL_MIN
+            while not self._check(next_state):
+                now = time.time()
+                if now >= deadline:
+                    self.failure = f"{next_state} not reached within {self.deadlines.get(next_state, 60)}s"
+                    self.failure_code = f"timeout:{next_state}"
+                    return False
+                time.sleep(min(interval, deadline - now))
+                interval = min(interval * 1.5, self.POLL_MAX)
+                abort_reason = self._aborted()
+                if abort_reason:
+                    self.failure = abort_reason
+                    self.failure_code = f"aborted:{next_state}"
+                    return False
+            self._enter(next_state)
+        return True
+
+    def summary(self):
+        return ", ".join(f"{step['state']} +{step['took']}s" for step in self.transitions)
+
+def record_join_timings(machine, method_name, success, cold=True):
+    # Only a cold attempt (the first method, on a closed client) feeds the launch
+    # stats; a fallback runs on a client the earlier method already warmed up.
+    if cold:
+        get_launch_stats().record(machine.package, method_name, success,
+                                  time.time() - machine.started, machine.failure_code)
+    metrics.inc('rejoiner_launch_attempts_total', (('method', method_name), ('result', 'success' if success else 'failure')))
+    for step in machine.transitions:
+        metrics.observe('rejoiner_join_state_seconds', step['took'], (('state', step['state']),), JOIN_STATE_BUCKETS)
+    join_timings.append({
+        'time': time.time(),
+        'package': machine.package,
+        'method': method_name,
+        'success': success,
+        'state': machine.state,
+        'failure': machine.failure,
+        'total': round(time.time() - machine.started, 2),
+        'transitions': machine.transitions
+    })
+    del join_timings[:-50]
+
+# Launch Method Selection
+class LaunchStats:
+    # Per platform, package and launch method: attempts, successes, time spent
+    # and failure reasons, persisted across runs. Methods are ordered by expected
+    # time-to-join (mean successful join time plus the failed attempts expected
+    # before it at the smoothed success rate), with an epsilon-greedy exploration
+    # step so a slower method can prove itself again.
+    PRIOR_ATTEMPT_TIME = 60
+
+    def __init__(self, stats_file=None):
+        self.stats_file = stats_file or LAUNCH_STATS_FILE
+        self.lock = threading.Lock()
+        try:
+            with open(self.stats_file, 'r') as f:
+                self.stats = json.load(f)
+        except Exception:
+            self.stats = {}
+
+    @staticmethod
+    def key(package, method_name):
+        platform_type = (platform_info or {}).get('type', 'unknown')
+        return f"{platform_type}|{package}|{method_name}"
+
+    def record(self, package, method_name, success, duration, failure=None):
+        with self.lock:
+            entry = self.stats.setdefault(self.key(package, method_name), {
+                'attempts': 0, 'successes': 0, 'total_time': 0.0, 'join_time': 0.0, 'failures': {}
+            })
+            entry['attempts'] += 1
+            entry['total_time'] += duration
+            if success:
+                entry['successes'] += 1
+                entry['join_time'] += duration
+            else:
+                reason = failure or 'launch_failed'
+                entry['failures'][reason] = entry['failures'].get(reason, 0) + 1
+            entry['last_used'] = time.time()
+            self._save()
+
+    def expected_time(self, package, method_name):
+        entry = self.stats.get(self.key(package, method_name))
+        if not entry:
+            return self.PRIOR_ATTEMPT_TIME / 0.5
+        success_rate = (entry['successes'] + 1) / (entry['attempts'] + 2)
+        join_time = (entry['join_time'] + self.PRIOR_ATTEMPT_TIME) / (entry['successes'] + 1)
+        failed = entry['attempts'] - entry['successes']
+        failure_time = (entry['total_time'] - entry['join_time'] + self.PRIOR_ATTEMPT_TIME) / (failed + 1)
+        return join_time + (1 - success_rate) / success_rate * failure_time
+
+    def order(self, package, methods, exploration=0.1):
+        ranked = sorted(methods, key=lambda method: self.expected_time(package, method.__name__))
+        if len(ranked) > 1 and random.random() < exploration:
+            explored = ranked.pop(random.randrange(1, len(ranked)))
+            ranked.insert(0, explored)
+        return ranked
+
+    def summary(self, package):
+        rows = []
+        for name in LAUNCH_METHODS:
+            entry = self.stats.get(self.key(package, name), {})
+            rows.append(f"{name}: {entry.get('successes', 0)}/{entry.get('attempts', 0)} ok, "
+                        f"expected {self.expected_time(package, name):.0f}s")
+        return rows
+
+    def _save(self):
+        try:
+            write_json_atomic(self.stats_file, self.stats)
+        except Exception as e:
+            print_formatted("WARNING", f"Could not save launch stats: {e}")
+
+launch_stats = None
+
+def get_launch_stats():
+    global launch_stats
+    if launch_stats is None:
+        launch_stats = LaunchStats()
+    return launch_stats
+
 # Main Automation Logic
-def attempt_game_join(config):
+def attempt_game_join(config, match=None):
+    with cache_manager.launch_guard():
+        return _attempt_game_join(config, match)
+
+def _attempt_game_join(config, match=None):
     global last_game_join_time
     game_id = config.get('game_id')
     private_server = config.get('private_server', '')
+    package = config.get('package', ROBLOX_PACKAGE)
     if not game_id:
         print_formatted("ERROR", "No game ID specified in config")
         return False
     print_formatted("INFO", f"Attempting to join game {game_id}")
     if not close_roblox(config):
         print_formatted("WARNING", "Failed to close Roblox properly")
-    run_shell_command("logcat -c", platform_info=platform_info)
-    time.sleep(3)
-    methods = [
-        launch_via_deep_link,
-        launch_via_intent,
-        launch_via_browser_redirect
-    ]
-    for method in methods:
+    get_proc_index().acknowledge(package)
+    methods = list(LAUNCH_METHODS.values())
+    if config.get('adaptive_launch', True):
+        methods = get_launch_stats().order(package, methods, config.get('launch_exploration', 0.1))
+    for index, method in enumerate(methods):
+        cold = index == 0
         try:
             print_formatted("INFO", f"Trying launch method: {method.__name__}")
-            if method(game_id, private_server):
-                if wait_for_game_join(config, timeout=180):
+            # Errors logged during an earlier method must not abort this one.
+            reset_log_cursor(match)
+            machine = JoinStateMachine(config, match)
+            if method(game_id, private_server, package=package, machine=machine):
+                if wait_for_game_join(config, match=match, machine=machine):
                     last_game_join_time = time.time()
-                    print_formatted("SUCCESS", f"Successfully joined game using {method.__name__}")
+                    record_join_timings(machine, method.__name__, True, cold)
+                    print_formatted("SUCCESS", f"Successfully joined game using {method.__name__} in {last_game_join_time - machine.started:.1f}s ({machine.summary()})")
                     return True
                 else:
-                    print_formatted("WARNING", f"Game join timeout with {method.__name__}")
+                    print_formatted("WARNING", f"Game join failed with {method.__name__}: {machine.failure}")
             else:
                 print_formatted("WARNING", f"Failed to launch with {method.__name__}")
-            time.sleep(5)
+            record_join_timings(machine, method.__name__, False, cold)
         except Exception as e:
             print_formatted("ERROR", f"Error with {method.__name__}: {str(e)}")
             continue
     print_formatted("ERROR", "All launch methods failed")
     return False
 
-def wait_for_game_join(config, timeout=180):
-    start_time = time.time()
-    game_id = config.get('game_id')
-    private_server = config.get('private_server', '')
-    while time.time() - start_time < timeout:
-        if is_in_game(game_id, private_server, confirm_game_id=True):
-            return True
-        time.sleep(10)
-    print_formatted("INFO", "Game join timeout, checking error states")
-    error_state = check_error_states()
+def wait_for_game_join(config, timeout=None, match=None, machine=None):
+    package = config.get('package', ROBLOX_PACKAGE)
+    machine = machine or JoinStateMachine(config, match)
+    if timeout is not None:
+        machine.deadlines['joined'] = timeout
+    if machine.advance('joined'):
+        return True
+    print_formatted("INFO", f"Game join not confirmed ({machine.failure}), checking error states")
+    error_state = check_error_states(package, match=match)
     if error_state:
         print_formatted("WARNING", f"Detected error during join: {error_state}")
     return False
 
 def should_attempt_launch(config):
-    if not is_roblox_running():
+    package = config.get('package', ROBLOX_PACKAGE)
+    if not is_roblox_running(package=package):
         print_formatted("INFO", "Roblox not running, need to launch")
         return True
     game_id = config.get('game_id')
     private_server = config.get('private_server', '')
-    if not is_in_game(game_id, private_server, confirm_game_id=False):
+    if not is_in_game(game_id, private_server, confirm_game_id=False, package=package):
         print_formatted("INFO", "Not in correct game, need to rejoin")
         return True
-    error_state = check_error_states()
+    error_state = check_error_states(package)
     if error_state:
         print_formatted("WARNING", f"Error state detected: {error_state}")
         return True
     print_formatted("INFO", "Game is running normally, no action needed")
     return False
 
-def automation_loop(config):
-    global automation_running, last_game_join_time
-    automation_running = True
-    print_formatted("SUCCESS", "Automation started successfully!")
-    while automation_running:
-        try:
-            if should_attempt_launch(config):
-                success = attempt_game_join(config)
-                if success:
-                    run_shell_command("logcat -c", platform_info=platform_info)
-            else:
-                print_formatted("INFO", f"Monitoring game {config.get('game_id')}...")
-                error_state = check_error_states()
-                if error_state:
-                    print_formatted("WARNING", f"Game ended due to {error_state}, attempting rejoin...")
-                    success = attempt_game_join(config)
-                    if success:
-                        run_shell_command("logcat -c", platform_info=platform_info)
+# Multi-Instance Supervisor
+class RobloxInstance:
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.package = config.get('package', ROBLOX_PACKAGE)
+        self.state = 'starting'
+        self.reason = None
+        self.suspect = 0
+        self.failures = 0
+        self.rejoins = 0
+        self.cooldown_until = 0
+        self.last_join_time = None
+        self.session_started = None
+        self.problem_since = None
+        # Fetch time of the presence answer behind the current suspicion.
+        self.presence_false_at = None
+
+    def set_state(self, state, reason=None):
+        if state != self.state:
+            print_formatted("INFO", f"[{self.name}] {self.state} -> {state}" + (f" ({reason})" if reason else ""))
+            # A session is the time spent monitoring a healthy game between rejoins.
+            if state == 'monitoring':
+                self.session_started = time.time()
+            elif self.state == 'monitoring' and self.session_started:
+                metrics.observe('rejoiner_session_uptime_seconds', time.time() - self.session_started,
+                                (('instance', self.name),), UPTIME_BUCKETS)
+                self.session_started = None
+        self.state = state
+        self.reason = reason
+
+    def status(self):
+        return {
+            'name': self.name,
+            'package': self.package,
+            'game_id': self.config.get('game_id'),
+            'state': self.state,
+            'reason': self.reason,
+            'rejoins': self.rejoins,
+            'failures': self.failures,
+            'last_join_time': self.last_join_time
+        }
+
+def build_instances(config):
+    # Each entry of "accounts" may override package, game_id and private_server;
+    # anything it leaves out comes from the top-level config. Without accounts
+    # the top-level config describes a single instance, as before.
+    accounts = config.get('accounts') or []
+    active = config.get('active_account')
+    instances = []
+    for index, account in enumerate(accounts):
+        if isinstance(account, str):
+            account = {'name': account}
+        if not isinstance(account, dict) or account.get('enabled', True) is False:
+            continue
+        name = account.get('name') or account.get('package') or f"account{index + 1}"
+        if active and name != active:
+            continue
+        instance_config = {**config, **{key: value for key, value in account.items() if key != 'name'}}
+        instance = RobloxInstance(name, instance_config)
+        # Two instances on one package would close each other's launches and
+        # claim the same log events, so the first account for a package wins.
+        owner = next((other for other in instances if other.package == instance.package), None)
+        if owner is not None:
+            print_formatted("WARNING", f"Account {name} uses package {instance.package}, already used by "
+                                       f"account {owner.name}; skipping it (give each account its own package)")
+            continue
+        instances.append(instance)
+    if not instances:
+        instances.append(RobloxInstance(config.get('active_account') or 'default', dict(config)))
+    return instances
+
+class Supervisor:
+    RECHECK_DELAY = 2
+    # Keys that only take effect when automation is restarted.
+    RESTART_KEYS = {'metrics_port'}
+
+    def __init__(self, config, watcher=None, stop=None):
+        self.config = config
+        self.watcher = watcher
+        # Set by AutomationController.stop; every wait of this run observes it.
+        self.stop = stop or threading.Event()
+        # Serialises state changes between step and manual rejoins from the
+        # control socket, so an instance never gets two close/launch cycles.
+        self.lock = threading.RLock()
+        self.instances = build_instances(config)
+        self.probe = DeviceSnapshot()
+        self.launch_slots = threading.BoundedSemaphore(max(1, int(config.get('max_concurrent_launches', 1))))
+        self.shared = len(self.instances) > 1
+        presence_checker.configure(config, self.instances)
+        cache_manager.configure(config, self.instances)
+        set_snapshot_window_list(self.shared)
+
+    def apply_config(self, config):
+        global snapshot_ttl
+        changed = sorted(key for key in set(self.config) | set(config) if self.config.get(key) != config.get(key))
+        if not changed:
+            return changed
+        print_formatted("INFO", f"Config changed: {', '.join(changed)}")
+        for key in self.RESTART_KEYS.intersection(changed):
+            print_formatted("WARNING", f"{key} takes effect after automation is restarted")
+        if 'max_concurrent_launches' in changed:
+            # Launches already holding the old semaphore release it; new ones use this one.
+            self.launch_slots = threading.BoundedSemaphore(max(1, int(config.get('max_concurrent_launches', 1))))
+        snapshot_ttl = config.get('snapshot_ttl', 2)
+        configure_logging(config)
+        configure_freeze_detector(config)
+        resource_watchdog.configure(config)
+        net_flows.configure(config)
+        admission.configure(config)
+        current = {instance.name: instance for instance in self.instances}
+        instances = []
+        for fresh in build_instances(config):
+            instance = current.pop(fresh.name, None)
+            if instance is None or instance.package != fresh.package:
+                if instance is not None:
+                    instance.set_state('stopped', 'package changed')
+                instances.append(fresh)
+                continue
+            retarget = any(instance.config.get(key) != fresh.config.get(key) for key in ('game_id', 'private_server'))
+            instance.config = fresh.config
+            instances.append(instance)
+            if retarget and instance.state in ('monitoring', 'suspect', 'cooldown'):
+                self.schedule_rejoin(instance, 'config_changed')
+        for instance in current.values():
+            instance.set_state('stopped', 'removed from config')
+        self.instances = instances
+        self.shared = len(self.instances) > 1
+        self.config = config
+        presence_checker.configure(config, self.instances)
+        cache_manager.configure(config, self.instances)
+        set_snapshot_window_list(self.shared)
+        return changed
+
+    def event_match(self, instance):
+        # A single instance owns every log event, exactly like the old loop.
+        if not self.shared:
+            return None
+        return log_event_owner(instance.package, self.probe.pids(instance.package))
+
+    def logged_death(self, instance):
+        # Unlike event_match this never falls back to every event: a foreign
+        # app's error line must not confirm that our process is gone.
+        if not follower_active():
+            return False
+        # The index has usually dropped the dead pids by now; the main pid is kept
+        # until our own relaunch acknowledges it.
+        index = get_proc_index()
+        pids = set(index.processes(instance.package)) | {index.main_pids.get(instance.package)}
+        return logcat_follower.has_errors(log_event_owner(instance.package, pids))
+
+    def evaluate(self, instance):
+        package = instance.package
+        if not self.probe.is_running(package, resumed=not self.shared):
+            return 'not_running'
+        if get_proc_index().pop_restart(package):
+            return 'restarted'
+        in_game = self.probe.in_game(package) if self.shared else self.probe.focused_on_game(package)
+        if not in_game:
+            return 'not_in_game'
+        problem = check_error_states(package, probe=self.probe, match=self.event_match(instance))
+        # The presence API lags a fresh join, so it only gets a say once the session has settled.
+        settled = instance.last_join_time and time.time() - instance.last_join_time > instance.config.get('presence_grace', 60)
+        if problem is None and instance.state in ('monitoring', 'suspect') and settled:
+            # Each suspect retry needs a freshly fetched answer, not the cached one again.
+            in_game = presence_checker.in_game(instance.config, instance.presence_false_at)
+            if in_game is False:
+                instance.presence_false_at = presence_checker.fetched_at
+                return 'not_in_game'
+            if in_game is None and presence_checker.awaiting(instance.presence_false_at):
+                return 'presence_pending'
+        if problem is None and instance.state == 'monitoring':
+            metadata = get_package_metadata(package) or {}
+            flow = net_flows.check(package, int(metadata['uid']) if metadata.get('uid') else None)
+            if flow == 'idle':
+                return 'disconnected'
+            if flow == 'stalled':
+                return 'frozen'
+        if problem is None and instance.state == 'monitoring':
+            quiet = not any(other.state in ('rejoin_queued', 'rejoining') for other in self.instances)
+            problem = resource_watchdog.check(package, get_proc_index().main_pids.get(package), quiet)
+        return problem
+
+    def step(self, instance):
+        if instance.state in ('rejoin_queued', 'rejoining'):
+            return
+        if instance.state == 'cooldown' and time.time() < instance.cooldown_until:
+            return
+        problem = self.evaluate(instance)
+        with self.lock:
+            # A manual rejoin may have been queued while the checks ran.
+            if instance.state not in ('rejoin_queued', 'rejoining'):
+                self._settle(instance, problem)
+
+    def _settle(self, instance, problem):
+        if problem == 'presence_pending':
+            return
+        if problem is None:
+            instance.suspect = 0
+            instance.problem_since = None
+            instance.presence_false_at = None
+            instance.set_state('monitoring')
+            if instance.config.get('freeze_detection', True):
+                freeze_detector.watch(instance.package)
+            return
+        instance.suspect += 1
+        # Process and focus checks are retried like is_roblox_running did; a log
+        # or UI error is already conclusive, and so is a missing process the log
+        # has already reported dying (events are reset on every join).
+        retries = 3 if instance.state != 'starting' else 1
+        if problem == 'not_running' and self.logged_death(instance):
+            retries = 1
+        if problem in ('not_running', 'not_in_game') and instance.suspect < retries:
+            instance.set_state('suspect', problem)
+            return
+        if not instance.config.get('auto_rejoin', True) and instance.state != 'starting':
+            freeze_detector.unwatch(instance.package)
+            instance.set_state('stopped', problem)
+            return
+        self.schedule_rejoin(instance, problem)
+
+    def schedule_rejoin(self, instance, reason):
+        # Returns False when the instance already has a rejoin queued or running.
+        with self.lock:
+            if instance.state in ('rejoin_queued', 'rejoining'):
+                return False
+            instance.presence_false_at = None
+            freeze_detector.unwatch(instance.package)
+            resource_watchdog.forget(instance.package)
+            net_flows.forget(instance.package)
+            metrics.inc('rejoiner_rejoins_total', (('cause', reason),))
+            if instance.problem_since is None:
+                instance.problem_since = time.time()
+            instance.set_state('rejoin_queued', reason)
+        threading.Thread(target=self._rejoin, args=(instance, reason), daemon=True).start()
+        return True
+
+    def _rejoin(self, instance, reason):
+        global last_game_join_time
+        with self.launch_slots:
+            if self.stop.is_set():
+                instance.set_state('stopped')
+                return
+            if not admission.wait_for_launch(self.stop):
+                instance.set_state('stopped')
+                return
+            instance.set_state('rejoining', reason)
+            match = self.event_match(instance)
+            try:
+                success = attempt_game_join(instance.config, match=match)
+            except Exception as e:
+                print_formatted("ERROR", f"[{instance.name}] Rejoin error: {str(e)}")
+                success = False
+        instance.suspect = 0
+        if success:
+            instance.rejoins += 1
+            instance.failures = 0
+            instance.last_join_time = time.time()
+            last_game_join_time = instance.last_join_time
+            if instance.problem_since is not None:
+                metrics.observe('rejoiner_time_to_rejoin_seconds', instance.last_join_time - instance.problem_since,
+                                (('cause', reason),), JOIN_BUCKETS)
+                instance.problem_since = None
+            reset_log_cursor(self.event_match(instance))
+            instance.set_state('monitoring')
+            return
+        instance.failures += 1
+        if instance.failures >= instance.config.get('max_retries', 3):
+            delay = instance.config.get('cooldown_period', 120)
+            instance.failures = 0
+        else:
+            delay = instance.config.get('retry_delay', 15)
+        instance.cooldown_until = time.time() + delay
+        instance.set_state('cooldown', f"retry in {delay}s")
+
+    def status(self):
+        return [dict(instance.status(), resources=resource_watchdog.summary(instance.package),
+                     network=net_flows.summary(instance.package)) for instance in self.instances]
+
+    def run(self):
+        while not self.stop.is_set():
+            try:
+                self.probe = get_device_snapshot(0)
+                if follower_active():
+                    logcat_follower.settle([self.event_match(instance) for instance in self.instances]
+                                           if self.shared else None)
+                for instance in self.instances:
+                    self.step(instance)
+                states = [instance.state for instance in self.instances]
+                if 'suspect' in states:
+                    delay = self.RECHECK_DELAY
                 else:
-                    print_formatted("INFO", "Game running, continuing monitoring...")
-                    run_shell_command("logcat -c", platform_info=platform_info)
-            check_delay = config.get('check_delay', 45)
-            print_formatted("INFO", f"Waiting {check_delay} seconds before next check...")
-            time.sleep(check_delay)
-        except KeyboardInterrupt:
-            print_formatted("INFO", "Automation interrupted by user")
-            break
-        except Exception as e:
-            print_formatted("ERROR", f"Automation loop error: {str(e)}")
-            time.sleep(10)
+                    delay = min(instance.config.get('check_delay', 45) for instance in self.instances)
+                    print_formatted("INFO", f"Monitoring {len(self.instances)} instance(s): " +
+                                    ", ".join(f"{instance.name}={instance.state}" for instance in self.instances))
+                event = wait_for_monitor_event(delay, self.watcher, self.config, self.stop)
+                if event == 'stopped':
+                    break
+                if isinstance(event, dict):
+                    self.apply_config(event)
+                elif event == 'frozen':
+                    print_formatted("INFO", "Render stall reported, checking immediately")
+                elif event:
+                    print_formatted("INFO", "Log event received, checking immediately")
+            except KeyboardInterrupt:
+                print_formatted("INFO", "Automation interrupted by user")
+                break
+            except Exception as e:
+                print_formatted("ERROR", f"Automation loop error: {str(e)}")
+                self.stop.wait(10)
+
+def automation_loop(config, stop=None):
+    global automation_running, supervisor, snapshot_ttl
+    stop = stop or threading.Event()
+    automation_running = True
+    snapshot_ttl = config.get('snapshot_ttl', 2)
+    configure_logging(config)
+    metrics.serve(config.get('metrics_port', 0))
+    configure_freeze_detector(config)
+    resource_watchdog.configure(config)
+    net_flows.configure(config)
+    admission.configure(config)
+    start_logcat_follower()
+    supervisor = Supervisor(config, ConfigWatcher(interval=config.get('config_poll_interval', 2)), stop)
+    cache_manager.start()
+    print_formatted("SUCCESS", f"Automation started successfully! Watching {len(supervisor.instances)} instance(s)")
+    supervisor.run()
     automation_running = False
+    stop_logcat_follower()
+    freeze_detector.stop()
+    cache_manager.stop()
     print_formatted("INFO", "Automation stopped")
 
+# Automation Control
+def control_socket_path(config=None):
+    # Unix sockets cannot live on /sdcard (FUSE), so the default is the Termux tmp dir.
+    path = (config or {}).get('control_socket')
+    return path or os.path.join(os.environ.get('TMPDIR', '/tmp'), 'rejoiner.sock')
+
+class AutomationController:
+    # Starts, stops and inspects the automation thread; shared by the menu, the
+    # daemon and the control socket.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = None
+        self.started_at = None
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive() and not self.stop_event.is_set()
+
+    def start(self, config=None):
+        global automation_running
+        with self.lock:
+            if self.running():
+                return False, "Automation is already running"
+            if self.thread is not None and self.thread.is_alive():
+                # A stopped run can still be inside a join or a probe; a second
+                # supervisor must not start next to it.
+                return False, "Previous automation run is still stopping, try again shortly"
+            config = config or load_config()
+            if not config.get('game_id'):
+                return False, "No game ID configured"
+            automation_running = True
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=automation_loop, args=(config, self.stop_event), name="automation", daemon=True)
+            self.thread.start()
+            self.started_at = time.time()
+            return True, "Automation started"
+
+    def stop(self, timeout=5):
+        global automation_running
+        with self.lock:
+            if not self.running():
+                return False, "Automation is not running"
+            self.stop_event.set()
+            automation_running = False
+            self.thread.join(timeout=timeout)
+            self.started_at = None
+            if self.thread.is_alive():
+                return True, "Automation stopping (finishing the current step)"
+            return True, "Automation stopped"
+
+    def status(self):
+        return {
+            'running': self.running(),
+            'uptime': time.time() - self.started_at if self.started_at and self.running() else 0,
+            'platform': (platform_info or {}).get('name'),
+            'last_game_join_time': last_game_join_time,
+            'instances': supervisor.status() if supervisor else [],
+            'recent_joins': join_timings[-10:],
+            'log_dropped': log_backend.dropped,
+            'cache': cache_manager.summary(),
+            'admission': admission.summary()
+        }
+
+    def rejoin(self, name=None):
+        if not self.running() or supervisor is None:
+            return False, "Automation is not running"
+        queued = []
+        for instance in list(supervisor.instances):
+            if name and instance.name != name:
+                continue
+            if supervisor.schedule_rejoin(instance, 'manual'):
+                queued.append(instance.name)
+        return bool(queued), queued or f"No instance to rejoin{f' named {name}' if name else ''}"
+
+    def reload_config(self):
+        try:
+            config = read_config(fallback=supervisor.config if supervisor else None)
+        except Exception as e:
+            return False, f"Config could not be read: {e}"
+        if not self.running() or supervisor is None:
+            configure_logging(config)
+            return True, []
+        return True, supervisor.apply_config(config)
+
+def handle_control_request(controller, request):
+    command = request.get('cmd')
+    try:
+        if command == 'ping':
+            return {'ok': True, 'result': 'pong'}
+        if command == 'status':
+            return {'ok': True, 'result': controller.status()}
+        if command == 'metrics':
+            return {'ok': True, 'result': metrics.snapshot()}
+        if command == 'logs':
+            return {'ok': True, 'result': {'records': log_backend.recent(int(request.get('count') or 50)),
+                                           'dropped': log_backend.dropped}}
+        if command == 'start':
+            ok, result = controller.start()
+        elif command == 'stop':
+            ok, result = controller.stop()
+        elif command == 'rejoin':
+            ok, result = controller.rejoin(request.get('instance'))
+        elif command == 'reload-config':
+            ok, result = controller.reload_config()
+        else:
+            return {'ok': False, 'error': f"Unknown command: {command}"}
+        return {'ok': ok, 'result': result} if ok else {'ok': False, 'error': result}
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+
+class ControlServer:
+    # JSON-lines request/response over a Unix stream socket; a client may keep
+    # the connection open and send any number of requests.
+    def __init__(self, controller, path):
+        self.controller = controller
+        self.path = path
+        self.server = None
+
+    def start(self):
+        import socketserver
+        controller = self.controller
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                        response = handle_control_request(controller, request if isinstance(request, dict) else {})
+                    except ValueError as e:
+                        response = {'ok': False, 'error': f"Bad request: {e}"}
+                    self.wfile.write((json.dumps(response, default=str) + "\n").encode())
+                    self.wfile.flush()
+
+        if os.path.exists(self.path):
+            # Only a socket nobody accepts on is stale; a daemon that is merely
+            # slow to answer keeps its socket.
+            try:
+                control_request('ping', path=self.path, timeout=1)
+                print_formatted("ERROR", f"Another instance is already listening on {self.path}")
+                return False
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+            except OSError as e:
+                print_formatted("ERROR", f"{self.path} is in use but did not answer ({e}); not replacing it")
+                return False
+        self.server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        self.server.daemon_threads = True
+        os.chmod(self.path, 0o600)
+        threading.Thread(target=self.server.serve_forever, name="control", daemon=True).start()
+        print_formatted("INFO", f"Control socket listening on {self.path}")
+        return True
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+def control_request(command, path=None, timeout=10, **fields):
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or control_socket_path(read_config_quietly()))
+        sock.sendall((json.dumps({'cmd': command, **fields}) + "\n").encode())
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("control socket closed without a reply")
+    return json.loads(line)
+
+controller = AutomationController()
+
+# Fleet Mode
+class AdbBackend:
+    # Command backend for one device reached through adb: a persistent
+    # "adb -s <serial> shell" session for commands and a separate adb shell
+    # running logcat for the follower.
+    def __init__(self, serial, adb='adb', root=False):
+        self.serial = serial
+        self.argv = [adb, '-s', serial, 'shell'] + (['su'] if root else [])
+        self.session = ShellSession(self.argv)
+        self.logcat_process = None
+
+    def run(self, command, timeout=10):
+        result = self.session.run(command, timeout=timeout)
+        if result is None:
+            result = subprocess.run(self.argv + [command], capture_output=True, text=True, timeout=timeout)
+        return result
+
+    def logcat_stream(self, command):
+        self._stop_logcat()
+        self.logcat_process = subprocess.Popen(
+            self.argv + [command], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL
+        )
+        return self.logcat_process.stdout
+
+    def _stop_logcat(self):
+        process, self.logcat_process = self.logcat_process, None
+        if process is not None and process.poll() is None:
+            try:
+                process.kill()
+                process.wait(timeout=2)
+            except Exception:
+                pass
+
+    def close(self):
+        self._stop_logcat()
+        self.session.close()
+
+def adb_platform(serial, root=False):
+    return {
+        'type': 'adb',
+        'name': f"adb:{serial}",
+        'serial': serial,
+        'has_root': root,
+        'use_adb': True,
+        'shell_prefix': '',
+        'special_commands': False
+    }
+
+def adb_devices(adb='adb', timeout=10):
+    result = subprocess.run([adb, 'devices'], capture_output=True, text=True, timeout=timeout)
+    devices = {}
+    for line in result.stdout.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) >= 2:
+            devices[parts[0]] = parts[1]
+    return devices
+
+class FleetController:
+    # Host side of fleet mode. Each adb device gets its own worker process
+    # (--daemon --serial) that runs the normal supervisor over one persistent adb
+    # shell; this process only discovers devices, restarts dead workers and
+    # health-checks all of them in parallel on a bounded pool.
+    RESTART_BACKOFF = 30
+
+    def __init__(self, serials=None, adb='adb', state_dir=None, config_path=None,
+                 workers=8, interval=10, root=False):
+        self.serials = list(serials or [])
+        self.adb = adb
+        self.state_dir = state_dir or os.path.join(os.path.expanduser('~'), '.rejoiner-fleet')
+        self.config_path = config_path or os.path.join(self.state_dir, 'roblox_config.json')
+        self.interval = interval
+        self.root = root
+        import concurrent.futures
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers))
+        self.workers = {}
+        self.last_spawn = {}
+        self.health = {}
+        self.running = False
+
+    def socket_path(self, serial):
+        return os.path.join(self.state_dir, serial.replace(':', '_'), 'control.sock')
+
+    def spawn(self, serial):
+        if time.time() - self.last_spawn.get(serial, 0) < self.RESTART_BACKOFF:
+            return
+        self.last_spawn[serial] = time.time()
+        device_dir = os.path.dirname(self.socket_path(serial))
+        os.makedirs(device_dir, exist_ok=True)
+        argv = [sys.executable, script_path(), '--daemon', '--serial', serial, '--adb', self.adb,
+                '--socket', self.socket_path(serial), '--state-dir', device_dir, '--config', self.config_path]
+        if self.root:
+            argv.append('--adb-root')
+        with open(os.path.join(device_dir, 'console.log'), 'ab') as console:
+            self.workers[serial] = subprocess.Popen(argv, stdout=console, stderr=subprocess.STDOUT,
+                                                    stdin=subprocess.DEVNULL, start_new_session=True)
+        print_formatted("INFO", f"[{serial}] worker started (pid {self.workers[serial].pid})")
+
+    def check(self, serial, adb_state):
+        worker = self.workers.get(serial)
+        health = {'serial': serial, 'adb': adb_state, 'worker': 'running' if worker and worker.poll() is None else 'down'}
+        if health['worker'] == 'running':
+            try:
+                response = control_request('status', path=self.socket_path(serial), timeout=3)
+                health['status'] = response.get('result') or {}
+            except Exception as e:
+                health['worker'] = 'starting' if time.time() - self.last_spawn.get(serial, 0) < 15 else 'unresponsive'
+                health['error'] = str(e)
+        return health
+
+    def step(self):
+        try:
+            devices = adb_devices(self.adb)
+        except Exception as e:
+            print_formatted("ERROR", f"adb devices failed: {e}")
+            devices = {}
+        serials = self.serials or sorted(devices)
+        for serial in serials:
+            worker = self.workers.get(serial)
+            if devices.get(serial) == 'device' and (worker is None or worker.poll() is not None):
+                self.spawn(serial)
+        for serial in [serial for serial in self.workers if serial not in serials]:
+            self.stop_worker(serial)
+        futures = {serial: self.pool.submit(self.check, serial, devices.get(serial, 'missing')) for serial in serials}
+        self.health = {serial: future.result() for serial, future in futures.items()}
+        return self.health
+
+    def table(self):
+        rows = [("DEVICE", "ADB", "WORKER", "INSTANCES", "REJOINS", "LAST JOIN")]
+        for serial, health in sorted(self.health.items()):
+            status = health.get('status') or {}
+            instances = status.get('instances') or []
+            last_join = status.get('last_game_join_time')
+            rows.append((
+                serial, health['adb'], health['worker'],
+                ", ".join(f"{instance['name']}={instance['state']}" for instance in instances) or '-',
+                str(sum(instance.get('rejoins', 0) for instance in instances)),
+                datetime.fromtimestamp(last_join).strftime("%H:%M:%S") if last_join else '-'
+            ))
+        widths = [max(len(row[index]) for row in rows) for index in range(len(rows[0]))]
+        return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+
+    def stop_worker(self, serial):
+        worker = self.workers.pop(serial, None)
+        if worker is None or worker.poll() is not None:
+            return
+        worker.terminate()
+        try:
+            worker.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+    def run(self):
+        self.running = True
+        os.makedirs(self.state_dir, exist_ok=True)
+        if not os.path.exists(self.config_path):
+            # One config for the whole fleet; per-worker logs and metrics ports
+            # would collide, so both start disabled (each worker has console.log).
+            write_json_atomic(self.config_path, {**default_config(), 'log_file': None, 'metrics_port': 0})
+        while self.running:
+            self.step()
+            print(self.table(), flush=True)
+            deadline = time.time() + self.interval
+            while self.running and time.time() < deadline:
+                time.sleep(0.2)
+        for serial in list(self.workers):
+            self.stop_worker(serial)
+        self.pool.shutdown(wait=False)
+
+def run_fleet(serials, adb='adb', state_dir=None, config_path=None, workers=8, interval=10, root=False):
+    fleet = FleetController(serials, adb, state_dir, config_path, workers, interval, root)
+    def shutdown(*_):
+        fleet.running = False
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, shutdown)
+    fleet.run()
+
 # Interactive Menu
 def display_menu():
     print(f"\n{COLORS['HEADER']}{'='*50}")
@@ -658,6 +4423,9 @@ def display_menu():
     if last_game_join_time:
         join_time = datetime.fromtimestamp(last_game_join_time).strftime("%Y-%m-%d %H:%M:%S")
         print(f"{COLORS['INFO']}Last Game Join: {join_time}{COLORS['RESET']}")
+    if automation_running and supervisor and len(supervisor.instances) > 1:
+        for status in supervisor.status():
+            print(f"{COLORS['INFO']}  {status['name']} ({status['package']}): {status['state']}{COLORS['RESET']}")
 
 def configure_settings():
     config = load_config()
@@ -706,6 +4474,9 @@ def view_current_config():
     print(f"{COLORS['CYAN']}Game Validation:{COLORS['RESET']} {'Enabled' if config.get('game_validation', True) else 'Disabled'}")
     print(f"{COLORS['CYAN']}Launch Delay:{COLORS['RESET']} {config.get('launch_delay', 300)} seconds")
     print(f"{COLORS['CYAN']}Retry Delay:{COLORS['RESET']} {config.get('retry_delay', 15)} seconds")
+    print(f"{COLORS['CYAN']}Instances:{COLORS['RESET']} {', '.join(f'{instance.name} ({instance.package})' for instance in build_instances(config))}")
+    print(f"{COLORS['CYAN']}Max Concurrent Launches:{COLORS['RESET']} {config.get('max_concurrent_launches', 1)}")
+    print(f"{COLORS['CYAN']}Metrics Port:{COLORS['RESET']} {config.get('metrics_port') or 'Disabled'}")
     input("\nPress Enter to continue...")
 
 def test_game_join():
@@ -737,6 +4508,14 @@ def show_system_info():
         print(f"{COLORS['CYAN']}Shell Prefix:{COLORS['RESET']} {platform_info.get('shell_prefix', 'None')}")
     roblox_installed = verify_roblox_installation()
     print(f"{COLORS['CYAN']}Roblox Installed:{COLORS['RESET']} {'Yes' if roblox_installed else 'No'}")
+    print(f"{COLORS['CYAN']}Launch Methods:{COLORS['RESET']}")
+    for row in get_launch_stats().summary(ROBLOX_PACKAGE):
+        print(f"  {row}")
+    decision = admission.decide()
+    gate = 'open' if decision['admit'] else f"deferring ({', '.join(decision['reasons'])})"
+    print(f"{COLORS['CYAN']}Launch Gate:{COLORS['RESET']} {gate} - load/cpu {decision.get('load')}, "
+          f"{decision.get('mem_available_mb')} MB available, PSI {decision.get('psi') or 'n/a'}, "
+          f"temp {decision.get('temp') or 'n/a'}")
     if roblox_installed:
         roblox_running = is_roblox_running()
         print(f"{COLORS['CYAN']}Roblox Running:{COLORS['RESET']} {'Yes' if roblox_running else 'No'}")
@@ -754,7 +4533,7 @@ def show_system_info():
 
 # Main Function
 def main():
-    global platform_info, automation_running
+    global platform_info
     try:
         os.system('clear' if os.name == 'posix' else 'cls')
         print(f"{COLORS['HEADER']}")
@@ -766,11 +4545,11 @@ def main():
         print(f"{COLORS['RESET']}")
         detector = PlatformDetector()
         platform_info = detector.detect_platform()
+        configure_logging(load_config())
         if not verify_roblox_installation():
             print_formatted("ERROR", "Roblox is not installed or not accessible!")
             print_formatted("INFO", "Please install Roblox and ensure proper permissions.")
             sys.exit(1)
-        automation_thread = None
         while True:
             try:
                 display_menu()
@@ -778,23 +4557,14 @@ def main():
                 if choice == '1':
                     configure_settings()
                 elif choice == '2':
-                    if automation_running:
-                        print_formatted("WARNING", "Automation is already running!")
+                    started, message = controller.start()
+                    if not started:
+                        print_formatted("WARNING" if controller.running() else "ERROR", f"{message}!")
                         input("Press Enter to continue...")
-                    else:
-                        config = load_config()
-                        if not config.get('game_id'):
-                            print_formatted("ERROR", "No game ID configured! Please configure settings first.")
-                            input("Press Enter to continue...")
-                        else:
-                            automation_thread = threading.Thread(target=automation_loop, args=(config,), daemon=True)
-                            automation_thread.start()
                 elif choice == '3':
-                    if automation_running:
+                    if controller.running():
                         print_formatted("INFO", "Stopping automation...")
-                        automation_running = False
-                        if automation_thread:
-                            automation_thread.join(timeout=5)
+                        controller.stop()
                         print_formatted("SUCCESS", "Automation stopped!")
                     else:
                         print_formatted("WARNING", "Automation is not running!")
@@ -806,11 +4576,9 @@ def main():
                 elif choice == '6':
                     show_system_info()
                 elif choice == '7':
-                    if automation_running:
+                    if controller.running():
                         print_formatted("INFO", "Stopping automation before exit...")
-                        automation_running = False
-                        if automation_thread:
-                            automation_thread.join(timeout=5)
+                        controller.stop()
                     print_formatted("INFO", "Thank you for using Enhanced Roblox Automation Tool!")
                     break
                 else:
@@ -818,8 +4586,8 @@ def main():
                     input("Press Enter to continue...")
             except KeyboardInterrupt:
                 print_formatted("INFO", "\nExiting...")
-                if automation_running:
-                    automation_running = False
+                if controller.running():
+                    controller.stop()
                 break
             except Exception as e:
                 print_formatted("ERROR", f"Menu error: {str(e)}")
@@ -828,5 +4596,79 @@ def main():
         print_formatted("ERROR", f"Critical error: {str(e)}")
         sys.exit(1)
 
+def run_daemon(autostart=True, path=None, serial=None, adb='adb', root=False):
+    # Headless: no menu, automation driven through the control socket. With a
+    # serial the device is reached through adb instead of the local shell.
+    global platform_info
+    if serial:
+        set_command_backend(AdbBackend(serial, adb, root))
+        platform_info = adb_platform(serial, root)
+    else:
+        platform_info = PlatformDetector().detect_platform()
+    config = load_config()
+    configure_logging(config)
+    server = ControlServer(controller, path or control_socket_path(config))
+    if not server.start():
+        sys.exit(1)
+    shutdown = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, lambda *_: shutdown.set())
+    if autostart:
+        started, message = controller.start(config)
+        print_formatted("INFO" if started else "ERROR", message)
+    shutdown.wait()
+    print_formatted("INFO", "Daemon shutting down")
+    controller.stop()
+    server.stop()
+    if command_backend is not None and hasattr(command_backend, 'close'):
+        command_backend.close()
+
+def run_control_client(command, instance=None, path=None):
+    fields = {'instance': instance} if instance else {}
+    try:
+        response = control_request(command, path=path, **fields)
+    except OSError as e:
+        print_formatted("ERROR", f"Could not reach the daemon: {e}")
+        sys.exit(2)
+    print(json.dumps(response.get('result') if response.get('ok') else response, indent=2, default=str))
+    sys.exit(0 if response.get('ok') else 1)
+
+def script_path():
+    # The .pyz when running from the zipapp built by build_pyz.py, else this file.
+    return getattr(__loader__, 'archive', None) or os.path.abspath(__file__)
+
+def run_cli(argv=None):
+    global CONFIG_FILE
+    import argparse
+    parser = argparse.ArgumentParser(description="Enhanced Roblox Automation Tool")
+    parser.add_argument('--daemon', action='store_true', help="run headless with the control socket")
+    parser.add_argument('--idle', action='store_true', help="with --daemon, wait for a start command")
+    parser.add_argument('--ctl', choices=['ping', 'status', 'start', 'stop', 'rejoin', 'metrics', 'logs', 'reload-config'],
+                        help="send one command to a running daemon")
+    parser.add_argument('--instance', help="instance name for --ctl rejoin")
+    parser.add_argument('--socket', help="control socket path")
+    parser.add_argument('--fleet', nargs='*', metavar='SERIAL',
+                        help="drive adb devices from this host (all attached devices if none given)")
+    parser.add_argument('--fleet-workers', type=int, default=8, help="parallel health checks in fleet mode")
+    parser.add_argument('--fleet-interval', type=float, default=10, help="seconds between fleet status rounds")
+    parser.add_argument('--serial', help="with --daemon, run against this adb device")
+    parser.add_argument('--adb', default=os.environ.get('ADB', 'adb'), help="adb executable")
+    parser.add_argument('--adb-root', action='store_true', help="run device commands through su")
+    parser.add_argument('--state-dir', help="directory for config, caches and logs instead of /sdcard")
+    parser.add_argument('--config', help="config file path")
+    args = parser.parse_args(argv)
+    if args.state_dir:
+        set_state_dir(args.state_dir)
+    if args.config:
+        CONFIG_FILE = args.config
+    if args.ctl:
+        run_control_client(args.ctl, args.instance, args.socket)
+    elif args.fleet is not None:
+        run_fleet(args.fleet, args.adb, args.state_dir, args.config, args.fleet_workers, args.fleet_interval, args.adb_root)
+    elif args.daemon:
+        run_daemon(not args.idle, args.socket, args.serial, args.adb, args.adb_root)
+    else:
+        main()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_cli()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Log classifier benchmark
+Usage: python bench/bench_classifier.py [logcat_capture ...] [--size-mb N]
+Without captures a synthetic threadtime log of --size-mb megabytes is generated.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Rejoiner
+
+LEGACY_PATTERNS = {
+    'crash': ['crash', 'fatal', 'exception', 'sigsegv', 'segmentation fault'],
+    'kicked': ['disconnected', 'kicked', 'banned', 'unexpected disconnect', 'error code', 'ban', 'kick'],
+    'frozen': ['anr', 'not responding', 'application not responding', 'timeout', 'freeze'],
+    'script_error': ['luaerror', 'processerror']
+}
+
+NOISE = [
+    "I ActivityManager: Start proc 4242:com.android.vending/u0a12 for service",
+    "D NetworkMonitor/100: PROBE_DNS www.google.com 23ms OK",
+    "I chatty  : uid=10123(com.roblox.client) RenderThread identical 4 lines",
+    "W roblox  : Texture cache miss for asset 1818 (banner_background.png)",
+    "D roblox  : HttpRequest GET https://apis.roblox.com/universes/v1/places returned 200",
+    "I WindowManager: Changing focus from Window{a1 u0 NavigationBar} to Window{b2 u0 SurfaceView}",
+    "V InputDispatcher: kickstart input pipeline for display 0",
+]
+SIGNAL = [
+    "E roblox  : Disconnected from game server: error code 277",
+    "E AndroidRuntime: FATAL EXCEPTION: GLThread 1204",
+    "W ActivityManager: ANR in com.roblox.client (com.roblox.client/.ActivityNativeMain)",
+    "E roblox  : LuaError: attempt to index nil value",
+    "I roblox  : Joining game placeId=920587237 jobId=abcd",
+]
+
+
+# Noise lines without any legacy pattern inside a longer word ('banner', 'kickstart').
+CLEAN_NOISE = [line for line in NOISE if not any(pattern in line.lower() for patterns in LEGACY_PATTERNS.values()
+                                                 for pattern in patterns)]
+
+
+def synthetic_log(size_mb, signal_rate=0.002, noise=NOISE):
+    rng = random.Random(326)
+    lines = []
+    size = 0
+    limit = size_mb * 1024 * 1024
+    while size < limit:
+        body = rng.choice(SIGNAL) if rng.random() < signal_rate else rng.choice(noise)
+        line = "10-17 12:%02d:%02d.%03d  %5d  %5d %s" % (
+            rng.randrange(60), rng.randrange(60), rng.randrange(1000),
+            rng.randrange(1000, 30000), rng.randrange(1000, 30000), body)
+        lines.append(line)
+        size += len(line) + 1
+    return lines
+
+
+def legacy_blob(lines):
+    # check_error_states before the compiled classifier: lower() per pattern.
+    logs = "\n".join(lines)
+    for error_type, patterns in LEGACY_PATTERNS.items():
+        if any(pattern in logs.lower() for pattern in patterns):
+            return error_type
+    return None
+
+
+def legacy_lines(lines):
+    found = 0
+    for line in lines:
+        lowered = line.lower()
+        for patterns in LEGACY_PATTERNS.values():
+            if any(pattern in lowered for pattern in patterns):
+                found += 1
+                break
+    return found
+
+
+def compiled_text(lines):
+    return Rejoiner.LOG_ERROR_CLASSIFIER.classify_text("\n".join(lines))[0]
+
+
+def compiled_lines(lines):
+    return sum(1 for _ in Rejoiner.LOG_ERROR_CLASSIFIER.classify_lines(lines))
+
+
+def follower_feed(lines):
+    # Same 64KB chunking the follower sees when reading a busy logcat pipe.
+    follower = Rejoiner.LogcatFollower(source=[], max_events=len(lines) + 1)
+    text = "\n".join(lines) + "\n"
+    start = 0
+    while start < len(text):
+        cut = text.rfind("\n", start, start + 65536) + 1 or len(text)
+        follower.feed_text(text[start:cut])
+        start = cut
+    return follower.events.qsize()
+
+
+def bench(name, func, lines, size_bytes, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(lines)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print("%-16s %10.0f lines/s %8.1f MB/s  result=%s" % (
+        name, len(lines) / best, size_bytes / best / 1024 / 1024, result))
+
+
+def main():
+    args = sys.argv[1:]
+    size_mb = 8
+    if '--size-mb' in args:
+        index = args.index('--size-mb')
+        size_mb = float(args[index + 1])
+        del args[index:index + 2]
+    if args:
+        lines = []
+        for path in args:
+            with open(path, 'r', errors='replace') as f:
+                lines.extend(line.rstrip('\n') for line in f)
+        run_corpus("capture", lines)
+    else:
+        run_corpus("synthetic", synthetic_log(size_mb))
+        # Here the legacy blob check stops at its first near miss and reports a false 'kicked'.
+        run_corpus("synthetic, no errors", synthetic_log(size_mb, signal_rate=0))
+        # Without near misses both blob checks read the whole dump: the legacy one
+        # lowercases it once per pattern.
+        run_corpus("synthetic, no errors or near misses", synthetic_log(size_mb, signal_rate=0, noise=CLEAN_NOISE))
+
+
+def run_corpus(name, lines):
+    size_bytes = sum(len(line) + 1 for line in lines)
+    print("corpus (%s): %d lines, %.1f MB" % (name, len(lines), size_bytes / 1024 / 1024))
+    bench("legacy_blob", legacy_blob, lines, size_bytes)
+    bench("compiled_text", compiled_text, lines, size_bytes)
+    bench("legacy_lines", legacy_lines, lines, size_bytes)
+    bench("compiled_lines", compiled_lines, lines, size_bytes)
+    bench("follower_feed", follower_feed, lines, size_bytes)
+
+
+if __name__ == "__main__":
+    main()
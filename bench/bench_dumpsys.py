@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Dumpsys probe benchmark: buffered grep versus streaming with early termination
+Usage: python bench/bench_dumpsys.py [--dump-dir DIR] [--rate MBPS] [--repeat N] [--json]
+Replays captured dumps through a producer that writes them at --rate MB/s, the way
+system_server generates them, and runs each probe the old way (whole dump through
+grep in the shell session) and the new way (stream_shell_command, narrower
+subcommand or in-shell cut). Reports the bytes the producer had to generate, the
+bytes the host read and the median latency per probe.
+--dump-dir takes real captures named package.txt (dumpsys package com.roblox.client),
+activity_processes.txt, window_windows.txt and window_displays.txt; without it a
+synthetic set of similar shape and size is generated.
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Rejoiner
+
+PACKAGE = Rejoiner.ROBLOX_PACKAGE
+CHUNK = 4096
+
+
+def produce(path, rate, count_file):
+    # Stand-in for dumpsys: writes the capture in chunks at rate MB/s and stops,
+    # like dumpsys on EPIPE, when the reader goes away. The running total is kept
+    # in count_file, since a streaming reader kills the producer outright.
+    written = 0
+    count = os.open(count_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        out = sys.stdout.buffer
+        for offset in range(0, len(data), CHUNK):
+            chunk = data[offset:offset + CHUNK]
+            written += len(chunk)
+            os.pwrite(count, b"%-12d" % written, 0)
+            out.write(chunk)
+            out.flush()
+            if rate:
+                time.sleep(CHUNK / (rate * 1024 * 1024))
+    except (BrokenPipeError, OSError):
+        # Keeps the interpreter's final flush from reporting the closed pipe.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        os.close(count)
+
+
+def synthetic_dumps(directory):
+    filler = "      " + "x" * 90
+    package = ["Activity Resolver Table:", "  Non-Data Actions:", "      android.intent.action.MAIN:",
+               f"        1a2b3c {PACKAGE}/com.roblox.client.startup.ActivitySplash filter 9f"]
+    package += [f"      android.intent.action.VIEW_{index}:\n        4d5e{index:02x} {PACKAGE}/.Deep{index} filter a{index}"
+                for index in range(60)]
+    package += ["", "Permissions:"] + [f"  Permission [{PACKAGE}.permission.P{index}] (c{index:x}):" for index in range(80)]
+    package += ["", "Packages:", f"  Package [{PACKAGE}] (5d3e1f):", "    userId=10123", "    pkg=Package{5d3e1f " + PACKAGE + "}",
+                "    versionCode=2650702 minSdk=24 targetSdk=34", "    versionName=2.650.702",
+                "    firstInstallTime=2025-01-10 09:12:44", "    lastUpdateTime=2026-10-01 18:02:13"]
+    package += ["    requested permissions:"] + [f"      android.permission.P{index}" for index in range(60)]
+    package += ["", "Queries:"] + [filler] * 80 + ["", "Dexopt state:"] + [filler] * 120 + ["", "Compiler stats:"] + [filler] * 200
+    processes = ["ACTIVITY MANAGER RUNNING PROCESSES (dumpsys activity processes)", "  All known processes:"]
+    for index in range(120):
+        name = PACKAGE if index == 60 else f"com.vendor.service{index}"
+        processes.append(f"  *APP* UID {10000 + index} ProcessRecord{{e1{index:x} {3000 + index}:{name}/u0a{index}}}")
+        processes += [f"    pid={3000 + index} starting=false", "    lastActivityTime=-12m3s"] + [filler] * 9
+        if index == 60:
+            processes.append("    notResponding=true")
+    processes += ["  PID mappings:"] + [f"    PID #{3000 + index}: ProcessRecord{{e1{index:x}}}" for index in range(120)]
+    processes += ["  Process LRU list (sorted by oom_adj, 120 total, non-act at 4, non-svc at 4):"] + [filler] * 600
+    windows = ["WINDOW MANAGER WINDOWS (dumpsys window windows)"]
+    for index in range(40):
+        windows.append(f"  Window #{index} Window{{b{index:x} u0 com.vendor.overlay{index}}}:")
+        windows += [filler] * 35
+    windows += [f"  mCurrentFocus=Window{{b0 u0 SurfaceView - {PACKAGE}/com.roblox.client.ActivityNativeMain}}"]
+    displays = ["WINDOW MANAGER DISPLAY CONTENTS (dumpsys window displays)", "  Display: mDisplayId=0"] + [filler] * 120
+    displays += [f"  mCurrentFocus=Window{{b0 u0 SurfaceView - {PACKAGE}/com.roblox.client.ActivityNativeMain}}",
+                 f"  mFocusedApp=ActivityRecord{{a1 u0 {PACKAGE}/com.roblox.client.ActivityNativeMain t12}}"]
+    for name, lines in (('package', package), ('activity_processes', processes),
+                        ('window_windows', windows), ('window_displays', displays)):
+        with open(os.path.join(directory, name + '.txt'), 'w') as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class Producer:
+    def __init__(self, dump_dir, work_dir, rate):
+        self.dump_dir = dump_dir
+        self.work_dir = work_dir
+        self.rate = rate
+
+    def command(self, name, variant=''):
+        count_file = os.path.join(self.work_dir, f"{name}.{variant}.count")
+        return count_file, " ".join(shlex.quote(part) for part in [
+            sys.executable, os.path.abspath(__file__), '--produce', os.path.join(self.dump_dir, name + '.txt'),
+            '--rate', str(self.rate), '--count-file', count_file])
+
+
+def probes():
+    package_fields = 'versionName=|versionCode=|firstInstallTime=|lastUpdateTime=|userId='
+    return [
+        ('package metadata', 'package',
+         ('grep', lambda cmd: Rejoiner.run_shell_command(f"{cmd} | grep -E '{package_fields}|{PACKAGE}/'", timeout=60)),
+         ('stream', lambda cmd: Rejoiner.stream_shell_command(cmd, Rejoiner.DumpScanner(Rejoiner.package_dump_fields(PACKAGE)), 60))),
+        ('main activity', 'package',
+         ('grep', lambda cmd: Rejoiner.run_shell_command(f"{cmd} | grep -A 5 'android.intent.action.MAIN'", timeout=60)),
+         ('stream', lambda cmd: Rejoiner.stream_shell_command(cmd, Rejoiner.DumpScanner([Rejoiner.DumpField(
+             'main', PACKAGE + r'/([A-Za-z0-9._$]+)', r'android\.intent\.action\.MAIN:')]), 60))),
+        ('anr records', 'activity_processes',
+         ('grep', lambda cmd: Rejoiner.run_shell_command(f"{cmd} | grep -E 'ProcessRecord\\{{|notResponding=true'", timeout=60)),
+         ('stream', lambda cmd: Rejoiner.stream_shell_command(cmd, Rejoiner.DumpScanner([Rejoiner.AnrField()]), 60)),
+         ('sed cut', lambda cmd: Rejoiner.run_shell_command(
+             f"{cmd} | sed '/^  PID mappings:/q' | grep -E 'ProcessRecord\\{{|notResponding=true'", timeout=60))),
+        ('focus', 'window_windows',
+         ('grep', lambda cmd: Rejoiner.run_shell_command(f"{cmd} | grep -E 'mCurrentFocus|Window #'", timeout=60)),
+         ('displays', lambda cmd: Rejoiner.run_shell_command(f"{cmd} | grep -E 'mCurrentFocus'", timeout=60),
+          'window_displays')),
+    ]
+
+
+def run(dump_dir, rate, repeat):
+    work = tempfile.mkdtemp(prefix='bench_dumpsys')
+    producer = Producer(dump_dir, work, rate)
+    results = []
+    try:
+        # Producer start-up (an interpreter here, dumpsys binding the service on a
+        # device) is in every row; the empty dump shows how much of it that is.
+        empty = os.path.join(dump_dir, 'empty.txt')
+        open(empty, 'w').close()
+        baseline = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            Rejoiner.run_shell_command(producer.command('empty', 'baseline')[1], timeout=60)
+            baseline.append(time.perf_counter() - started)
+        results.append({'probe': 'producer start', 'variant': '-', 'dump_bytes': 0, 'generated_bytes': 0,
+                        'host_bytes': 0, 'median_ms': statistics.median(baseline) * 1000, 'result': None})
+        for title, dump, *variants in probes():
+            for variant in variants:
+                name, call = variant[0], variant[1]
+                source = variant[2] if len(variant) > 2 else dump
+                count_file, command = producer.command(source, name)
+                times = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    output = call(command)
+                    times.append(time.perf_counter() - started)
+                with open(count_file) as f:
+                    generated = int(f.read().strip() or 0)
+                if isinstance(output, str):
+                    read = len(output)
+                else:
+                    read = None
+                results.append({'probe': title, 'variant': name, 'dump_bytes': os.path.getsize(os.path.join(dump_dir, source + '.txt')),
+                                'generated_bytes': generated, 'host_bytes': read, 'median_ms': statistics.median(times) * 1000,
+                                'result': output if isinstance(output, dict) else output.splitlines()[:2]})
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+        if os.path.exists(os.path.join(dump_dir, 'empty.txt')):
+            os.remove(os.path.join(dump_dir, 'empty.txt'))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming dumpsys probe benchmark")
+    parser.add_argument('--dump-dir')
+    parser.add_argument('--rate', type=float, default=1.0, help="producer speed in MB/s (0 = as fast as possible)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--produce', help=argparse.SUPPRESS)
+    parser.add_argument('--count-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.produce:
+        produce(args.produce, args.rate, args.count_file)
+        return
+    Rejoiner.configure_logging({'log_level': 'ERROR', 'log_file': None})
+    dump_dir = args.dump_dir or tempfile.mkdtemp(prefix='dumps')
+    try:
+        if not args.dump_dir:
+            synthetic_dumps(dump_dir)
+        results = run(dump_dir, args.rate, args.repeat)
+    finally:
+        if not args.dump_dir:
+            shutil.rmtree(dump_dir, ignore_errors=True)
+        Rejoiner.close_shell_sessions()
+    if args.json:
+        print(json.dumps(results, indent=2, default=str))
+        return
+    print(f"Producer rate {args.rate} MB/s, median of {args.repeat}")
+    print("%-17s %-9s %10s %12s %10s %10s" % ('probe', 'variant', 'dump KB', 'generated KB', 'host KB', 'median ms'))
+    for result in results:
+        host = "%10.1f" % (result['host_bytes'] / 1024) if result['host_bytes'] is not None else "%10s" % 'streamed'
+        print("%-17s %-9s %10.1f %12.1f %s %10.1f" % (result['probe'], result['variant'], result['dump_bytes'] / 1024,
+                                                     result['generated_bytes'] / 1024, host, result['median_ms']))
+
+
+if __name__ == '__main__':
+    main()
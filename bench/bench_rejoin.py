@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+End-to-end rejoin benchmark on a simulated device
+Usage: python bench/bench_rejoin.py [--scenario NAME ...] [--repeat N] [--json] [--verbose]
+Runs automation_loop against bench/sim_device.py and reports, per failure scenario,
+the initial join time, detection latency (fault -> instance leaves monitoring) and
+detection-to-rejoined latency (-> monitoring again).
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import Rejoiner
+from sim_device import SimulatedDevice
+
+GAME_ID = "920587237"
+SCENARIOS = {
+    'crash': {'fault': 'crash'},
+    'kick': {'fault': 'kick'},
+    'anr': {'fault': 'anr'},
+    'freeze': {'fault': 'freeze'},
+    'render_stall': {'fault': 'render_stall'},
+    'silent_restart': {'fault': 'silent_restart'},
+    'slow_join': {'fault': 'crash', 'latencies': {'focus': 3, 'join': 6}},
+    # The flow must have been seen by one check before it can be reported gone.
+    'net_drop': {'fault': 'net_drop', 'fault_after': 8, 'config': {'net_idle_timeout': 5}},
+    'memory_leak': {'fault': 'memory_leak', 'config': {'resource_sample_interval': 2, 'memory_limit_mb': 1536, 'resource_settle_minutes': 0}},
+}
+BENCH_CONFIG = {
+    'game_id': GAME_ID,
+    'check_delay': 5,
+    'force_kill_delay': 0,
+    'retry_delay': 2,
+    'cooldown_period': 5,
+    'adaptive_launch': False,
+    'metrics_port': 0,
+    'log_file': None,
+    'snapshot_ttl': 1,
+}
+
+
+def bench_config(tmp, verbose):
+    # Everything else falls back to the defaults Rejoiner applies through config.get().
+    config = dict(BENCH_CONFIG, log_level='INFO' if verbose else 'ERROR')
+    Rejoiner.package_cache = Rejoiner.PackageMetadataCache(os.path.join(tmp, 'package_cache.json'))
+    Rejoiner.launch_stats = Rejoiner.LaunchStats(os.path.join(tmp, 'launch_stats.json'))
+    return config
+
+
+def wait_for(predicate, timeout, interval=0.02):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(interval)
+    return None
+
+
+def run_scenario(name, spec, verbose=False, fault_after=2, timeout=120):
+    tmp = tempfile.mkdtemp(prefix='bench_rejoin')
+    device = SimulatedDevice(latencies=spec.get('latencies'))
+    Rejoiner.platform_info = {'type': 'simulated', 'name': 'Simulated Device', 'has_root': True,
+                              'use_adb': False, 'shell_prefix': '', 'special_commands': False}
+    Rejoiner.set_command_backend(device)
+    config = dict(bench_config(tmp, verbose), **spec.get('config', {}))
+    Rejoiner.configure_logging(config)
+    device.fault_after_join(spec['fault'], spec.get('fault_after', fault_after))
+    Rejoiner.supervisor = None
+    started = time.time()
+    stop = threading.Event()
+    thread = threading.Thread(target=Rejoiner.automation_loop, args=(config, stop), daemon=True)
+    thread.start()
+    result = {'scenario': name, 'fault': spec['fault']}
+    try:
+        instance = wait_for(lambda: Rejoiner.supervisor and Rejoiner.supervisor.instances[0], 10)
+        if not wait_for(lambda: instance.state == 'monitoring', timeout):
+            result['error'] = 'initial join never reached monitoring'
+            return result
+        result['initial_join'] = time.time() - started
+        if not wait_for(lambda: device.faults, timeout):
+            result['error'] = 'fault never fired'
+            return result
+        fault_time = device.faults[0]['time']
+        if not wait_for(lambda: instance.state != 'monitoring', timeout):
+            result['error'] = 'fault not detected'
+            return result
+        detected = time.time()
+        result['detected_as'] = instance.reason
+        if not wait_for(lambda: instance.state == 'monitoring', timeout):
+            result['error'] = 'did not rejoin'
+            return result
+        rejoined = time.time()
+        result['detect'] = detected - fault_time
+        result['rejoin'] = rejoined - detected
+        result['total'] = rejoined - fault_time
+        result['commands'] = sum(device.commands.values())
+        return result
+    finally:
+        stop.set()
+        thread.join(timeout=config['check_delay'] + 5)
+        Rejoiner.set_command_backend(None)
+        device.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejoin latency benchmark on a simulated device")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        for _ in range(args.repeat):
+            results.append(run_scenario(name, SCENARIOS[name], args.verbose))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print("%-15s %-15s %8s %8s %8s %8s  %s" % ('scenario', 'fault', 'join s', 'detect s', 'rejoin s', 'total s', 'detected as'))
+    for result in results:
+        if 'error' in result:
+            print("%-15s %-15s  %s" % (result['scenario'], result['fault'], result['error']))
+            continue
+        print("%-15s %-15s %8.2f %8.2f %8.2f %8.2f  %s" % (
+            result['scenario'], result['fault'], result['initial_join'], result['detect'],
+            result['rejoin'], result['total'], result['detected_as']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for Rejoiner.py
+Usage: python bench/bench_startup.py [--source Rejoiner.py] [--repeat N] [--top N] [--json]
+Compares the raw script (compiled from source on every run, as setup.sh used to
+ship it) with the zipapp from build_pyz.py. For each it reports the median wall
+time of a fresh interpreter to "first command" (--ctl ping against a missing
+socket: imports, argument parsing, one connect) and to "first probe" (import and
+one proc index lookup), plus the slowest imports from -X importtime.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import build_pyz
+
+PROBE = "import sys; sys.path.insert(0, sys.argv[1]); import Rejoiner; Rejoiner.get_proc_index().lookup(Rejoiner.ROBLOX_PACKAGE)"
+
+
+def timed(argv, env):
+    started = time.perf_counter()
+    subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - started
+
+
+def import_times(argv, env):
+    # -X importtime rows: "import time: self [us] | cumulative | name" (nesting by indent).
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + argv, env=env, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append({'module': name.strip(), 'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+                     'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return rows
+
+
+def measure(name, target, socket_path, repeat, top, env):
+    commands = {
+        'first_command': [sys.executable, target, '--ctl', 'ping', '--socket', socket_path],
+        'first_probe': [sys.executable, '-c', PROBE, os.path.dirname(target) if target.endswith('.py') else target],
+    }
+    result = {'variant': name}
+    for key, argv in commands.items():
+        result[key] = statistics.median(timed(argv, env) for _ in range(repeat))
+    rows = import_times(commands['first_probe'][1:], env)
+    rejoiner = next((row for row in rows if row['module'] == 'Rejoiner'), None)
+    result['import_rejoiner_ms'] = rejoiner['cumulative_ms'] if rejoiner else None
+    result['slowest_imports'] = sorted(rows, key=lambda row: row['self_ms'], reverse=True)[:top]
+    return result
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Rejoiner cold-start benchmark")
+    parser.add_argument('--source', default=os.path.join(here, '..', 'Rejoiner.py'))
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=8)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp(prefix='bench_startup')
+    try:
+        script_dir = os.path.join(tmp, 'script')
+        os.makedirs(script_dir)
+        script = shutil.copy(args.source, os.path.join(script_dir, 'Rejoiner.py'))
+        pyz = build_pyz.build(args.source, os.path.join(tmp, 'Rejoiner.pyz'))
+        # No __pycache__ for the script, as on /sdcard where it is run directly.
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+        socket_path = os.path.join(tmp, 'missing.sock')
+        results = [measure('script', script, socket_path, args.repeat, args.top, env),
+                   measure('zipapp', pyz, socket_path, args.repeat, args.top, env)]
+        baseline = statistics.median(timed([sys.executable, '-c', 'pass'], env) for _ in range(args.repeat))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if args.json:
+        print(json.dumps({'interpreter': baseline, 'results': results}, indent=2))
+        return
+    print(f"Python {sys.version.split()[0]}, bare interpreter start {baseline * 1000:.0f} ms (median of {args.repeat})")
+    print("%-8s %14s %14s %16s" % ('variant', 'first cmd ms', 'first probe ms', 'import Rejoiner'))
+    for result in results:
+        print("%-8s %14.0f %14.0f %13.0f ms" % (result['variant'], result['first_command'] * 1000,
+                                                result['first_probe'] * 1000, result['import_rejoiner_ms'] or 0))
+    for result in results:
+        print(f"\nSlowest imports ({result['variant']}, self time):")
+        for row in result['slowest_imports']:
+            print("  %8.1f ms %8.1f ms cumulative  %s%s" % (row['self_ms'], row['cumulative_ms'], '  ' * row['depth'], row['module']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for adb, for exercising fleet mode without devices
+Usage: Rejoiner.py --fleet --adb bench/fake_adb.py
+Serials come from FAKE_ADB_SERIALS (space separated). "shell" runs the host's sh,
+so sessions, framing, worker processes and the status table can be tested; the
+Android tools themselves (dumpsys, am, ...) are of course missing.
+"""
+
+import os
+import sys
+
+SERIALS = os.environ.get('FAKE_ADB_SERIALS', 'emulator-5554 emulator-5556').split()
+
+
+def main(argv):
+    serial = os.environ.get('ANDROID_SERIAL')
+    if len(argv) >= 2 and argv[0] == '-s':
+        serial, argv = argv[1], argv[2:]
+    if not argv:
+        sys.exit("usage: fake_adb.py [-s SERIAL] devices|get-state|shell [command]")
+    if argv[0] == 'devices':
+        print("List of devices attached")
+        for name in SERIALS:
+            print(f"{name}\tdevice")
+        return
+    if serial not in SERIALS:
+        sys.stderr.write(f"error: device '{serial}' not found\n")
+        sys.exit(1)
+    if argv[0] == 'get-state':
+        print("device")
+        return
+    if argv[0] == 'shell':
+        os.environ['ANDROID_SERIAL'] = serial
+        command = argv[1:]
+        if command and command[0] == 'su':
+            command = command[1:]
+        if command:
+            os.execvp('sh', ['sh', '-c', " ".join(command)])
+        os.execvp('sh', ['sh'])
+    sys.stderr.write(f"fake_adb: unsupported command {argv[0]}\n")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Roblox users and presence web APIs
+Usage: python bench/presence_stub.py [--port 8765] [--rate-limit N] [--user NAME=ID:PLACE ...]
+Point Rejoiner at it with "presence_check": true and
+"presence_base_url": "http://127.0.0.1:8765". PLACE 0 reports the user online
+but not in a game. With --rate-limit, every Nth request is answered 429 with a
+Retry-After header. Request counts are printed on exit.
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PresenceStub:
+    def __init__(self, users=None, rate_limit=0, retry_after=2):
+        # users: {name: {'id': int, 'place_id': int}}
+        self.users = dict(users or {})
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.batch_sizes = []
+
+    def set_place(self, name, place_id):
+        with self.lock:
+            self.users[name]['place_id'] = place_id
+
+    def handle(self, path, body):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            total = sum(self.requests.values())
+            if self.rate_limit and total % self.rate_limit == 0:
+                return 429, {'errors': [{'code': 0, 'message': 'TooManyRequests'}]}
+            if path == '/v1/usernames/users':
+                wanted = {name.lower(): name for name in body.get('usernames', [])}
+                return 200, {'data': [{'requestedUsername': wanted[name.lower()], 'name': name, 'displayName': name,
+                                       'id': user['id'], 'hasVerifiedBadge': False}
+                                      for name, user in self.users.items() if name.lower() in wanted]}
+            if path == '/v1/presence/users':
+                user_ids = body.get('userIds', [])
+                self.batch_sizes.append(len(user_ids))
+                by_id = {user['id']: user for user in self.users.values()}
+                presences = []
+                for user_id in user_ids:
+                    user = by_id.get(user_id)
+                    place_id = user and user.get('place_id')
+                    presences.append({'userPresenceType': 2 if place_id else (1 if user else 0),
+                                      'lastLocation': 'Game' if place_id else 'Website',
+                                      'placeId': place_id or None, 'rootPlaceId': place_id or None,
+                                      'gameId': '5f0c2a1e' if place_id else None, 'universeId': None,
+                                      'userId': user_id})
+                return 200, {'userPresences': presences}
+        return 404, {'errors': [{'code': 0, 'message': 'NotFound'}]}
+
+    def serve(self, port=0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    body = {}
+                status, payload = stub.handle(self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if status == 429:
+                    self.send_header('Retry-After', str(stub.retry_after))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def parse_user(text):
+    name, _, rest = text.partition('=')
+    user_id, _, place_id = rest.partition(':')
+    return name, {'id': int(user_id), 'place_id': int(place_id or 0)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roblox presence API stub")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate-limit', type=int, default=0)
+    parser.add_argument('--user', action='append', default=[], type=parse_user, help="NAME=ID:PLACE")
+    args = parser.parse_args()
+    stub = PresenceStub(dict(args.user), args.rate_limit)
+    server = stub.serve(args.port)
+    print(f"Presence stub on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps(stub.requests, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+"""
+Simulated Android device for Rejoiner.py
+Answers the shell commands Rejoiner issues (ps, pidof, dumpsys, logcat, am, input,
+pm/cmd package, getprop, stat, kill) from a scripted model of the Roblox client,
+keeps a fake /proc tree in a temporary directory and streams logcat through a pipe.
+Usage: Rejoiner.set_command_backend(SimulatedDevice())
+"""
+
+import heapq
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROBLOX_PACKAGE = "com.roblox.client"
+SPLASH_ACTIVITY = "com.roblox.client.startup.ActivitySplash"
+GAME_ACTIVITY = "com.roblox.client.ActivityNativeMain"
+SYSTEM_PID = 1000
+
+# Seconds between launch stages: am start -> process, process -> activity resumed,
+# place requested -> game surface focused, focused -> join line in logcat.
+DEFAULT_LATENCIES = {'process': 0.3, 'resume': 0.4, 'focus': 0.8, 'join': 0.6, 'redirect': 1.0}
+# Cost of one command round-trip, keyed by the first program in the command.
+DEFAULT_COMMAND_LATENCY = {'dumpsys': 0.04, 'am': 0.08, 'logcat': 0.03, 'pm': 0.05, 'cmd': 0.05}
+
+FAULTS = ('crash', 'kick', 'anr', 'freeze', 'render_stall', 'silent_restart', 'memory_leak', 'net_drop')
+MEM_TOTAL_KB = 4 * 1024 * 1024
+SIM_CPUS = 8
+BASE_RSS_KB = 204800
+# Growth of a leaking client, and the RSS at which the low-memory killer takes it.
+LEAK_KB_PER_SECOND = 24 * 1024
+LMK_RSS_KB = 2 * 1024 * 1024
+GAME_SERVER = ('128.116.50.10', 56221)
+NET_HEADER = ("  sl  local_address                         remote_address                        st tx_queue rx_queue "
+              "tr tm->when retrnsmt   uid  timeout inode ref pointer drops")
+FRAME_NS = 16666666
+
+
+class SimulatedApp:
+    def __init__(self, package, uid):
+        self.package = package
+        self.uid = uid
+        self.pids = []
+        self.stage = 'stopped'
+        self.place_id = None
+        self.anr = False
+        self.pending = []
+        self.launched_at = 0
+        self.frames = 0
+        self.rendering_since = None
+        self.rss = BASE_RSS_KB
+        self.leaking_since = None
+        self.cpu_ticks = 0
+        self.game_flow = False
+
+    def render(self, now, rendering):
+        # Frames accumulate at 60 fps while the game surface is up and not stalled.
+        if self.rendering_since is not None:
+            self.frames += int((now - self.rendering_since) * 60)
+        self.rendering_since = now if rendering else None
+
+    @property
+    def pid(self):
+        return self.pids[0] if self.pids else None
+
+    def activity(self):
+        if self.stage in ('focused', 'joined'):
+            return f"{self.package}/{GAME_ACTIVITY}"
+        return f"{self.package}/{SPLASH_ACTIVITY}"
+
+
+class SimulatedDevice:
+    def __init__(self, packages=(ROBLOX_PACKAGE,), latencies=None, command_latency=None, tick=0.02):
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.command_latency = {**DEFAULT_COMMAND_LATENCY, **(command_latency or {})}
+        self.lock = threading.RLock()
+        self.apps = {package: SimulatedApp(package, 10123 + index) for index, package in enumerate(packages)}
+        self.proc_root = tempfile.mkdtemp(prefix='simproc')
+        self.boot = time.time()
+        self.next_pid = 4000
+        self.log_lines = []
+        self.streams = []
+        self.scheduled = []
+        self.sequence = 0
+        self.armed = []
+        self.faults = []
+        self.joins = []
+        self.commands = {}
+        self.foreground = None
+        self.running = True
+        self._write_proc(SYSTEM_PID, 'system_server')
+        os.makedirs(os.path.join(self.proc_root, 'net'))
+        os.makedirs(os.path.join(self.proc_root, 'pressure'))
+        self._write_net()
+        with open(os.path.join(self.proc_root, 'stat'), 'w') as f:
+            f.write("cpu  0 0 0 0 0 0 0 0 0 0\n" + "".join(f"cpu{index} 0 0 0 0 0 0 0 0 0 0\n" for index in range(SIM_CPUS)))
+        self.set_pressure()
+        self.ticker = threading.Thread(target=self._tick_loop, args=(tick,), daemon=True)
+        self.ticker.start()
+
+    # Scripting
+    def schedule(self, delay, kind, package=ROBLOX_PACKAGE):
+        with self.lock:
+            self.sequence += 1
+            heapq.heappush(self.scheduled, (time.time() + delay, self.sequence, kind, package))
+
+    def fault_after_join(self, kind, delay, package=ROBLOX_PACKAGE):
+        # Fires once, delay seconds after the next successful join of package.
+        with self.lock:
+            self.armed.append((kind, delay, package))
+
+    def inject(self, kind, package=ROBLOX_PACKAGE):
+        with self.lock:
+            app = self.apps[package]
+            if kind not in FAULTS:
+                raise ValueError(f"unknown fault {kind}")
+            self.faults.append({'kind': kind, 'package': package, 'time': time.time()})
+            if kind == 'crash':
+                if app.pid:
+                    self._log(app.pid, 'E', 'AndroidRuntime', 'FATAL EXCEPTION: GLThread 1204')
+                    self._log(SYSTEM_PID, 'I', 'ActivityManager', f"Process {package} (pid {app.pid}) has died")
+                self._stop(app)
+            elif kind == 'kick':
+                if app.pid:
+                    self._log(app.pid, 'E', 'roblox', 'Disconnected from game server: error code 277')
+            elif kind == 'anr':
+                app.anr = True
+                self._log(SYSTEM_PID, 'E', 'ActivityManager', f"ANR in {package} ({package}/{GAME_ACTIVITY})")
+            elif kind == 'freeze':
+                # No log line: only the process record shows it.
+                app.anr = True
+            elif kind == 'render_stall':
+                # Render thread hung: no ANR, no log line, frames just stop.
+                app.render(time.time(), False)
+            elif kind == 'silent_restart':
+                self._kill_pids(app)
+                self._spawn(app)
+            elif kind == 'net_drop':
+                # Connection to the game server lost, client left on its disconnect screen with no log line.
+                app.game_flow = False
+                self._write_net()
+            elif kind == 'memory_leak':
+                # Nothing visible until the low-memory killer steps in, only RSS creeping up.
+                app.leaking_since = time.time()
+
+    def set_pressure(self, load=0.5, mem_available_kb=MEM_TOTAL_KB // 2, psi=0.0, temp=45.0):
+        # Device-wide load as Rejoiner's admission control reads it: loadavg over all
+        # CPUs, MemAvailable, PSI some avg10 for cpu/memory/io and one thermal zone.
+        with open(os.path.join(self.proc_root, 'loadavg'), 'w') as f:
+            f.write(f"{load * SIM_CPUS:.2f} {load * SIM_CPUS:.2f} {load * SIM_CPUS:.2f} 2/812 {self.next_pid}\n")
+        with open(os.path.join(self.proc_root, 'meminfo'), 'w') as f:
+            f.write(f"MemTotal:       {MEM_TOTAL_KB} kB\nMemAvailable:   {mem_available_kb} kB\n")
+        for name in ('cpu', 'memory', 'io'):
+            with open(os.path.join(self.proc_root, 'pressure', name), 'w') as f:
+                f.write(f"some avg10={psi:.2f} avg60={psi:.2f} avg300={psi:.2f} total=0\n"
+                        f"full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n")
+        with open(os.path.join(self.proc_root, 'thermal'), 'w') as f:
+            f.write(f"{int(temp * 1000)}\n")
+
+    def close(self):
+        self.running = False
+        with self.lock:
+            for fd in self.streams:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            self.streams = []
+        shutil.rmtree(self.proc_root, ignore_errors=True)
+
+    # Backend interface
+    def run(self, command, timeout=10):
+        program = command.strip().split(' ', 1)[0].strip("'")
+        self.commands[program] = self.commands.get(program, 0) + 1
+        delay = max((cost for name, cost in self.command_latency.items() if re.search(rf"\b{name}\b", command)), default=0.005)
+        if delay > timeout:
+            time.sleep(timeout)
+            raise subprocess.TimeoutExpired(command, timeout)
+        time.sleep(delay)
+        with self.lock:
+            self._tick()
+            output = self._execute_script(command)
+        return subprocess.CompletedProcess(['sim', command], 0, output, '')
+
+    def logcat_stream(self, command):
+        read_fd, write_fd = os.pipe()
+        with self.lock:
+            match = re.search(r"-T '([^']+)'", command)
+            if match:
+                backlog = [line for line in self.log_lines if line[:18] >= match.group(1)]
+                if backlog:
+                    os.write(write_fd, ("\n".join(backlog) + "\n").encode())
+            self.streams.append(write_fd)
+        return os.fdopen(read_fd, 'rb')
+
+    # Model
+    def _tick_loop(self, interval):
+        while self.running:
+            with self.lock:
+                self._tick()
+            time.sleep(interval)
+
+    def _tick(self):
+        now = time.time()
+        while self.scheduled and self.scheduled[0][0] <= now:
+            _, _, kind, package = heapq.heappop(self.scheduled)
+            self.inject(kind, package)
+        for app in self.apps.values():
+            while app.pending and app.pending[0][0] <= now:
+                _, action = app.pending.pop(0)
+                self._apply(app, action)
+            if app.leaking_since is not None and app.pid:
+                self._grow(app, now)
+
+    def _grow(self, app, now):
+        rss = BASE_RSS_KB + int((now - app.leaking_since) * LEAK_KB_PER_SECOND)
+        if rss >= LMK_RSS_KB:
+            self._log(SYSTEM_PID, 'I', 'lowmemorykiller', f"Kill '{app.package}' ({app.pid}), rss {rss}kB")
+            self._log(SYSTEM_PID, 'I', 'ActivityManager', f"Process {app.package} (pid {app.pid}) has died")
+            self._stop(app)
+            return
+        if rss - app.rss >= 1024:
+            app.rss = rss
+            app.cpu_ticks = int((now - app.launched_at) * 40)
+            self._write_proc(app.pid, app.package)
+
+    def _apply(self, app, action):
+        if action == 'spawn':
+            self._spawn(app)
+            app.stage = 'starting'
+        elif action == 'resume':
+            app.stage = 'resumed'
+            self.foreground = app.package
+        elif action == 'focus':
+            app.stage = 'focused'
+            app.render(time.time(), True)
+        elif action == 'join':
+            app.stage = 'joined'
+            self._log(app.pid, 'I', 'roblox', f"Joining game placeId={app.place_id} jobId=5f0c2a1e")
+            self.joins.append({'package': app.package, 'place_id': app.place_id, 'time': time.time()})
+            app.game_flow = True
+            self._write_net()
+            for armed in [armed for armed in self.armed if armed[2] == app.package]:
+                self.armed.remove(armed)
+                self.schedule(armed[1], armed[0], armed[2])
+
+    def _start(self, app, place_id=None, extra_delay=0):
+        now = time.time() + extra_delay
+        app.anr = False
+        if place_id:
+            app.place_id = place_id
+        if app.stage == 'stopped':
+            steps = [('spawn', self.latencies['process']), ('resume', self.latencies['resume'])]
+        else:
+            steps = [('resume', 0.05)]
+            app.stage = 'resumed' if app.pids else app.stage
+        if place_id:
+            steps += [('focus', self.latencies['focus']), ('join', self.latencies['join'])]
+        app.pending = []
+        for action, delay in steps:
+            now += delay
+            app.pending.append((now, action))
+        app.launched_at = time.time()
+
+    def _stop(self, app):
+        self._kill_pids(app)
+        app.leaking_since = None
+        app.rss = BASE_RSS_KB
+        app.game_flow = False
+        self._write_net()
+        app.render(time.time(), False)
+        app.stage = 'stopped'
+        app.pending = []
+        app.anr = False
+        if self.foreground == app.package:
+            self.foreground = None
+
+    def _spawn(self, app):
+        for suffix in ('', ':remote'):
+            pid = self.next_pid
+            self.next_pid += 1 + (pid % 7)
+            self._write_proc(pid, app.package + suffix)
+            app.pids.append(pid)
+        if app.stage == 'stopped':
+            app.stage = 'starting'
+        self._write_net()
+
+    def _kill_pids(self, app):
+        for pid in app.pids:
+            shutil.rmtree(os.path.join(self.proc_root, str(pid)), ignore_errors=True)
+        app.pids = []
+        app.game_flow = False
+
+    def _write_proc(self, pid, name):
+        path = os.path.join(self.proc_root, str(pid))
+        os.makedirs(path, exist_ok=True)
+        app = self.apps.get(name)
+        rss, cpu = (app.rss, app.cpu_ticks) if app else (BASE_RSS_KB, 0)
+        starttime = int((time.time() - self.boot) * 100) + pid
+        if app and os.path.exists(os.path.join(path, 'stat')):
+            with open(os.path.join(path, 'stat')) as f:
+                starttime = f.read().rsplit(') ', 1)[1].split()[19]
+        fields = (['S', '1', str(pid), '0', '0', '-1', '4194624', '0', '0', '0', '0', str(cpu), '0', '0', '0', '20', '0', '42', '0']
+                  + [str(starttime), '2147483648', str(rss // 4)])
+        with open(os.path.join(path, 'cmdline'), 'wb') as f:
+            f.write(name.encode() + b'\0')
+        with open(os.path.join(path, 'stat'), 'w') as f:
+            f.write(f"{pid} ({name[:15]}) " + " ".join(fields) + "\n")
+        with open(os.path.join(path, 'status'), 'w') as f:
+            f.write(f"Name:\t{name[:15]}\nPid:\t{pid}\nVmRSS:\t{rss:>8} kB\nThreads:\t42\n")
+        with open(os.path.join(path, 'smaps_rollup'), 'w') as f:
+            f.write(f"Rss:            {rss} kB\nPss:            {rss * 9 // 10} kB\n")
+
+    @staticmethod
+    def _net_address(host, port, ipv6):
+        word = "".join("%02X" % int(part) for part in reversed(host.split('.')))
+        return ("0000000000000000FFFF0000" + word if ipv6 else word) + ":%04X" % port
+
+    def _write_net(self):
+        # Per running app: an unconnected UDP socket, a connected DNS socket, an
+        # established TCP connection to the web API and, while in a game, the
+        # game-server flow as a v4-mapped udp6 socket.
+        rows = {'udp': [], 'udp6': [], 'tcp': [], 'tcp6': []}
+        for index, app in enumerate(self.apps.values()):
+            if not app.pids:
+                continue
+            local_port = 40000 + index * 10
+            sockets = [('udp', ('0.0.0.0', local_port), ('0.0.0.0', 0), '07'),
+                       ('udp', ('10.0.2.15', local_port + 3), ('10.0.2.3', 53), '01'),
+                       ('tcp', ('10.0.2.15', local_port + 1), ('23.44.14.20', 443), '01')]
+            if app.game_flow:
+                sockets.append(('udp6', ('10.0.2.15', local_port + 2), GAME_SERVER, '01'))
+            for table, local, remote, state in sockets:
+                ipv6 = table.endswith('6')
+                rows[table].append("%5d: %s %s %s 00000000:00000000 00:00000000 00000000 %5d        0 %d 2 0000000000000000 0" % (
+                    len(rows[table]), self._net_address(*local, ipv6), self._net_address(*remote, ipv6), state,
+                    app.uid, 90000 + local[1]))
+        for table, lines in rows.items():
+            with open(os.path.join(self.proc_root, 'net', table), 'w') as f:
+                f.write("\n".join([NET_HEADER] + lines) + "\n")
+
+    def _log(self, pid, level, tag, message):
+        now = datetime.now()
+        line = "%s.%03d %5d %5d %s %-8s: %s" % (now.strftime('%m-%d %H:%M:%S'), now.microsecond // 1000,
+                                                pid or 0, pid or 0, level, tag, message)
+        self.log_lines.append(line)
+        del self.log_lines[:-20000]
+        for fd in list(self.streams):
+            try:
+                os.write(fd, (line + "\n").encode())
+            except OSError:
+                self.streams.remove(fd)
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def _app_for(self, text):
+        for package in sorted(self.apps, key=len, reverse=True):
+            if package in text:
+                return self.apps[package]
+        return None
+
+    # Commands
+    def _execute_script(self, script):
+        output = []
+        for line in script.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('for ') and 'pm path' in line:
+                app = self._app_for(line)
+                if app:
+                    apk = f"/data/app/~~sim==/{app.package}-1/base.apk"
+                    output.append(f"{int(self.boot)} {apk}")
+                continue
+            for statement in line.split(';'):
+                statement = statement.strip()
+                if statement:
+                    result = self._pipeline(statement)
+                    if result:
+                        output.append(result)
+        return "\n".join(output) + ("\n" if output else "")
+
+    def _pipeline(self, statement):
+        stages = statement.split(' | ')
+        text = self._command(stages[0])
+        for stage in stages[1:]:
+            text = self._filter(stage, text)
+        return text.rstrip('\n')
+
+    def _filter(self, stage, text):
+        args = shlex.split(stage)
+        lines = text.splitlines()
+        if args[0] == 'grep':
+            flags = re.IGNORECASE if any(arg.startswith('-') and 'i' in arg for arg in args[1:]) else 0
+            after = int(args[args.index('-A') + 1]) if '-A' in args else 0
+            pattern = [arg for index, arg in enumerate(args[1:], 1)
+                       if not arg.startswith('-') and args[index - 1] != '-A'][0]
+            if not any(arg.startswith('-') and 'E' in arg for arg in args[1:]):
+                pattern = re.escape(pattern)
+            regex = re.compile(pattern.replace('\\{', '{'), flags)
+            kept = []
+            remaining = 0
+            for line in lines:
+                if regex.search(line):
+                    kept.append(line)
+                    remaining = after
+                elif remaining:
+                    kept.append(line)
+                    remaining -= 1
+            return "\n".join(kept)
+        if args[0] == 'sed' and len(args) > 1 and args[1].startswith('/') and args[1].endswith('/q'):
+            regex = re.compile(args[1][1:-2])
+            kept = []
+            for line in lines:
+                kept.append(line)
+                if regex.search(line):
+                    break
+            return "\n".join(kept)
+        if args[0] == 'head':
+            count = int(args[-1].lstrip('-n')) if len(args) > 1 else 10
+            return "\n".join(lines[:count])
+        if args[0] == 'wc':
+            return str(len(lines))
+        return text
+
+    def _command(self, statement):
+        statement = re.sub(r'\s*2>\s*/dev/null', '', statement)
+        try:
+            args = shlex.split(statement)
+        except ValueError:
+            return ''
+        if not args:
+            return ''
+        program = args[0]
+        if program == 'echo':
+            return " ".join(args[1:])
+        if program == 'dumpsys':
+            return self._dumpsys(args[1:])
+        if program == 'logcat':
+            return self._logcat(args[1:])
+        if program == 'am':
+            return self._am(args[1:])
+        if program == 'pidof':
+            app = self.apps.get(args[-1])
+            return " ".join(str(pid) for pid in app.pids[:1]) if app else ''
+        if program == 'ps':
+            rows = ["USER           PID  PPID     VSZ    RSS WCHAN            ADDR S NAME"]
+            for app in self.apps.values():
+                for index, pid in enumerate(app.pids):
+                    name = app.package + ('' if index == 0 else ':remote')
+                    rows.append(f"u0_a{app.uid - 10000:<8} {pid:5d}   1 2097152 204800 0                   0 S {name}")
+            return "\n".join(rows)
+        if program in ('killall', 'pkill', 'kill'):
+            return self._kill(program, args[1:])
+        if program == 'cat':
+            texts = []
+            for path in args[1:]:
+                if path.startswith('/proc/'):
+                    try:
+                        with open(os.path.join(self.proc_root, path[len('/proc/'):])) as f:
+                            texts.append(f.read().rstrip('\n'))
+                    except OSError:
+                        pass
+            return "\n".join(texts)
+        if program == 'input':
+            return ''
+        if program == 'getprop':
+            props = {'ro.build.version.release': '12', 'ro.build.version.sdk': '31', 'ro.product.model': 'Simulated Device',
+                     'ro.build.fingerprint': 'sim/sim/sim:12/SIM/1:user/release-keys'}
+            return props.get(args[1], '') if len(args) > 1 else "\n".join(f"[{k}]: [{v}]" for k, v in props.items())
+        if program == 'date':
+            now = datetime.now()
+            return now.strftime(args[1].lstrip('+')) if len(args) > 1 else now.ctime()
+        if program == 'stat':
+            path = args[-1]
+            mtime = str(int(self.boot))
+            return f"{mtime} {path}" if '%n' in statement else mtime
+        if program == 'pm' and len(args) > 2 and args[1] == 'path':
+            app = self.apps.get(args[2])
+            return f"package:/data/app/~~sim==/{app.package}-1/base.apk" if app else ''
+        if program == 'cmd' and 'resolve-activity' in args:
+            app = self.apps.get(args[-1])
+            return f"priority=0 preferredOrder=0 match=0x108000\n{app.package}/{SPLASH_ACTIVITY}" if app else ''
+        return ''
+
+    def _dumpsys(self, args):
+        service = args[0] if args else ''
+        section = args[1] if len(args) > 1 else ''
+        if service == 'activity' and section == 'processes':
+            lines = ["ACTIVITY MANAGER RUNNING PROCESSES (dumpsys activity processes)", "  All known processes:"]
+            for app in self.apps.values():
+                if app.pid:
+                    lines.append(f"  *APP* UID {app.uid} ProcessRecord{{e1{app.pid:x} {app.pid}:{app.package}/u0a{app.uid - 10000}}}")
+                    lines.append(f"    pid={app.pid} starting=false")
+                    if app.anr:
+                        lines.append("    notResponding=true")
+            lines += ["  PID mappings:", f"    PID #{SYSTEM_PID}: system_server", "  Process LRU list (sorted by oom_adj):"]
+            return "\n".join(lines)
+        if service == 'activity':
+            lines = []
+            for app in self.apps.values():
+                if app.stage in ('resumed', 'focused', 'joined'):
+                    lines.append(f"  * ActivityRecord{{a{app.pid:x} u0 {app.activity()} t{app.uid % 100}}}")
+                    if app.package == self.foreground:
+                        lines.append(f"    mResumedActivity: ActivityRecord{{a{app.pid:x} u0 {app.activity()} t{app.uid % 100}}}")
+            return "\n".join(lines)
+        if service == 'window':
+            lines = []
+            focus = None
+            for index, app in enumerate(self.apps.values()):
+                if app.stage not in ('resumed', 'focused', 'joined'):
+                    continue
+                surface = 'SurfaceView - ' if app.stage in ('focused', 'joined') else ''
+                window = f"Window{{b{index} u0 {surface}{app.activity()}}}"
+                lines.append(f"  Window #{index + 2} {window}:")
+                if app.package == self.foreground:
+                    focus = window
+            current = f"  mCurrentFocus={focus or 'Window{c0 u0 com.android.launcher3/.Launcher}'}"
+            if section == 'displays':
+                return "\n".join(["WINDOW MANAGER DISPLAY CONTENTS (dumpsys window displays)", "  Display: mDisplayId=0", current])
+            lines.insert(0, "  Window #1 Window{a0 u0 NavigationBar0}:")
+            lines.append(current)
+            return "\n".join(lines)
+        if service == 'gfxinfo':
+            app = self.apps.get(args[1]) if len(args) > 1 else None
+            if not app or not app.pid:
+                return ''
+            # The game draws into a SurfaceView, so HWUI only counts the splash/UI frames.
+            return f"** Graphics info for pid {app.pid} [{app.package}] **\n\nTotal frames rendered: 184\nJanky frames: 12 (6.52%)"
+        if service == 'SurfaceFlinger':
+            return self._surfaceflinger(args[1:])
+        if service == 'package':
+            app = self.apps.get(args[-1])
+            if not app:
+                return ''
+            return "\n".join([
+                "Activity Resolver Table:",
+                "  Non-Data Actions:",
+                "      android.intent.action.MAIN:",
+                f"        1a2b3c {app.package}/{SPLASH_ACTIVITY} filter 9f",
+                "Packages:",
+                f"  Package [{app.package}] (5d3e1f):",
+                f"    userId={app.uid}",
+                "    versionCode=2650702 minSdk=24 targetSdk=34",
+                "    versionName=2.650.702",
+                "    firstInstallTime=2025-01-10 09:12:44",
+                "    lastUpdateTime=2026-10-01 18:02:13",
+                "",
+                "Dexopt state:",
+                f"  [{app.package}]",
+                "    path: /data/app/~~sim==/com.roblox.client-1/base.apk",
+            ])
+        return ''
+
+    def _surfaceflinger(self, args):
+        if '--list' in args:
+            layers = ["com.android.systemui.ImageWallpaper#0", "NavigationBar0#0"]
+            for app in self.apps.values():
+                if app.stage in ('focused', 'joined'):
+                    layers.append(f"SurfaceView - {app.package}/{GAME_ACTIVITY}#0")
+            return "\n".join(layers)
+        if '--latency' in args:
+            layer = args[args.index('--latency') + 1] if len(args) > args.index('--latency') + 1 else ''
+            app = self._app_for(layer)
+            if not app or app.stage not in ('focused', 'joined'):
+                return ''
+            now = time.time()
+            frames = app.frames + (int((now - app.rendering_since) * 60) if app.rendering_since else 0)
+            last = int(self.boot * 1e9) + frames * FRAME_NS
+            rows = [str(FRAME_NS)]
+            for index in range(126, -1, -1):
+                stamp = last - index * FRAME_NS
+                rows.append(f"{stamp}\t{stamp + 2000000}\t{stamp + 1000000}")
+            return "\n".join(rows)
+        return ''
+
+    def _logcat(self, args):
+        if '-d' not in args:
+            return ''
+        since = args[args.index('-T') + 1] if '-T' in args else None
+        lines = self.log_lines
+        if since:
+            lines = [line for line in lines if line[:18] >= since]
+        return "\n".join(lines)
+
+    def _am(self, args):
+        if not args:
+            return ''
+        if args[0] == 'force-stop' and len(args) > 1:
+            app = self.apps.get(args[1])
+            if app:
+                self._log(SYSTEM_PID, 'I', 'ActivityManager', f"Force stopping {app.package} appid={app.uid} user=0: from pid 4242")
+                self._stop(app)
+            return ''
+        if args[0] != 'start':
+            return ''
+        url = args[args.index('-d') + 1] if '-d' in args else ''
+        component = args[args.index('-n') + 1] if '-n' in args else ''
+        target = args[args.index('-p') + 1] if '-p' in args else (component.split('/', 1)[0] or args[-1])
+        app = self.apps.get(target)
+        extra = 0
+        if app is None and 'roblox.com/games/' in url:
+            # Browser redirect: the web page hands the place over to the first client.
+            app = next(iter(self.apps.values()))
+            extra = self.latencies['redirect']
+        if app is None:
+            return "Error: Activity not started, unable to resolve Intent"
+        match = re.search(r'(?:placeId=|games/)(\d+)', url)
+        place_id = match.group(1) if match else None
+        self._log(SYSTEM_PID, 'I', 'ActivityManager',
+                  f"START u0 {{act=android.intent.action.VIEW dat={url or component} pkg={app.package}}} from uid 2000")
+        self._start(app, place_id, extra)
+        return f"Starting: Intent {{ dat={url or component} pkg={app.package} }}"
+
+    def _kill(self, program, args):
+        targets = [arg for arg in args if not arg.startswith('-')]
+        for app in self.apps.values():
+            if program == 'killall' and app.package in targets:
+                self._stop(app)
+            elif program == 'pkill' and targets and re.search(targets[-1].replace('[:space:]', r'\s'), app.package):
+                self._stop(app)
+            elif program == 'kill':
+                pids = {int(target) for target in targets if target.isdigit()}
+                if pids & set(app.pids):
+                    app.pids = [pid for pid in app.pids if pid not in pids]
+                    for pid in pids:
+                        shutil.rmtree(os.path.join(self.proc_root, str(pid)), ignore_errors=True)
+                    if not app.pids:
+                        self._stop(app)
+        return ''
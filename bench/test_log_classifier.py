@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the log classifier's matching rules
+Usage: python -m pytest bench/test_log_classifier.py  (or python bench/test_log_classifier.py)
+Patterns match whole words only, so near misses the old substring check reported
+('kickstart', 'banner') are not errors; exception class names still count as
+crashes. Also checks that the windowed blob search, the chunk scan and the
+per-line path agree.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import Rejoiner
+from bench_classifier import synthetic_log
+
+CLASSIFIER = Rejoiner.LOG_ERROR_CLASSIFIER
+
+
+class LogClassifierTest(unittest.TestCase):
+    def test_whole_words(self):
+        cases = {
+            "E roblox  : Disconnected from game server: error code 277": 'kicked',
+            "E roblox  : You were kicked from this experience": 'kicked',
+            "V InputDispatcher: kickstart input pipeline for display 0": None,
+            "W roblox  : Texture cache miss for asset 1818 (banner_background.png)": None,
+            "W ActivityManager: ANR in com.roblox.client": 'frozen',
+            "I roblox  : request timed out after 30s": 'frozen',
+            "I chatty  : Panorama fades in": None,
+            "E roblox  : LuaError: attempt to index nil value": 'script_error',
+        }
+        for line, expected in cases.items():
+            self.assertEqual(CLASSIFIER.classify(line), expected, line)
+
+    def test_exception_class_names_are_crashes(self):
+        for line in ("E AndroidRuntime: java.lang.NullPointerException: Attempt to invoke virtual method",
+                     "E AndroidRuntime: FATAL EXCEPTION: GLThread 1204",
+                     "W System.err: IllegalStateException thrown in callback"):
+            self.assertEqual(CLASSIFIER.classify(line), 'crash', line)
+        self.assertIsNone(CLASSIFIER.classify("I roblox  : exceptional frame pacing"))
+
+    def test_priority_within_a_line(self):
+        self.assertEqual(CLASSIFIER.classify("E roblox  : kicked after crash"), 'crash')
+
+    def test_blob_returns_first_line_of_best_category(self):
+        noise = ["D roblox  : HttpRequest GET returned 200"] * 5000
+        text = "\n".join(noise + ["E roblox  : kicked by server"] + noise +
+                         ["E AndroidRuntime: FATAL EXCEPTION: main"] + noise +
+                         ["E AndroidRuntime: SIGSEGV in libroblox"])
+        # The crash sits windows past the kick and must still win.
+        self.assertGreater(text.index("FATAL"), CLASSIFIER.WINDOW)
+        self.assertEqual(CLASSIFIER.classify_text(text), ('crash', "E AndroidRuntime: FATAL EXCEPTION: main"))
+        self.assertEqual(CLASSIFIER.classify_text("\n".join(noise)), (None, ""))
+
+    def test_case_folding_fallback(self):
+        # 'İ' lowercases to two characters, which moves offsets; the regex then runs case-insensitively.
+        text = "I x: İstanbul\nE roblox  : Kicked by server"
+        self.assertEqual(CLASSIFIER.classify_text(text), ('kicked', "E roblox  : Kicked by server"))
+        self.assertEqual(list(CLASSIFIER.scan(text)), [('kicked', "E roblox  : Kicked by server")])
+
+    def test_paths_agree(self):
+        lines = synthetic_log(0.5, signal_rate=0.01)
+        per_line = list(CLASSIFIER.classify_lines(lines))
+        self.assertTrue(per_line)
+        self.assertEqual(list(CLASSIFIER.scan("\n".join(lines))), per_line)
+        best = min(per_line, key=lambda item: CLASSIFIER.priority[item[0]])
+        self.assertEqual(CLASSIFIER.classify_text("\n".join(lines)), best)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent shell session against a real local sh
+Usage: python -m pytest bench/test_shell_session.py  (or python bench/test_shell_session.py)
+Covers sentinel framing (stdout, stderr, exit status, output without a trailing
+newline), timeouts, restarting a dead shell and the bounded wait on a busy session.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import Rejoiner
+
+
+class ShellSessionTest(unittest.TestCase):
+    def setUp(self):
+        Rejoiner.configure_logging({'log_level': 'ERROR', 'log_file': None})
+        self.session = Rejoiner.ShellSession(['sh'])
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_framing(self):
+        result = self.session.run("printf 'one\\ntwo'; echo err >&2; exit 3")
+        self.assertEqual(result.stdout, "one\ntwo")
+        self.assertEqual(result.stderr, "err\n")
+        self.assertEqual(result.returncode, 3)
+        # exit ran in a subshell: the session and its pid survive.
+        pid = self.session.process.pid
+        self.assertEqual(self.session.run("echo \"it's\"; true").stdout, "it's\n")
+        self.assertEqual(self.session.process.pid, pid)
+
+    def test_quotes_and_stdin(self):
+        # Commands cannot read the framing script from the session's stdin.
+        result = self.session.run("cat; echo \"a 'b' c\"")
+        self.assertEqual(result.stdout, "a 'b' c\n")
+
+    def test_timeout_restarts(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.session.run("sleep 5", timeout=0.3)
+        self.assertFalse(self.session.is_alive())
+        # The late sentinel of the killed command must not leak into the next one.
+        self.assertEqual(self.session.run("echo after").stdout, "after\n")
+        self.assertEqual(self.session.starts, 2)
+
+    def test_dead_shell_is_restarted(self):
+        self.session.run("true")
+        self.session.process.kill()
+        self.session.process.wait()
+        self.assertEqual(self.session.run("echo back").stdout, "back\n")
+        self.assertEqual(self.session.starts, 2)
+
+    def test_busy_session_falls_back(self):
+        self.session.run("true")
+        slow = threading.Thread(target=self.session.run, args=("sleep 1",))
+        slow.start()
+        time.sleep(0.1)
+        started = time.monotonic()
+        self.assertIsNone(self.session.run("echo quick", wait=0.1))
+        self.assertLess(time.monotonic() - started, 0.5)
+        slow.join()
+        self.assertEqual(self.session.run("echo quick", wait=0.1).stdout, "quick\n")
+
+    def test_run_shell_command_background(self):
+        # A background command never touches the shared session, even while it is busy.
+        session = Rejoiner.get_shell_session(None)
+        session.run("true")
+        with session.lock:
+            started = time.monotonic()
+            self.assertEqual(Rejoiner.run_shell_command("echo bg", background=True), "bg")
+            self.assertLess(time.monotonic() - started, session.LOCK_WAIT)
+        Rejoiner.close_shell_sessions()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Builds Rejoiner.pyz, a single-file zipapp of Rejoiner.py with precompiled bytecode
+Usage: python build_pyz.py [--source Rejoiner.py] [--output Rejoiner.pyz]
+Run it with the Python that will run the tool (setup.sh does this on the device):
+bytecode is specific to the interpreter version. The source is stored next to the
+bytecode, so another Python version still runs the archive, only without the
+saved compile time. Start it with: python Rejoiner.pyz [options]
+"""
+
+import argparse
+import os
+import py_compile
+import shutil
+import sys
+import tempfile
+import zipapp
+
+MAIN = "import Rejoiner\nRejoiner.run_cli()\n"
+
+
+def build(source, output, optimize=-1):
+    staging = tempfile.mkdtemp(prefix='rejoiner_pyz')
+    try:
+        shutil.copyfile(source, os.path.join(staging, 'Rejoiner.py'))
+        with open(os.path.join(staging, '__main__.py'), 'w') as f:
+            f.write(MAIN)
+        # Unchecked hash-based pycs are used without comparing them to the source,
+        # which zipimport would otherwise do through the stored mtime.
+        for name in ('Rejoiner', '__main__'):
+            py_compile.compile(os.path.join(staging, name + '.py'), cfile=os.path.join(staging, name + '.pyc'),
+                               dfile=name + '.py', doraise=True, optimize=optimize,
+                               invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        tmp = output + '.tmp'
+        zipapp.create_archive(staging, tmp, interpreter='/usr/bin/env python3')
+        os.replace(tmp, output)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return output
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build the Rejoiner zipapp")
+    parser.add_argument('--source', default=os.path.join(here, 'Rejoiner.py'))
+    parser.add_argument('--output', default=os.path.join(here, 'Rejoiner.pyz'))
+    args = parser.parse_args()
+    build(args.source, args.output)
+    print(f"Built {args.output} ({os.path.getsize(args.output) // 1024} KB) for Python {sys.version.split()[0]}")
+
+
+if __name__ == '__main__':
+    main()
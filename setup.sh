@@ -55,6 +55,14 @@ curl -Ls "https://raw.githubusercontent.com/Day326/setup-termux/refs/heads/main/
 su -c "chmod 644 /sdcard/Download/Rejoiner.py"
 echo "Rejoiner.py downloaded to /sdcard/Download"
 
+curl -Ls "https://raw.githubusercontent.com/Day326/setup-termux/refs/heads/main/build_pyz.py" -o "$PREFIX/tmp/build_pyz.py"
+if python "$PREFIX/tmp/build_pyz.py" --source /sdcard/Download/Rejoiner.py --output /sdcard/Download/Rejoiner.pyz; then
+    echo "Start it with: python /sdcard/Download/Rejoiner.pyz (precompiled, faster start)"
+else
+    echo "Warning: Could not build Rejoiner.pyz. Start it with: python /sdcard/Download/Rejoiner.py"
+fi
+rm -f "$PREFIX/tmp/build_pyz.py"
+
 if ! su -c "pm list packages com.roblox.client" | grep -q "com.roblox.client"; then
     echo "Warning: Roblox is not installed."
 fi
\ No newline at end of file